@@ -1,13 +1,23 @@
-import copy
+import contextlib
+import datetime
 
+import numpy as np
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 
 from budgeter.obligation_types import ObligationType
 from budgeter.obligation import Obligation
-from budgeter.payment_plan import run_payment_plan
+from budgeter.book import ObligationBook
+from budgeter import profiling
+from budgeter.cache import ResultCache, scenario_key
+from budgeter.store import ResultStore
+from budgeter.downsample import MAX_POINTS, lttb, payoff_indices, use_webgl
+from budgeter.payment_plan import StopReason
+from budgeter.sensitivity import compute_sensitivity
+from budgeter.sweep import debt_specs, run_scenarios, summarize_scenarios
+from budgeter.target import required_monthly_funds
+
+show_timings = st.sidebar.checkbox("Show timings", key="chk_timings")
 
 st.markdown("# Debt Calculator")
 st.markdown(
@@ -15,343 +25,534 @@ st.markdown(
 )
 
 
-def run_payment_plans_for_different_payments(
-    debt_list: list[Obligation], payments: list[float], strategy: str
-):
-    all_dfs = []
-    for payment in payments:
-        curr_debt_list = copy.deepcopy(debt_list)
-
-        curr_df = run_payment_plan(curr_debt_list, payment)
-        curr_df["strategy"] = strategy
-        curr_df["monthly_payment"] = payment
-        all_dfs.append(curr_df)
+@st.cache_resource
+def get_result_cache():
+    # Shared by every session so unchanged scenarios are never simulated twice, and backed by
+    # a store on disk so they are not simulated again after a restart either
+    return ResultCache(store=ResultStore())
 
-    return all_dfs
 
-
-if "debt_df" not in st.session_state:
-    debt_df = pd.DataFrame(
-        data={
-            "Amount": [20000, 30000],
-            "Interest Rate": [3, 4.25],
-            "Minimum Payment": [200, 100],
-        }
+def summarize_payment_plans_for_different_payments(
+    strategy_debt_lists: dict[str, list[Obligation]],
+    payments: list[float],
+    max_months: int,
+):
+    # Only the totals are needed to compare plans, full history is built for the one
+    # picked under Strategy Details
+    scenarios = [
+        (strategy, debt_specs(debt_list), payment)
+        for strategy, debt_list in strategy_debt_lists.items()
+        for payment in payments
+    ]
+    summaries = summarize_scenarios(
+        [(specs, payment) for _, specs, payment in scenarios],
+        totals=True,
+        cache=get_result_cache(),
+        max_months=max_months,
     )
 
-    st.session_state.debt_df = debt_df
-    st.session_state.strategy_disabled = True
+    return [
+        (strategy, payment, summary)
+        for (strategy, _, payment), summary in zip(scenarios, summaries)
+    ]
 
 
-if "payment_df" not in st.session_state:
-    payment_df = pd.DataFrame(
-        data={"Amount": [500, 400]},
+def run_payment_plan_df(debt_list: list[Obligation], payment: float, max_months: int):
+    result = run_scenarios(
+        [(debt_specs(debt_list), payment)],
+        cache=get_result_cache(),
+        max_months=max_months,
     )
+    return result[0].to_dataframe()
 
-    st.session_state.payment_df = payment_df
-
-st.markdown("## Loan Information")
-st.markdown(
-    """
-    Set up information about your loan here. You can probably use personal data because I don't have any particular desire to learn how to steal it from you.
-    
-    ### Debt Details
-    Enter any number of loans, their interest rates, and their minimum payments if they have any in the table below."""
-)
-
-curr_debt_df = st.data_editor(
-    st.session_state.debt_df,
-    column_config={
-        "Amount": st.column_config.NumberColumn(
-            "Loan Amount",
-            min_value=0,
-            step=1,
-            format="dollar",
-            required=True,
-        ),
-        "Interest Rate": st.column_config.NumberColumn(
-            "Interest Rate", min_value=0, step=0.01, format="%f%%", required=True
-        ),
-        "Minimum Payment": st.column_config.NumberColumn(
-            "Minimum Payment", min_value=0, step=1, format="dollar", required=True
-        ),
-    },
-    num_rows="dynamic",
-    hide_index=True,
-)
-
-st.markdown(
-    """
-    ### Monthly Payments
-
-    Enter how much money you can put down to all loans combined. You can enter multiple values to see how it will affect your repayment. 
-    """
-)
-curr_payment_df = st.data_editor(
-    st.session_state.payment_df,
-    column_config={
-        "Amount": st.column_config.NumberColumn(
-            "Payment Amount",
-            min_value=1,
-            step=1,
-            format="dollar",
-            required=True,
-        )
-    },
-    num_rows="dynamic",
-)
 
-master_debt_list = []
-for i, row in curr_debt_df.iterrows():
-    master_debt_list.append(
-        Obligation(
-            f"Loan {i}",
-            amount=row["Amount"],
-            interest_rate=row["Interest Rate"],
-            minimum_payment=row["Minimum Payment"],
+@st.cache_data(max_entries=256)
+def get_required_monthly_funds(
+    debts_key: str, strategy: str, target_months: int, _debt_list: list[Obligation]
+):
+    # The debts are left out of Streamlit's hash since debts_key already identifies them
+    return required_monthly_funds(_debt_list, target_months)
+
+
+# Nothing is recorded unless timings are shown, and the profile is always closed, even when
+# Streamlit stops the script early for a rerun
+with profiling.profile() if show_timings else contextlib.nullcontext() as profiler:
+    if "debt_df" not in st.session_state:
+        debt_df = pd.DataFrame(
+            data={
+                "Amount": [20000, 30000],
+                "Interest Rate": [3, 4.25],
+                "Minimum Payment": [200, 100],
+            }
         )
-    )
-
-st.markdown(
-    """
-    ### Strategies
-
-    Check which strategies you want to examine for paying off the loans. These will not do anything if you only have a single loan.
-
-    The snowball method is a favorite of Dave Ramsey. With this method you payoff your smallest debts first and then use the extra money you've 
-    freed up to pay off the next biggest debt. For more details see [here](https://www.ramseysolutions.com/debt/how-the-debt-snowball-method-works?srsltid=AfmBOoreCjJEojZdIiVnpkaiBETAU6Q_G9QCmSNMRTrHHS_XlrPtGYXG).
 
-    The avalanche method is where you pay off the debts with the highest interest rates first. See this [article](https://www.nerdwallet.com/article/finance/what-is-a-debt-avalanche) for more detail.
+        st.session_state.debt_df = debt_df
+        st.session_state.strategy_disabled = True
 
-    Finally, the table order will try to pay off the debts as you've entered them in the table above. This will let you test out any custom scenarios. 
+    if "payment_df" not in st.session_state:
+        payment_df = pd.DataFrame(
+            data={"Amount": [500, 400]},
+        )
 
-    """
-)
+        st.session_state.payment_df = payment_df
 
-col1, col2, col3 = st.columns(3)
-with col1:
-    use_snowball = st.checkbox(
-        label="Snowball",
-        key="chk_snowball",
-        value=True,
+    st.markdown("## Loan Information")
+    st.markdown(
+        """
+        Set up information about your loan here. You can probably use personal data because I don't have any particular desire to learn how to steal it from you.
+    
+        ### Debt Details
+        Enter any number of loans, their interest rates, and their minimum payments if they have any in the table below."""
     )
-with col2:
-    use_avalanche = st.checkbox(label="Avalanche", key="chk_avalanche", value=True)
-with col3:
-    use_table = st.checkbox(
-        label="Table Order",
-        key="chk_table",
+
+    curr_debt_df = st.data_editor(
+        st.session_state.debt_df,
+        column_config={
+            "Amount": st.column_config.NumberColumn(
+                "Loan Amount",
+                min_value=0,
+                step=1,
+                format="dollar",
+                required=True,
+            ),
+            "Interest Rate": st.column_config.NumberColumn(
+                "Interest Rate", min_value=0, step=0.01, format="%f%%", required=True
+            ),
+            "Minimum Payment": st.column_config.NumberColumn(
+                "Minimum Payment", min_value=0, step=1, format="dollar", required=True
+            ),
+        },
+        num_rows="dynamic",
+        hide_index=True,
     )
 
-st.markdown("## Results")
-if len(curr_debt_df) == 0:
-    st.write("Add some debts to get started.")
-elif len(curr_payment_df) == 0:
-    st.write("Add some payment options to get started.")
-elif (not use_snowball and not use_avalanche and not use_table) and len(
-    curr_debt_df
-) > 1:
-    st.write("You must select at least one strategy.")
-else:
-
-    all_dfs = []
-    payments = curr_payment_df["Amount"].tolist()
-
-    if len(curr_debt_df) > 1:
-        if use_snowball:
-            snowball_debt_list = sorted(
-                master_debt_list, key=lambda debt: debt.amount, reverse=False
-            )
+    st.markdown(
+        """
+        ### Monthly Payments
 
-            all_dfs += run_payment_plans_for_different_payments(
-                snowball_debt_list, payments, "snowball"
+        Enter how much money you can put down to all loans combined. You can enter multiple values to see how it will affect your repayment. 
+        """
+    )
+    curr_payment_df = st.data_editor(
+        st.session_state.payment_df,
+        column_config={
+            "Amount": st.column_config.NumberColumn(
+                "Payment Amount",
+                min_value=1,
+                step=1,
+                format="dollar",
+                required=True,
             )
+        },
+        num_rows="dynamic",
+    )
+    horizon_years = st.number_input(
+        "Planning Horizon (years)",
+        min_value=1,
+        max_value=100,
+        value=100,
+        step=1,
+        key="num_horizon",
+    )
 
-        if use_avalanche:
-            avalanche_debt_list = sorted(
-                master_debt_list, key=lambda debt: debt.interest_rate, reverse=True
-            )
-            all_dfs += run_payment_plans_for_different_payments(
-                avalanche_debt_list, payments, "avalanche"
-            )
+    master_debt_list = ObligationBook.from_dataframe(
+        curr_debt_df,
+        columns={
+            "Amount": "amount",
+            "Interest Rate": "interest_rate",
+            "Minimum Payment": "minimum_payment",
+        },
+        name_prefix="Loan",
+    ).to_obligations()
 
-        if use_table:
-            all_dfs += run_payment_plans_for_different_payments(
-                master_debt_list, payments, "Table Order"
-            )
-    else:
-        all_dfs += run_payment_plans_for_different_payments(
-            master_debt_list, payments, "Pay"
-        )
+    st.markdown(
+        """
+        ### Strategies
 
-    summary_df = pd.DataFrame(
-        columns=["Monthly Payment", "Strategy", "Total Paid", "Time Taken", "months"]
-    )
-    num_to_display = 0
+        Check which strategies you want to examine for paying off the loans. These will not do anything if you only have a single loan.
 
-    balance_fig = go.Figure()
-    total_fig = go.Figure()
+        The snowball method is a favorite of Dave Ramsey. With this method you payoff your smallest debts first and then use the extra money you've 
+        freed up to pay off the next biggest debt. For more details see [here](https://www.ramseysolutions.com/debt/how-the-debt-snowball-method-works?srsltid=AfmBOoreCjJEojZdIiVnpkaiBETAU6Q_G9QCmSNMRTrHHS_XlrPtGYXG).
 
-    for df in all_dfs:
-        overall_total_paid = df.iloc[-1]["total_paid"]
-        initial_total_balance = df.iloc[0]["total_balance"]
-        months_took = int(df.iloc[-1]["month"])
-        monthly_payment = df.iloc[0]["monthly_payment"]
-        strategy = df.iloc[0]["strategy"].title()
+        The avalanche method is where you pay off the debts with the highest interest rates first. See this [article](https://www.nerdwallet.com/article/finance/what-is-a-debt-avalanche) for more detail.
 
-        month_tick = 12 if months_took >= 24 else 3
+        Finally, the table order will try to pay off the debts as you've entered them in the table above. This will let you test out any custom scenarios. 
 
-        years_took = int(months_took / 12)
-        months_remaining = months_took % 12
+        """
+    )
 
-        if months_took >= 12 * 100:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        use_snowball = st.checkbox(
+            label="Snowball",
+            key="chk_snowball",
+            value=True,
+        )
+    with col2:
+        use_avalanche = st.checkbox(label="Avalanche", key="chk_avalanche", value=True)
+    with col3:
+        use_table = st.checkbox(
+            label="Table Order",
+            key="chk_table",
+        )
 
-            summary_df.loc[len(summary_df)] = {
-                "Monthly Payment": monthly_payment,
-                "Strategy": strategy,
-                "Time Taken": f"Will not pay off in 100 years",
-            }
+    st.markdown("## Results")
+    if len(curr_debt_df) == 0:
+        st.write("Add some debts to get started.")
+    elif len(curr_payment_df) == 0:
+        st.write("Add some payment options to get started.")
+    elif (not use_snowball and not use_avalanche and not use_table) and len(
+        curr_debt_df
+    ) > 1:
+        st.write("You must select at least one strategy.")
+    else:
+        # plotly is slow to import, so the inputs above are shown before it is loaded
+        import plotly.graph_objects as go
 
-        else:
-            num_to_display += 1
-            summary_df.loc[len(summary_df)] = {
-                "Monthly Payment": monthly_payment,
-                "Strategy": strategy,
-                "Total Paid": overall_total_paid,
-                "Time Taken": f"{years_took:d} year(s) and {months_remaining:d} month(s)",
-            }
+        strategy_debt_lists = {}
+        payments = curr_payment_df["Amount"].tolist()
 
-            balance_fig.add_trace(
-                go.Scatter(
-                    x=df["month"],
-                    y=df["total_balance"],
-                    name=f"{strategy} - ${monthly_payment:,.2f}",
+        if len(curr_debt_df) > 1:
+            if use_snowball:
+                strategy_debt_lists["snowball"] = sorted(
+                    master_debt_list, key=lambda debt: debt.amount, reverse=False
                 )
-            )
-            total_fig.add_trace(
-                go.Scatter(
-                    x=df["month"],
-                    y=df["total_paid"],
-                    name=f"{strategy} - ${monthly_payment:,.2f}",
+
+            if use_avalanche:
+                strategy_debt_lists["avalanche"] = sorted(
+                    master_debt_list, key=lambda debt: debt.interest_rate, reverse=True
                 )
-            )
 
-    summary_df = summary_df.sort_values(by="Monthly Payment")
-    summary_df["Savings from Worst Scenario"] = (
-        summary_df["Total Paid"].max() - summary_df["Total Paid"]
-    )
+            if use_table:
+                strategy_debt_lists["Table Order"] = master_debt_list
+        else:
+            strategy_debt_lists["Pay"] = master_debt_list
+
+        all_summaries = summarize_payment_plans_for_different_payments(
+            strategy_debt_lists, payments, 12 * horizon_years
+        )
+        never_pays_off = {
+            StopReason.HORIZON: f"Will not pay off in {horizon_years} years",
+            StopReason.BELOW_MINIMUMS: "Never pays off, the payment does not cover the minimums",
+            StopReason.INTEREST_EXCEEDS_FUNDS: "Never pays off, interest outgrows the payment",
+            StopReason.NOT_SHRINKING: "Never pays off, the loans left keep growing",
+        }
 
-    st.dataframe(
-        summary_df[
-            [
+        summary_df = pd.DataFrame(
+            columns=[
                 "Monthly Payment",
                 "Strategy",
                 "Total Paid",
                 "Time Taken",
-                "Savings from Worst Scenario",
+                "months",
             ]
-        ],
-        column_config={
-            "Monthly Payment": st.column_config.NumberColumn(
-                format="dollar",
-            ),
-            "Total Paid": st.column_config.NumberColumn(
-                format="dollar",
-            ),
-            "Savings from Worst Scenario": st.column_config.NumberColumn(
-                format="dollar",
-            ),
-        },
-        hide_index=True,
-    )
+        )
+        num_to_display = 0
 
-    if num_to_display > 0:
+        balance_fig = go.Figure()
+        total_fig = go.Figure()
 
-        balance_fig.update_layout(
-            title="Outstanding Balance by Month",
-            xaxis_title="Month",
-            yaxis_title="Dollars ($)",
-            xaxis=dict(tickmode="linear", tick0=0, dtick=month_tick),
+        # Long plans are cut down to their shape plus the payoff months, and drawn with WebGL once
+        # the charts hold too many points for the browser to draw them as SVG
+        paid_columns = [f"Loan {i}_total_paid" for i in range(len(curr_debt_df))]
+        num_chart_points = sum(
+            [min(summary.months + 1, MAX_POINTS) for _, _, summary in all_summaries]
         )
-        total_fig.update_layout(
-            title="Total Paid by Month",
-            xaxis_title="Month",
-            yaxis_title="Dollars ($)",
-            xaxis=dict(tickmode="linear", tick0=0, dtick=month_tick),
+        Scatter = go.Scattergl if use_webgl(num_chart_points) else go.Scatter
+
+        for strategy, monthly_payment, summary in all_summaries:
+            overall_total_paid = summary.total_paid
+            months_took = summary.months
+            strategy = strategy.title()
+
+            month_tick = 12 if months_took >= 24 else 3
+
+            years_took = int(months_took / 12)
+            months_remaining = months_took % 12
+
+            if not summary.is_finished:
+
+                summary_df.loc[len(summary_df)] = {
+                    "Monthly Payment": monthly_payment,
+                    "Strategy": strategy,
+                    "Time Taken": never_pays_off[summary.stop_reason],
+                }
+
+            else:
+                num_to_display += 1
+                summary_df.loc[len(summary_df)] = {
+                    "Monthly Payment": monthly_payment,
+                    "Strategy": strategy,
+                    "Total Paid": overall_total_paid,
+                    "Time Taken": f"{years_took:d} year(s) and {months_remaining:d} month(s)",
+                }
+
+                months = np.arange(months_took + 1)
+                payoff_rows = [
+                    month for month in summary.payoff_month if month is not None
+                ]
+                balance_rows = lttb(
+                    months, summary.total_balance_by_month, keep=payoff_rows
+                )
+                total_rows = lttb(months, summary.total_paid_by_month, keep=payoff_rows)
+
+                balance_fig.add_trace(
+                    Scatter(
+                        x=months[balance_rows],
+                        y=summary.total_balance_by_month[balance_rows],
+                        name=f"{strategy} - ${monthly_payment:,.2f}",
+                    )
+                )
+                total_fig.add_trace(
+                    Scatter(
+                        x=months[total_rows],
+                        y=summary.total_paid_by_month[total_rows],
+                        name=f"{strategy} - ${monthly_payment:,.2f}",
+                    )
+                )
+
+        summary_df = summary_df.sort_values(by="Monthly Payment")
+        summary_df["Savings from Worst Scenario"] = (
+            summary_df["Total Paid"].max() - summary_df["Total Paid"]
         )
 
-        st.plotly_chart(balance_fig)
-        st.plotly_chart(total_fig)
+        st.dataframe(
+            summary_df[
+                [
+                    "Monthly Payment",
+                    "Strategy",
+                    "Total Paid",
+                    "Time Taken",
+                    "Savings from Worst Scenario",
+                ]
+            ],
+            column_config={
+                "Monthly Payment": st.column_config.NumberColumn(
+                    format="dollar",
+                ),
+                "Total Paid": st.column_config.NumberColumn(
+                    format="dollar",
+                ),
+                "Savings from Worst Scenario": st.column_config.NumberColumn(
+                    format="dollar",
+                ),
+            },
+            hide_index=True,
+        )
 
-    st.markdown("## Strategy Details")
-    st.markdown(
-        "Here you can select a specific strategy to see what a specific strategy looks like on a loan-by-loan basis."
-    )
-    payment_options = {
-        f"{row['Strategy']} - ${row['Monthly Payment']}": (
-            row["Strategy"],
-            row["Monthly Payment"],
+        st.markdown("### Target Payoff Date")
+        st.markdown(
+            "Pick when you want to be debt free to see the smallest monthly payment that gets you there with each strategy."
+        )
+        today = datetime.date.today()
+        target_date = st.date_input(
+            "Target Date",
+            value=today + datetime.timedelta(days=5 * 365),
+            min_value=today + datetime.timedelta(days=31),
+            max_value=today + datetime.timedelta(days=100 * 365),
+        )
+        target_months = (target_date.year - today.year) * 12 + (
+            target_date.month - today.month
         )
-        for i, row in summary_df[["Monthly Payment", "Strategy"]].iterrows()
-    }
 
-    selected_strategy_key = st.selectbox(
-        label="Select Payment Strategy", options=payment_options.keys()
-    )
+        target_df = pd.DataFrame(
+            data={
+                "Strategy": [strategy.title() for strategy in strategy_debt_lists],
+                "Required Monthly Payment": [
+                    # The monthly funds are what is being solved for, so only the debts are keyed
+                    get_required_monthly_funds(
+                        scenario_key(debt_specs(debt_list), 0),
+                        strategy,
+                        target_months,
+                        debt_list,
+                    )
+                    for strategy, debt_list in strategy_debt_lists.items()
+                ],
+            }
+        )
+        st.dataframe(
+            target_df,
+            column_config={
+                "Required Monthly Payment": st.column_config.NumberColumn(
+                    format="dollar",
+                ),
+            },
+            hide_index=True,
+        )
 
-    selected_strategy, selected_payment_amount = payment_options[selected_strategy_key]
+        if num_to_display > 0:
 
-    def find_df_to_breakdown(all_dfs, selected_strategy, selected_payment_amount):
-        for df in all_dfs:
-            curr_monthly_payment = df.iloc[0]["monthly_payment"]
-            curr_strategy = df.iloc[0]["strategy"].title()
+            with profiling.phase("figures"):
+                balance_fig.update_layout(
+                    title="Outstanding Balance by Month",
+                    xaxis_title="Month",
+                    yaxis_title="Dollars ($)",
+                    xaxis=dict(tickmode="linear", tick0=0, dtick=month_tick),
+                )
+                total_fig.update_layout(
+                    title="Total Paid by Month",
+                    xaxis_title="Month",
+                    yaxis_title="Dollars ($)",
+                    xaxis=dict(tickmode="linear", tick0=0, dtick=month_tick),
+                )
 
-            if (
-                curr_monthly_payment == selected_payment_amount
-                and curr_strategy == selected_strategy
-            ):
-                return df
+                st.plotly_chart(balance_fig)
+                st.plotly_chart(total_fig)
 
-    selected_df = find_df_to_breakdown(
-        all_dfs, selected_strategy, selected_payment_amount
-    )
+        st.markdown("## Strategy Details")
+        st.markdown(
+            "Here you can select a specific strategy to see what a specific strategy looks like on a loan-by-loan basis."
+        )
+        payment_options = {
+            f"{row['Strategy']} - ${row['Monthly Payment']}": (
+                row["Strategy"],
+                row["Monthly Payment"],
+            )
+            for i, row in summary_df[["Monthly Payment", "Strategy"]].iterrows()
+        }
+
+        selected_strategy_key = st.selectbox(
+            label="Select Payment Strategy", options=payment_options.keys()
+        )
 
-    breakdown_balance_fig = go.Figure()
-    breakdown_total_paid_fig = go.Figure()
+        selected_strategy, selected_payment_amount = payment_options[
+            selected_strategy_key
+        ]
+
+        def find_debt_list_to_breakdown(strategy_debt_lists, selected_strategy):
+            for strategy, debt_list in strategy_debt_lists.items():
+                if strategy.title() == selected_strategy:
+                    return debt_list
+
+        selected_df = run_payment_plan_df(
+            find_debt_list_to_breakdown(strategy_debt_lists, selected_strategy),
+            selected_payment_amount,
+            12 * horizon_years,
+        )
+
+        with profiling.phase("figures"):
+            breakdown_balance_fig = go.Figure()
+            breakdown_total_paid_fig = go.Figure()
+
+            payoff_rows = payoff_indices(selected_df[paid_columns])
+            Scatter = (
+                go.Scattergl
+                if use_webgl(len(curr_debt_df) * min(len(selected_df), MAX_POINTS))
+                else go.Scatter
+            )
+
+            for i in range(len(curr_debt_df)):
+                balance_rows = lttb(
+                    selected_df["month"],
+                    selected_df[f"Loan {i}_balance"],
+                    keep=payoff_rows,
+                )
+                total_paid_rows = lttb(
+                    selected_df["month"],
+                    selected_df[f"Loan {i}_total_paid"],
+                    keep=payoff_rows,
+                )
 
-    for i in range(len(curr_debt_df)):
+                breakdown_balance_fig.add_trace(
+                    Scatter(
+                        x=selected_df["month"].iloc[balance_rows],
+                        y=selected_df[f"Loan {i}_balance"].iloc[balance_rows],
+                        name=f"Loan {i+1}",
+                    )
+                )
+                breakdown_total_paid_fig.add_trace(
+                    Scatter(
+                        x=selected_df["month"].iloc[total_paid_rows],
+                        y=selected_df[f"Loan {i}_total_paid"].iloc[total_paid_rows],
+                        name=f"Loan {i+1}",
+                    )
+                )
 
-        breakdown_balance_fig.add_trace(
-            go.Scatter(
-                x=selected_df["month"],
-                y=selected_df[f"Loan {i}_balance"],
-                name=f"Loan {i+1}",
+            breakdown_balance_fig.update_layout(
+                title=f"Outstanding Balance by Month for {selected_strategy_key}",
+                xaxis_title="Month",
+                yaxis_title="Dollars ($)",
+                xaxis=dict(tickmode="linear", tick0=0, dtick=month_tick),
+            )
+            breakdown_total_paid_fig.update_layout(
+                title=f"Total Paid by Month for {selected_strategy_key}",
+                xaxis_title="Month",
+                yaxis_title="Dollars ($)",
+                xaxis=dict(tickmode="linear", tick0=0, dtick=month_tick),
             )
+
+            st.plotly_chart(breakdown_balance_fig)
+            st.plotly_chart(breakdown_total_paid_fig)
+        # st.dataframe(selected_df)
+
+        st.markdown("### Where an Extra Dollar Goes")
+        st.markdown(
+            "How much the total paid and the time taken by the selected strategy change for every dollar added to a loan or payment, or every percentage point added to an interest rate."
         )
-        breakdown_total_paid_fig.add_trace(
-            go.Scatter(
-                x=selected_df["month"],
-                y=selected_df[f"Loan {i}_total_paid"],
-                name=f"Loan {i+1}",
+        with profiling.phase("sensitivity"):
+            sensitivity = compute_sensitivity(
+                find_debt_list_to_breakdown(strategy_debt_lists, selected_strategy),
+                selected_payment_amount,
+                12 * horizon_years,
             )
+
+        loan_labels = {
+            debt.name: f"Loan {i + 1}" for i, debt in enumerate(master_debt_list)
+        }
+        input_labels = {
+            "amount": "Loan Amount",
+            "interest_rate": "Interest Rate",
+            "minimum_payment": "Minimum Payment",
+            "monthly_funds": "Monthly Payment",
+        }
+        sensitivity_df = sensitivity.to_dataframe()
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Loan": [
+                        loan_labels.get(debt, "All Loans")
+                        for debt in sensitivity_df["debt"]
+                    ],
+                    "Input": sensitivity_df["parameter"].map(input_labels),
+                    "Value": sensitivity_df["value"],
+                    "Total Paid Change": sensitivity_df["d_total_paid"],
+                    "Months Change": sensitivity_df["d_months"],
+                }
+            ),
+            column_config={
+                "Value": st.column_config.NumberColumn(format="%.2f"),
+                "Total Paid Change": st.column_config.NumberColumn(format="dollar"),
+                "Months Change": st.column_config.NumberColumn(format="%.3f"),
+            },
+            hide_index=True,
         )
 
-    breakdown_balance_fig.update_layout(
-        title=f"Outstanding Balance by Month for {selected_strategy_key}",
-        xaxis_title="Month",
-        yaxis_title="Dollars ($)",
-        xaxis=dict(tickmode="linear", tick0=0, dtick=month_tick),
-    )
-    breakdown_total_paid_fig.update_layout(
-        title=f"Total Paid by Month for {selected_strategy_key}",
-        xaxis_title="Month",
-        yaxis_title="Dollars ($)",
-        xaxis=dict(tickmode="linear", tick0=0, dtick=month_tick),
-    )
+        with st.expander("Cache Statistics"):
+            cache_stats = get_result_cache().stats()
+            st.write(
+                f"{cache_stats.hits} hits and {cache_stats.misses} misses "
+                + f"({cache_stats.hit_rate:.0%} hit rate), {cache_stats.evictions} evictions."
+            )
+            st.write(
+                f"{cache_stats.entries} results using {cache_stats.size_bytes / 1024:,.0f} KiB "
+                + f"of {cache_stats.max_bytes / 1024**2:.0f} MiB."
+            )
+            store_stats = get_result_cache().store.stats()
+            st.write(
+                f"{store_stats.entries} results on disk using "
+                + f"{store_stats.size_bytes / 1024:,.0f} KiB "
+                + f"of {store_stats.max_bytes / 1024**2:.0f} MiB."
+            )
 
-    st.plotly_chart(breakdown_balance_fig)
-    st.plotly_chart(breakdown_total_paid_fig)
-    # st.dataframe(selected_df)
+if profiler is not None:
+    with st.expander("Timings", expanded=True):
+        st.dataframe(
+            pd.DataFrame(profiler.rows()),
+            column_config={
+                "seconds": st.column_config.NumberColumn(format="%.4f"),
+            },
+            hide_index=True,
+        )
 
 st.markdown(
     """
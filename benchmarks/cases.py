@@ -0,0 +1,117 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from benchmarks.scenarios import APP_PAYMENTS, app_strategy_specs, random_payment_plan
+from budgeter.cents import compute_payment_plan_cents
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import run_payment_plan
+from budgeter.sweep import run_scenarios
+
+PLAN_DEBTS = (2, 10, 100, 1000)
+PLAN_MONTHS = (12, 120, 1200)
+
+# Larger plans are skipped with --quick
+QUICK_MAX_DEBT_MONTHS = 200_000
+
+
+@dataclass
+class Benchmark:
+    """
+    ``run`` simulates one scenario and returns how many debt-months it simulated, i.e. months
+    times the number of debts, and a checksum of the results so changes in output are caught.
+    """
+
+    name: str
+    run: Callable[[], tuple[int, float]]
+    size: int
+
+
+def _single_loan() -> tuple[int, float]:
+    loan = Obligation("mortgage", 400000, ObligationType.LOAN, 6.5, 150)
+
+    months = 0
+    while not loan.is_finished:
+        loan.advance_month(2800)
+        months += 1
+
+    return months, loan.get_total_paid()
+
+
+def _payment_plan(
+    specs: list[dict], monthly_funds: float
+) -> Callable[[], tuple[int, float]]:
+    def run():
+        debts = [Obligation(**spec) for spec in specs]
+        df = run_payment_plan(debts, monthly_funds)
+        return (len(df) - 1) * len(debts), round(float(df.iloc[-1]["total_paid"]), 2)
+
+    return run
+
+
+def _payment_plan_cents(
+    specs: list[dict], monthly_funds: float
+) -> Callable[[], tuple[int, float]]:
+    def run():
+        debts = [Obligation(**spec) for spec in specs]
+        result = compute_payment_plan_cents(debts, monthly_funds)
+        return (len(result) - 1) * len(debts), float(result.total_paid[-1])
+
+    return run
+
+
+def _app_sweep() -> tuple[int, float]:
+    strategy_specs = app_strategy_specs()
+    scenarios = [
+        (specs, payment)
+        for specs in strategy_specs.values()
+        for payment in APP_PAYMENTS
+    ]
+    results = run_scenarios(scenarios)
+
+    debt_months = sum(
+        [(len(result) - 1) * len(result.debt_names) for result in results]
+    )
+    checksum = sum([float(result.total_paid[-1]) for result in results])
+    return debt_months, round(checksum, 2)
+
+
+def _mortgage_table() -> tuple[int, float]:
+    months = 0
+    checksum = 0.0
+    for extra_payment in range(0, 5000, 100):
+        mortgage = Obligation("mortgage", 631960, ObligationType.LOAN, 4.750, 1000)
+        payoff = mortgage.project_payoff(4602 + extra_payment)
+        months += payoff.months
+        checksum += round(payoff.total_paid, 2)
+
+    return months, round(checksum, 2)
+
+
+def all_benchmarks() -> list[Benchmark]:
+    benchmarks = [Benchmark("single_loan", _single_loan, 360)]
+
+    for num_debts in PLAN_DEBTS:
+        for months in PLAN_MONTHS:
+            specs, monthly_funds = random_payment_plan(
+                num_debts, months, seed=num_debts * 10000 + months
+            )
+            benchmarks.append(
+                Benchmark(
+                    f"payment_plan_{num_debts}_debts_{months}_months",
+                    _payment_plan(specs, monthly_funds),
+                    num_debts * months,
+                )
+            )
+            benchmarks.append(
+                Benchmark(
+                    f"payment_plan_cents_{num_debts}_debts_{months}_months",
+                    _payment_plan_cents(specs, monthly_funds),
+                    num_debts * months,
+                )
+            )
+
+    benchmarks.append(Benchmark("app_sweep", _app_sweep, 15 * 2 * 120))
+    benchmarks.append(Benchmark("mortgage_table", _mortgage_table, 50 * 300))
+
+    return benchmarks
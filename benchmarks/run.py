@@ -0,0 +1,196 @@
+"""
+Runs the benchmarks and compares them against a stored baseline.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --quick --only payment_plan
+    python -m benchmarks.run --save-baseline
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.cases import QUICK_MAX_DEBT_MONTHS, Benchmark, all_benchmarks
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+MIN_ROUND_SECONDS = 0.1
+
+# Throughput may drop and peak memory may grow this much before it counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(benchmark: Benchmark, repeat: int) -> dict:
+    """
+    Times the best of ``repeat`` rounds, then measures peak memory in one more run. Fast
+    benchmarks run several times per round so each round takes at least
+    ``MIN_ROUND_SECONDS``.
+    """
+    calibration_seconds = calibrate()
+
+    start = time.perf_counter()
+    debt_months, checksum = benchmark.run()
+    loops = math.ceil(MIN_ROUND_SECONDS / max(time.perf_counter() - start, 1e-9))
+
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            benchmark.run()
+        seconds = min(seconds, (time.perf_counter() - start) / loops)
+
+    tracemalloc.start()
+    try:
+        benchmark.run()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": seconds,
+        "debt_months": debt_months,
+        "debt_months_per_second": debt_months / seconds,
+        "peak_bytes": peak_bytes,
+        "checksum": checksum,
+        "calibration_seconds": calibration_seconds,
+    }
+
+
+def calibrate(repeat: int = 5) -> float:
+    """
+    Times a fixed pure Python workload next to each benchmark. Throughput is compared relative
+    to this so a baseline from a faster or busier machine does not flag every benchmark.
+    """
+
+    def workload():
+        balance = 0.0
+        for month in range(200_000):
+            balance = balance * 1.004 + month % 7 - 3
+
+        return balance
+
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    return seconds
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    problems = []
+
+    if result["checksum"] != baseline["checksum"]:
+        problems.append(
+            f"results changed, checksum {result['checksum']} was {baseline['checksum']}"
+        )
+
+    # How much faster the machine is now than when the baseline was stored
+    machine_speed = baseline["calibration_seconds"] / result["calibration_seconds"]
+    speed = (
+        result["debt_months_per_second"]
+        / baseline["debt_months_per_second"]
+        / machine_speed
+    )
+    if speed < 1 - threshold:
+        problems.append(f"throughput is {speed:.0%} of baseline")
+
+    memory = result["peak_bytes"] / max(baseline["peak_bytes"], 1)
+    if memory > 1 + threshold:
+        problems.append(f"peak memory is {memory:.0%} of baseline")
+
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", help="Only run benchmarks whose name contains this")
+    parser.add_argument(
+        "--quick", action="store_true", help="Skip the largest payment plans"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed runs per benchmark"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store these results as the new baseline instead of comparing",
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    benchmarks = [
+        benchmark
+        for benchmark in all_benchmarks()
+        if (args.only is None or args.only in benchmark.name)
+        and (not args.quick or benchmark.size <= QUICK_MAX_DEBT_MONTHS)
+    ]
+
+    baseline = {}
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())["benchmarks"]
+
+    results = {}
+    regressions = 0
+    name_width = max([len(benchmark.name) for benchmark in benchmarks], default=0)
+
+    print(
+        f"{'benchmark':<{name_width}}  {'seconds':>9}  {'debt-months/s':>14}  {'peak MiB':>9}"
+    )
+    for benchmark in benchmarks:
+        result = measure(benchmark, args.repeat)
+
+        problems = []
+        if benchmark.name in baseline:
+            problems = compare(result, baseline[benchmark.name], args.threshold)
+            if problems:
+                # Measure once more so a noisy neighbour does not fail the run
+                result = measure(benchmark, args.repeat)
+                problems = compare(result, baseline[benchmark.name], args.threshold)
+
+        results[benchmark.name] = result
+
+        line = (
+            f"{benchmark.name:<{name_width}}  {result['seconds']:>9.4f}  "
+            + f"{result['debt_months_per_second']:>14,.0f}  "
+            + f"{result['peak_bytes'] / 1024**2:>9.2f}"
+        )
+        if problems:
+            regressions += 1
+            line += "  REGRESSION: " + "; ".join(problems)
+
+        print(line, flush=True)
+
+    if args.save_baseline:
+        # Keep stored results for benchmarks that were filtered out of this run
+        if args.baseline.exists():
+            results = json.loads(args.baseline.read_text())["benchmarks"] | results
+
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "benchmarks": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"Saved baseline to {args.baseline}")
+    elif regressions:
+        print(f"{regressions} benchmark(s) regressed against {args.baseline}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import numpy as np
+
+from budgeter.obligation_types import ObligationType
+
+APP_DEBTS = [
+    {"amount": 20000, "interest_rate": 3, "minimum_payment": 200},
+    {"amount": 30000, "interest_rate": 4.25, "minimum_payment": 100},
+]
+APP_PAYMENTS = [400, 500, 750, 1000, 1500]
+
+
+def random_payment_plan(
+    num_debts: int, months: int, seed: int
+) -> tuple[list[dict], float]:
+    """
+    Loans whose minimum payments only just cover their interest, plus monthly funds that would
+    pay each of them off in ``months`` months if every loan kept its own share. Paid off loans
+    hand their share on, so plans finish somewhat sooner, but plan length still scales with
+    ``months`` whatever the number of debts.
+    """
+    rng = np.random.default_rng(seed)
+    amounts = rng.uniform(500, 50000, num_debts).round(2)
+    interest_rates = rng.uniform(0, 25, num_debts).round(2)
+
+    monthly_rates = (interest_rates / 100) / 12
+    minimum_payments = (amounts * monthly_rates).round(2) + 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuities = np.where(
+            monthly_rates > 0,
+            amounts * monthly_rates / (1 - (1 + monthly_rates) ** -months),
+            amounts / months,
+        )
+
+    specs = [
+        {
+            "name": f"debt_{i}",
+            "amount": float(amount),
+            "obligation_type": ObligationType.LOAN,
+            "interest_rate": float(interest_rate),
+            "minimum_payment": float(minimum_payment),
+        }
+        for i, (amount, interest_rate, minimum_payment) in enumerate(
+            zip(amounts, interest_rates, minimum_payments)
+        )
+    ]
+    return specs, round(float(annuities.sum()), 2)
+
+
+def app_strategy_specs() -> dict[str, list[dict]]:
+    """The default debt table from ``app.py`` in each strategy's payoff order."""
+    specs = [
+        {
+            "name": f"Loan {i}",
+            "amount": float(debt["amount"]),
+            "obligation_type": ObligationType.LOAN,
+            "interest_rate": float(debt["interest_rate"]),
+            "minimum_payment": float(debt["minimum_payment"]),
+        }
+        for i, debt in enumerate(APP_DEBTS)
+    ]
+
+    return {
+        "snowball": sorted(specs, key=lambda spec: spec["amount"]),
+        "avalanche": sorted(
+            specs, key=lambda spec: spec["interest_rate"], reverse=True
+        ),
+        "Table Order": specs,
+    }
@@ -0,0 +1,116 @@
+"""
+Measures the latency of the payment plan service under concurrent load, e.g.
+
+    python -m benchmarks.service_load --requests 2000 --concurrency 64
+
+Starts a service in this process unless --port or --unix point at one that is already
+running. Requests are drawn from a small set of household scenarios, like several tools
+asking about the same few households, so some of them share in-flight work.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.scenarios import random_payment_plan
+from budgeter.service import DEFAULT_HOST, ScenarioClient, ScenarioService
+
+
+def household_scenarios(count: int, seed: int = 0) -> list[tuple[list[dict], float]]:
+    """Small portfolios, like one household's loans, that pay off within a few years."""
+    rng = random.Random(seed)
+    return [
+        random_payment_plan(rng.randint(1, 6), rng.choice([24, 60, 120]), seed=i)
+        for i in range(count)
+    ]
+
+
+async def _run_load(args: argparse.Namespace, client: ScenarioClient) -> list[float]:
+    scenarios = household_scenarios(args.scenarios, seed=args.seed)
+    rng = random.Random(args.seed)
+    requests = [rng.choice(scenarios) for _ in range(args.requests)]
+    latencies = []
+
+    async def worker():
+        while requests:
+            specs, monthly_funds = requests.pop()
+
+            start = time.perf_counter()
+            await client.evaluate(specs, monthly_funds)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    return latencies
+
+
+async def _main(args: argparse.Namespace):
+    service = None
+    server = None
+    if args.port is None and args.unix is None:
+        service = ScenarioService(batch_window=args.batch_window_ms / 1000)
+        server = await service.start(DEFAULT_HOST, 0)
+        port = server.sockets[0].getsockname()[1]
+    else:
+        port = args.port
+
+    client = await ScenarioClient.connect(DEFAULT_HOST, port, path=args.unix)
+
+    # Warm up the worker processes so their start up is not counted
+    await _run_load(
+        argparse.Namespace(**{**vars(args), "requests": args.concurrency}), client
+    )
+    if service is not None:
+        warm_up_stats = vars(service.stats).copy()
+
+    start = time.perf_counter()
+    latencies = np.array(await _run_load(args, client))
+    seconds = time.perf_counter() - start
+
+    await client.close()
+
+    print(f"{len(latencies):,} requests in {seconds:.2f} s", end=" ")
+    print(f"({len(latencies) / seconds:,.0f} requests/s)")
+    print(
+        f"latency p50 {np.percentile(latencies, 50) * 1000:.1f} ms, "
+        + f"p99 {np.percentile(latencies, 99) * 1000:.1f} ms, "
+        + f"max {latencies.max() * 1000:.1f} ms"
+    )
+
+    if service is not None:
+        stats = {
+            name: value - warm_up_stats[name]
+            for name, value in vars(service.stats).items()
+        }
+        print(
+            f"{stats['coalesced']:,} requests shared in-flight work, "
+            + f"{stats['scenarios_run']:,} scenarios run in {stats['batches']:,} batches"
+        )
+
+        server.close()
+        await server.wait_closed()
+        service.executor.shutdown()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--scenarios", type=int, default=20, help="Distinct scenarios to draw from"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, help="Port of a running service")
+    parser.add_argument("--unix", help="Unix socket of a running service")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    asyncio.run(_main(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
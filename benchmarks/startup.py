@@ -0,0 +1,112 @@
+"""
+Measures how long the budgeter modules take to import in a fresh interpreter and checks that
+they do not pull in heavy optional dependencies.
+
+    python -m benchmarks.startup
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+MODULES = (
+    "budgeter",
+    "budgeter.obligation",
+    "budgeter.payment_plan",
+    "budgeter.batch",
+    "budgeter.book",
+    "budgeter.cache",
+    "budgeter.cents",
+    "budgeter.checkpoint",
+    "budgeter.downsample",
+    "budgeter.monte_carlo",
+    "budgeter.ordering",
+    "budgeter.pipeline",
+    "budgeter.profiling",
+    "budgeter.sensitivity",
+    "budgeter.split",
+    "budgeter.store",
+    "budgeter.sweep",
+    "budgeter.target",
+    "budgeter.waterfall",
+)
+
+# Only loaded when a DataFrame or a figure is asked for
+FORBIDDEN = ("pandas", "plotly", "streamlit")
+
+# numpy alone takes around 0.1 s, so this leaves room for slow machines but not for pandas
+DEFAULT_MAX_SECONDS = 0.5
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({forbidden!r}))
+print(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    """Best import time of ``repeat`` fresh interpreters, and any forbidden modules loaded."""
+    root = Path(__file__).resolve().parent.parent
+
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, forbidden=FORBIDDEN)],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output)
+
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreters per module")
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=DEFAULT_MAX_SECONDS,
+        help="Fail if a module takes longer than this to import",
+    )
+    args = parser.parse_args(argv)
+
+    failures = 0
+    name_width = max([len(module) for module in MODULES])
+
+    print(f"{'module':<{name_width}}  {'seconds':>8}")
+    for module in MODULES:
+        result = measure_import(module, args.repeat)
+
+        problems = []
+        if result["loaded"]:
+            problems.append("imports " + ", ".join(result["loaded"]))
+        if result["seconds"] > args.max_seconds:
+            problems.append(f"slower than {args.max_seconds} s")
+
+        line = f"{module:<{name_width}}  {result['seconds']:>8.4f}"
+        if problems:
+            failures += 1
+            line += "  FAIL: " + "; ".join(problems)
+
+        print(line, flush=True)
+
+    if failures:
+        print(f"{failures} module(s) failed the startup check")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
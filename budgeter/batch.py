@@ -0,0 +1,520 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from budgeter import profiling
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import MAX_MONTHS, StopReason
+
+
+@dataclass
+class BatchPlanResult:
+    """
+    Outcome of many payment plans run together. Leading axes are (portfolio, monthly_funds)
+    and the last axis of the per-debt arrays follows the payoff order of each portfolio.
+
+    Debts that never finish have a ``finish_month`` of -1. Padding slots (see ``mask``) report
+    a ``finish_month`` of 0 and zero totals. ``stop_reason`` holds a ``StopReason`` for every
+    plan.
+    """
+
+    monthly_funds: np.ndarray
+    months: np.ndarray
+    is_finished: np.ndarray
+    balances: np.ndarray
+    total_paid: np.ndarray
+    total_interest: np.ndarray
+    total_costs: np.ndarray
+    finish_month: np.ndarray
+    stop_reason: np.ndarray | None = None
+
+    def get_total_paid(self) -> np.ndarray:
+        return self.total_paid.sum(axis=-1)
+
+    def get_total_balance(self) -> np.ndarray:
+        return self.balances.sum(axis=-1)
+
+
+def portfolio_arrays(portfolios: list[list[Obligation]]) -> dict[str, np.ndarray]:
+    """
+    Packs lists of obligations into padded (portfolio, debt) arrays that can be passed to
+    ``run_payment_plan_batch`` as keyword arguments. Each list should already be in the order
+    the debts are to be paid off.
+    """
+    num_debts = max((len(debts) for debts in portfolios), default=0)
+    shape = (len(portfolios), num_debts)
+
+    arrays = {
+        "amounts": np.zeros(shape),
+        "interest_rates": np.zeros(shape),
+        "minimum_payments": np.zeros(shape),
+        "fixed_costs": np.zeros(shape),
+        "is_savings": np.zeros(shape, dtype=bool),
+        "mask": np.zeros(shape, dtype=bool),
+    }
+
+    for i, debts in enumerate(portfolios):
+        for j, debt in enumerate(debts):
+            arrays["amounts"][i, j] = debt.amount
+            arrays["interest_rates"][i, j] = debt.interest_rate
+            arrays["minimum_payments"][i, j] = debt.minimum_payment or 0
+            arrays["fixed_costs"][i, j] = debt.fixed_costs or 0
+            arrays["is_savings"][i, j] = debt.obligation_type == ObligationType.SAVINGS
+            arrays["mask"][i, j] = True
+
+    return arrays
+
+
+class _BatchState:
+    """Working arrays for the scenarios that are still running."""
+
+    def __init__(self, rows, amounts, monthly_rates, fixed_costs, minimums, savings):
+        self.rows = rows
+        self.amounts = amounts
+        self.monthly_rates = monthly_rates
+        self.fixed_costs = fixed_costs
+        self.minimums = minimums
+        self.savings = savings
+
+    def take(self, keep: np.ndarray):
+        for name, value in vars(self).items():
+            setattr(self, name, value[keep])
+
+    def interest(self, col: int) -> np.ndarray:
+        return self.balance[:, col] * self.monthly_rates[:, col]
+
+    def unrounded_interest(self, balance, monthly_rates) -> np.ndarray:
+        """A month's interest on ``balance``, in the same units, before any rounding."""
+        return balance * monthly_rates
+
+    def set_rates(self, interest_rates: np.ndarray):
+        self.monthly_rates = np.broadcast_to(
+            (interest_rates / 100) / 12, self.amounts.shape
+        )
+
+
+def _advance_loans(state, col, payment, live):
+    balance = state.balance[:, col]
+    interest_amount = state.interest(col)
+    fixed_costs = state.fixed_costs[:, col]
+
+    amount_possible_to_pay = balance + interest_amount + fixed_costs
+    finishing = live & (payment > amount_possible_to_pay)
+    paying = live & ~finishing
+
+    state.total_interest[:, col] += np.where(live, interest_amount, 0)
+    state.total_costs[:, col] += np.where(live, fixed_costs, 0)
+
+    new_balance = ((balance + interest_amount) + fixed_costs) - payment
+    state.balance[:, col] = np.where(
+        finishing, 0, np.where(paying, new_balance, balance)
+    )
+    state.total_paid[:, col] += np.where(
+        finishing, amount_possible_to_pay, np.where(paying, payment, 0)
+    )
+
+    return finishing, np.where(finishing, payment - amount_possible_to_pay, 0)
+
+
+def _advance_savings(state, col, payment, live):
+    goal = state.amounts[:, col]
+    interest_amount = state.interest(col)
+
+    state.total_interest[:, col] += np.where(live, interest_amount, 0)
+    balance = np.where(
+        live, state.balance[:, col] + interest_amount, state.balance[:, col]
+    )
+
+    reached_by_interest = live & (balance >= goal)
+    reached_by_payment = live & ~reached_by_interest & (balance + payment >= goal)
+    paying = live & ~reached_by_interest & ~reached_by_payment
+
+    amount_to_pay = goal - balance
+    state.total_paid[:, col] += np.where(
+        reached_by_payment, amount_to_pay, np.where(paying, payment, 0)
+    )
+    state.balance[:, col] = np.where(
+        reached_by_payment, goal, np.where(paying, balance + payment, balance)
+    )
+
+    leftover = np.where(
+        reached_by_interest,
+        payment,
+        np.where(reached_by_payment, payment - amount_to_pay, 0),
+    )
+    return reached_by_interest | reached_by_payment, leftover
+
+
+def _advance_column(state, col, month, payment, live, any_loans, any_savings):
+    """
+    Advances the loans and savings goals in column ``col`` where ``live`` and records the
+    ones that finish. Returns the leftover payment, which is 0 where nothing finished.
+    """
+    finished = np.zeros_like(live)
+    leftover = np.zeros_like(payment)
+    if any_loans:
+        loans = live & ~state.savings[:, col]
+        finished, leftover = _advance_loans(state, col, payment, loans)
+    if any_savings:
+        goals = live & state.savings[:, col]
+        goals_finished, goals_leftover = _advance_savings(state, col, payment, goals)
+        finished = finished | goals_finished
+        leftover = np.where(goals, goals_leftover, leftover)
+
+    state.is_finished[:, col] |= finished
+    state.finish_month[:, col] = np.where(finished, month, state.finish_month[:, col])
+    return leftover
+
+
+def _priority_step(state, month, num_debts, any_loans, any_savings):
+    """One month of ``_advance_plan_month`` for every scenario in ``state``."""
+    total_minimum_payment = np.where(state.is_finished, 0, state.minimums).sum(axis=1)
+    extra_payment = state.funds - total_minimum_payment
+
+    for col in range(num_debts):
+        live = ~state.is_finished[:, col]
+        payment = state.minimums[:, col] + extra_payment
+
+        leftover = _advance_column(
+            state, col, month, payment, live, any_loans, any_savings
+        )
+        extra_payment = np.where(live, leftover, extra_payment)
+
+
+def _priority_payments(state) -> np.ndarray:
+    """The payments of ``_priority_step`` in a month where no debt is paid off."""
+    live = ~state.is_finished
+    total_minimum_payment = np.where(live, state.minimums, 0).sum(axis=1)
+
+    payments = np.where(live, state.minimums, 0)
+    payments[np.arange(payments.shape[0]), np.argmax(live, axis=1)] += (
+        state.funds - total_minimum_payment
+    )
+    return payments
+
+
+def _stop_reasons(
+    state, up_front: bool, payments=_priority_payments
+) -> list[tuple[np.ndarray, StopReason]]:
+    """
+    Where the scenarios in ``state`` can never finish and why, following
+    ``check_feasibility`` if ``up_front`` and ``_diverging_reason`` otherwise. ``payments``
+    gives what every debt is paid in a month where none is paid off.
+    """
+    live = ~state.is_finished
+    total_minimum_payment = np.where(live, state.minimums, 0).sum(axis=1)
+    below_minimums = state.funds < total_minimum_payment
+
+    payments = payments(state)
+
+    # The same cases as _never_finishes and Obligation.months_to_finish
+    interest_amount = state.unrounded_interest(state.balance, state.monthly_rates)
+    loans_finish = ~state.savings & (payments - state.fixed_costs > interest_amount)
+    savings_finish = state.savings & (
+        (payments != 0)
+        | (state.balance >= state.amounts)
+        | ((state.monthly_rates > 0) & (state.balance != 0))
+    )
+    diverging = live.any(axis=1) & ~(live & (loans_finish | savings_finish)).any(axis=1)
+
+    reasons = [(diverging & below_minimums, StopReason.BELOW_MINIMUMS)]
+    if up_front:
+        loans = live & ~state.savings
+        total_balance = np.where(loans, state.balance, 0).sum(axis=1)
+        lowest_rate = np.where(loans, state.monthly_rates, np.inf).min(axis=1)
+        lowest_rate = np.where(total_balance > 0, lowest_rate, 0)
+
+        interest_exceeds_funds = (
+            ~(diverging & below_minimums)
+            & (total_balance > 0)
+            & (~below_minimums | ~(live & state.savings).any(axis=1))
+            & (state.funds <= state.unrounded_interest(total_balance, lowest_rate))
+        )
+        reasons.append((interest_exceeds_funds, StopReason.INTEREST_EXCEEDS_FUNDS))
+        diverging &= ~interest_exceeds_funds
+
+    reasons.append((diverging & ~below_minimums, StopReason.NOT_SHRINKING))
+    return reasons
+
+
+class _BatchParams:
+    """Validated debt parameters shaped (portfolios, debts) and the monthly_funds values."""
+
+    def __init__(
+        self,
+        amounts,
+        interest_rates,
+        minimum_payments,
+        fixed_costs,
+        is_savings,
+        mask,
+        funds,
+    ):
+        self.amounts = amounts
+        self.interest_rates = interest_rates
+        self.minimum_payments = minimum_payments
+        self.fixed_costs = fixed_costs
+        self.is_savings = is_savings
+        self.mask = mask
+        self.funds = funds
+
+        self.num_portfolios, self.num_debts = amounts.shape
+        self.num_funds = funds.shape[-1]
+        self.num_scenarios = self.num_portfolios * self.num_funds
+
+    def per_scenario(self, values: np.ndarray) -> np.ndarray:
+        return np.repeat(values, self.num_funds, axis=0)
+
+    def scenario_funds(self) -> np.ndarray:
+        return np.broadcast_to(
+            self.funds, (self.num_portfolios, self.num_funds)
+        ).reshape(-1)
+
+    def result(self, outputs: dict[str, np.ndarray]) -> BatchPlanResult:
+        def result_shape(values):
+            return values.reshape(
+                (self.num_portfolios, self.num_funds) + values.shape[1:]
+            )
+
+        return BatchPlanResult(
+            monthly_funds=self.funds,
+            months=result_shape(outputs["months"]),
+            is_finished=result_shape(outputs["is_finished"].all(axis=1)),
+            balances=result_shape(outputs["balance"]),
+            total_paid=result_shape(outputs["total_paid"]),
+            total_interest=result_shape(outputs["total_interest"]),
+            total_costs=result_shape(outputs["total_costs"]),
+            finish_month=result_shape(outputs["finish_month"]),
+            stop_reason=result_shape(outputs["stop_reason"]),
+        )
+
+
+def _batch_params(
+    amounts,
+    interest_rates,
+    minimum_payments,
+    monthly_funds,
+    fixed_costs,
+    is_savings,
+    mask,
+) -> _BatchParams:
+    amounts = np.atleast_2d(np.asarray(amounts, dtype=float))
+    shape = amounts.shape
+
+    def as_param(value, default, dtype=float):
+        if value is None:
+            return np.full(shape, default, dtype=dtype)
+        return np.broadcast_to(
+            np.asarray(value, dtype=dtype).reshape(-1, shape[1]), shape
+        )
+
+    interest_rates = as_param(interest_rates, 0.0)
+    minimum_payments = as_param(minimum_payments, 0.0)
+    fixed_costs = as_param(fixed_costs, 0.0)
+    is_savings = as_param(is_savings, False, dtype=bool)
+    mask = as_param(mask, True, dtype=bool)
+
+    if np.any(interest_rates < 0):
+        raise ValueError("Interest rates must be positive.")
+    if np.any(is_savings & (fixed_costs != 0)):
+        raise ValueError("Only loans can have fixed costs.")
+
+    funds = np.atleast_1d(np.asarray(monthly_funds, dtype=float))
+    if funds.ndim == 2 and funds.shape[0] != shape[0]:
+        raise ValueError("Must give monthly_funds for every portfolio.")
+
+    return _BatchParams(
+        amounts,
+        interest_rates,
+        minimum_payments,
+        fixed_costs,
+        is_savings,
+        mask,
+        funds,
+    )
+
+
+def _simulate(
+    state: _BatchState,
+    params: _BatchParams,
+    max_months: int,
+    rate_schedule=None,
+    step=_priority_step,
+    stop_infeasible: bool = False,
+    payments=_priority_payments,
+) -> dict[str, np.ndarray]:
+    """
+    Advances every scenario in ``state`` month by month until it finishes or ``max_months``
+    is reached, and returns the final per-scenario arrays in their original order. ``step``
+    decides how each month's funds are paid out, see ``_priority_step``.
+
+    With ``stop_infeasible`` scenarios that can never finish are stopped as soon as that is
+    known, following ``check_feasibility``. Only valid with fixed rates, and ``payments``
+    must give what ``step`` pays every debt in a month where none is paid off.
+    """
+    num_scenarios = params.num_scenarios
+    num_debts = params.num_debts
+
+    state.total_interest = np.zeros_like(state.balance)
+    state.total_costs = np.zeros_like(state.balance)
+    state.total_paid = np.zeros_like(state.balance)
+    state.is_finished = ~params.per_scenario(params.mask)
+    state.finish_month = np.where(state.is_finished, 0, -1)
+    state.months = np.zeros(num_scenarios, dtype=int)
+
+    outputs = {
+        name: np.zeros_like(getattr(state, name))
+        for name in (
+            "balance",
+            "total_interest",
+            "total_costs",
+            "total_paid",
+            "is_finished",
+            "finish_month",
+            "months",
+        )
+    }
+
+    stop_reason = np.full(num_scenarios, StopReason.FINISHED, dtype=object)
+
+    def retire(done, reason=StopReason.FINISHED):
+        for name, output in outputs.items():
+            output[state.rows[done]] = getattr(state, name)[done]
+        stop_reason[state.rows[done]] = reason
+
+    def stop(reasons):
+        stopped = np.zeros(state.rows.size, dtype=bool)
+        for done, reason in reasons:
+            if done.any():
+                retire(done, reason)
+                stopped |= done
+
+        if stopped.any():
+            state.take(~stopped)
+
+    stop([(state.is_finished.all(axis=1), StopReason.FINISHED)])
+
+    if stop_infeasible:
+        stop(_stop_reasons(state, up_front=True, payments=payments))
+
+    any_savings = bool(params.is_savings.any())
+    any_loans = bool((~params.is_savings).any())
+
+    profile = profiling._active.get()
+    if profile is not None:
+        profile.count("scenarios_run", num_scenarios)
+
+    month = 1
+    while state.rows.size and month <= max_months:
+        if rate_schedule is not None:
+            rates = np.asarray(rate_schedule(month, state.rows), dtype=float)
+            if np.any(rates < 0):
+                raise ValueError("Interest rates must be positive.")
+            state.set_rates(rates)
+
+        step(state, month, num_debts, any_loans, any_savings)
+
+        state.months[:] = month
+        if profile is not None:
+            profile.count("months_simulated", state.rows.size)
+            profile.count("debts_finished", int((state.finish_month == month).sum()))
+
+        stop([(state.is_finished.all(axis=1), StopReason.FINISHED)])
+
+        if stop_infeasible:
+            # Payments only change when a debt is paid off
+            paid_off = (state.finish_month == month).any(axis=1)
+            if paid_off.any():
+                stop(
+                    [
+                        (paid_off & done, reason)
+                        for done, reason in _stop_reasons(
+                            state, up_front=False, payments=payments
+                        )
+                    ]
+                )
+
+        month += 1
+
+    retire(np.ones(state.rows.size, dtype=bool), StopReason.HORIZON)
+
+    outputs["stop_reason"] = stop_reason
+    return outputs
+
+
+def run_payment_plan_batch(
+    amounts,
+    interest_rates,
+    minimum_payments,
+    monthly_funds,
+    fixed_costs=None,
+    is_savings=None,
+    mask=None,
+    max_months: int = MAX_MONTHS,
+    rate_schedule=None,
+) -> BatchPlanResult:
+    """
+    Runs ``run_payment_plan`` for every portfolio and every monthly_funds value at once. All
+    scenarios are advanced together one month at a time and scenarios drop out of the working
+    arrays as they finish.
+
+    Parameters
+    ----------
+    amounts, interest_rates, minimum_payments : array_like
+        Debt parameters shaped (portfolios, debts), or (debts,) for a single portfolio. Each row
+        must be in the order the debts are to be paid off.
+    monthly_funds : array_like
+        The monthly_funds values to try for every portfolio, or shaped (portfolios, values)
+        to try different values for each portfolio.
+    fixed_costs : array_like, optional
+        Monthly fixed costs per debt.
+    is_savings : array_like, optional
+        True where an obligation is a SAVINGS goal rather than a LOAN.
+    mask : array_like, optional
+        False for padding slots in portfolios with fewer debts than the widest portfolio.
+    max_months : int
+        The longest plan to simulate.
+    rate_schedule : callable, optional
+        For interest rates that change over time. Called at the start of every month as
+        ``rate_schedule(month, scenarios)`` with the indices of the scenarios still running,
+        and returns their yearly interest rates shaped (len(scenarios), debts). Scenarios
+        are numbered portfolio-major, i.e. ``portfolio * num_funds + funds_index``.
+        Without one, plans that can never finish are stopped as soon as that is known, see
+        ``check_feasibility``.
+
+    Returns
+    -------
+    BatchPlanResult
+        Results shaped (portfolios, monthly_funds values[, debts]).
+    """
+    params = _batch_params(
+        amounts,
+        interest_rates,
+        minimum_payments,
+        monthly_funds,
+        fixed_costs,
+        is_savings,
+        mask,
+    )
+
+    state = _BatchState(
+        rows=np.arange(params.num_scenarios),
+        amounts=params.per_scenario(params.amounts),
+        monthly_rates=params.per_scenario((params.interest_rates / 100) / 12),
+        fixed_costs=params.per_scenario(params.fixed_costs),
+        minimums=params.per_scenario(params.minimum_payments),
+        savings=params.per_scenario(params.is_savings),
+    )
+    state.funds = params.scenario_funds()
+    state.balance = np.where(state.savings, 0.0, state.amounts)
+
+    outputs = _simulate(
+        state,
+        params,
+        max_months,
+        rate_schedule,
+        stop_infeasible=rate_schedule is None,
+    )
+
+    return params.result(outputs)
@@ -0,0 +1,289 @@
+import os
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_FIELDS = (
+    "name",
+    "amount",
+    "obligation_type",
+    "interest_rate",
+    "fixed_costs",
+    "minimum_payment",
+)
+
+
+def _as_array(value, size: int, dtype) -> np.ndarray:
+    array = np.asarray(value, dtype=dtype)
+    if array.ndim == 0:
+        return np.full(size, array, dtype=dtype)
+    if array.shape != (size,):
+        raise ValueError("Every column must have one value per obligation.")
+
+    return array.copy()
+
+
+def _as_optional(value, size: int) -> np.ndarray:
+    """Optional amounts are stored as NaN where the obligation has None."""
+    array = np.asarray(np.nan if value is None else value)
+    if array.dtype == object:
+        array = np.where(np.equal(array, None), np.nan, array)
+
+    return _as_array(array, size, float)
+
+
+def _as_is_savings(obligation_type, size: int) -> np.ndarray:
+    """Accepts ObligationType members or their names, e.g. "SAVINGS" or "savings"."""
+    types = np.asarray(obligation_type, dtype=object)
+    labels, inverse = np.unique(
+        np.vectorize(lambda item: getattr(item, "name", item), otypes=[str])(types),
+        return_inverse=True,
+    )
+
+    try:
+        is_savings = np.array(
+            [
+                ObligationType[label.upper()] == ObligationType.SAVINGS
+                for label in labels
+            ]
+        )
+    except KeyError as e:
+        raise ValueError(f"Unknown obligation type {e}.") from None
+
+    return _as_array(is_savings[inverse].reshape(types.shape), size, bool)
+
+
+def _column_property(column: str, to_python, from_python):
+    def getter(view):
+        return to_python(getattr(view._book, column)[view._index])
+
+    def setter(view, value):
+        getattr(view._book, column)[view._index] = from_python(value)
+
+    return property(getter, setter)
+
+
+def _optional(value):
+    return None if np.isnan(value) else value.item()
+
+
+def _python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ObligationView(Obligation):
+    """
+    One obligation of an ``ObligationBook``. Behaves like an ``Obligation`` but reads and
+    writes the book's arrays, so advancing a view advances that row of the book.
+    """
+
+    __slots__ = ("_book", "_index")
+
+    def __init__(self, book: "ObligationBook", index: int):
+        self._book = book
+        self._index = index
+
+    name = _column_property("names", _python, str)
+    amount = _column_property("amounts", _python, float)
+    obligation_type = _column_property(
+        "is_savings",
+        lambda value: ObligationType.SAVINGS if value else ObligationType.LOAN,
+        lambda value: value == ObligationType.SAVINGS,
+    )
+    interest_rate = _column_property("interest_rates", _python, float)
+    fixed_costs = _column_property(
+        "fixed_costs", _optional, lambda value: np.nan if value is None else value
+    )
+    minimum_payment = _column_property(
+        "minimum_payments", _optional, lambda value: np.nan if value is None else value
+    )
+    is_finished = _column_property("is_finished", _python, bool)
+    total_interest = _column_property("total_interest", _python, float)
+    total_costs = _column_property("total_costs", _python, float)
+    total_paid = _column_property("total_paid", _python, float)
+    _balance = _column_property("balances", _python, float)
+
+
+class ObligationBook:
+    """
+    Many obligations stored column by column in contiguous arrays rather than as one
+    ``Obligation`` per row. Indexing a book gives an ``ObligationView`` that can be used
+    anywhere an ``Obligation`` is expected.
+
+    Parameters
+    ----------
+    name : array_like of str
+        The name of each obligation
+    amount : array_like
+        Loan amounts or savings goals
+    obligation_type : ObligationType or array_like
+        One type for every obligation, or one per obligation. Strings such as "LOAN" are
+        accepted as well.
+    interest_rate : float or array_like
+        Yearly interest rates in percent
+    fixed_costs : float or array_like, optional
+        Monthly fixed costs, NaN or None where a loan has none
+    minimum_payment : float or array_like, optional
+        Minimum monthly payments, NaN or None where there is no minimum
+    """
+
+    def __init__(
+        self,
+        name,
+        amount,
+        obligation_type=ObligationType.LOAN,
+        interest_rate=0.0,
+        fixed_costs=None,
+        minimum_payment=None,
+    ):
+        self.names = np.asarray(name, dtype=object).copy()
+        size = self.names.size
+
+        self.amounts = _as_array(amount, size, float)
+        self.is_savings = _as_is_savings(obligation_type, size)
+        self.interest_rates = _as_array(interest_rate, size, float)
+        self.fixed_costs = _as_optional(fixed_costs, size)
+        self.minimum_payments = _as_optional(minimum_payment, size)
+
+        if np.any(self.interest_rates < 0):
+            raise ValueError("Interest rates must be positive.")
+
+        if np.any(self.is_savings & ~np.isnan(self.fixed_costs)):
+            raise ValueError("Only loans can have fixed costs.")
+
+        self.balances = np.where(self.is_savings, 0.0, self.amounts)
+        self.is_finished = np.zeros(size, dtype=bool)
+        self.total_interest = np.zeros(size)
+        self.total_costs = np.zeros(size)
+        self.total_paid = np.zeros(size)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, object]) -> "ObligationBook":
+        """
+        Builds a book from a mapping of column name to array, using the same names as the
+        constructor, e.g. ``{"name": [...], "amount": [...], "interest_rate": [...]}``.
+        """
+        unknown = set(data) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}.")
+
+        return cls(**data)
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: "pd.DataFrame",
+        columns: Mapping[str, str] | None = None,
+        name_prefix: str = "Obligation",
+    ) -> "ObligationBook":
+        """
+        Builds a book from the columns of a DataFrame.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            One row per obligation
+        columns : Mapping[str, str], optional
+            Renames DataFrame columns to constructor names, e.g. ``{"Amount": "amount"}``.
+            Columns that are not mentioned are used as they are.
+        name_prefix : str
+            Without a "name" column, obligations are named ``f"{name_prefix} {index}"``
+            after the DataFrame index
+        """
+        if columns is not None:
+            df = df.rename(columns=columns)
+
+        data = {field: df[field].to_numpy() for field in _FIELDS if field in df.columns}
+        if "name" not in data:
+            data["name"] = [f"{name_prefix} {index}" for index in df.index]
+
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_csv(
+        cls,
+        path: str | os.PathLike,
+        columns: Mapping[str, str] | None = None,
+        name_prefix: str = "Obligation",
+    ) -> "ObligationBook":
+        """Reads a book from a CSV file. See ``from_dataframe``."""
+        import pandas as pd
+
+        return cls.from_dataframe(
+            pd.read_csv(path), columns=columns, name_prefix=name_prefix
+        )
+
+    @classmethod
+    def from_obligations(cls, obligations: list[Obligation]) -> "ObligationBook":
+        """Copies a list of obligations, including any progress they have made."""
+        book = cls.from_dict(
+            {
+                field: [obligation.to_spec()[field] for obligation in obligations]
+                for field in _FIELDS
+            }
+        )
+
+        book.balances[:] = [obligation._balance for obligation in obligations]
+        book.is_finished[:] = [obligation.is_finished for obligation in obligations]
+        book.total_interest[:] = [
+            obligation.total_interest for obligation in obligations
+        ]
+        book.total_costs[:] = [obligation.total_costs for obligation in obligations]
+        book.total_paid[:] = [obligation.total_paid for obligation in obligations]
+
+        return book
+
+    def __len__(self):
+        return self.names.size
+
+    def __getitem__(self, index: int) -> ObligationView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Obligation index out of range.")
+
+        return ObligationView(self, index)
+
+    def __iter__(self) -> Iterator[ObligationView]:
+        for index in range(len(self)):
+            yield ObligationView(self, index)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            value.nbytes for value in vars(self).values() if value.dtype != object
+        )
+
+    def to_obligations(self) -> list[Obligation]:
+        """Copies every row into its own ``Obligation``, including any progress made."""
+        obligations = []
+        for view in self:
+            obligation = Obligation(**view.to_spec())
+            obligation._balance = view._balance
+            obligation.is_finished = view.is_finished
+            obligation.total_interest = view.total_interest
+            obligation.total_costs = view.total_costs
+            obligation.total_paid = view.total_paid
+            obligations.append(obligation)
+
+        return obligations
+
+    def to_batch_arrays(self) -> dict[str, np.ndarray]:
+        """
+        The book as a single portfolio, in row order, for ``run_payment_plan_batch``. Like
+        ``portfolio_arrays`` but without building any ``Obligation`` objects.
+        """
+        return {
+            "amounts": self.amounts[None, :],
+            "interest_rates": self.interest_rates[None, :],
+            "minimum_payments": np.nan_to_num(self.minimum_payments)[None, :],
+            "fixed_costs": np.nan_to_num(self.fixed_costs)[None, :],
+            "is_savings": self.is_savings[None, :],
+        }
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import numbers
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _canonical(value):
+    """Makes equal specs serialize the same way, e.g. 500, 500.0 and np.int64(500)."""
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, numbers.Real):
+        return float(value)
+
+    raise TypeError(f"Can not hash values of type {type(value).__name__}.")
+
+
+def scenario_key(specs: list[dict], monthly_funds: float) -> str:
+    """
+    A content hash of a scenario. Debts are hashed in the order given since the order is the
+    payoff strategy, so the same debts sorted differently get different keys.
+
+    Parameters
+    ----------
+    specs : list[dict]
+        Debt specs in payoff order, see ``budgeter.sweep.debt_specs``
+    monthly_funds : float
+        The amount available each month for all debts combined
+
+    Returns
+    -------
+    str
+        A hex sha256 digest
+    """
+    payload = json.dumps(
+        {"debts": _canonical(specs), "monthly_funds": _canonical(monthly_funds)},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _sizeof(value) -> int:
+    return getattr(value, "nbytes", None) or sys.getsizeof(value)
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    A least recently used cache of results, capped by the memory the results hold rather than
+    by how many there are. Safe to share between threads, e.g. Streamlit sessions.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Least recently used results are evicted once the cache holds more than this
+    store : ResultStore, optional
+        A slower, persistent store behind the cache, see ``budgeter.store``. Results missing
+        from memory are looked up in it and results put in the cache are also written to it.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, store=None):
+        if max_bytes < 0:
+            raise ValueError("The cache size must be positive.")
+
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries = OrderedDict()
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: str):
+        return key in self._entries
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+            if self.store is None:
+                self._misses += 1
+                return default
+
+        value = self.store.get(key)
+
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return default
+
+            self._hits += 1
+
+        self._put_in_memory(key, value)
+        return value
+
+    def put(self, key: str, value):
+        if self.store is not None:
+            self.store.put(key, value)
+
+        self._put_in_memory(key, value)
+
+    def _put_in_memory(self, key: str, value):
+        size = _sizeof(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._size_bytes -= self._entries.pop(key)[1]
+
+            # Something bigger than the whole cache would only evict everything else
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size)
+            self._size_bytes += size
+
+            while self._size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_size
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size_bytes=self._size_bytes,
+                max_bytes=self.max_bytes,
+            )
@@ -0,0 +1,304 @@
+"""
+Payment plans in whole cents. Balances and totals are int64 cents and every month's interest
+is rounded to the cent with round half to even (banker's rounding), so the results are exact
+and the same on every machine, and nothing needs rounding when it is read back.
+
+Amounts are converted to cents with ``round(value * 100)`` and interest rates are kept to
+``RATE_SCALE`` parts of a percent, i.e. four decimal places. Products of balances and rates
+stay within int64 for balances up to about $90 billion at 100% APR.
+
+Because the float engine only rounds when values are read, its balances drift from these by
+the interest rounding, at most half a cent per debt per month. Against ``run_payment_plan``
+the balances and totals paid agree within ``float_tolerance(debts, months)``, which grows
+that half cent at the highest interest rate in the plan. A debt whose final payment falls
+within that tolerance of its balance can finish one month earlier or later than on the float
+path, after which the rest of the plan shifts with it. Plans that can never finish are
+stopped at the same point as by ``compute_payment_plan``, see ``check_feasibility``.
+"""
+
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from budgeter import profiling
+from budgeter.batch import (
+    BatchPlanResult,
+    _batch_params,
+    _BatchState,
+    _simulate,
+)
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import (
+    MAX_MONTHS,
+    PaymentPlanResult,
+    StopReason,
+    _diverging_reason,
+    check_feasibility,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RATE_SCALE = 10_000
+
+# Turns balance * rate into cents of interest for one month
+INTEREST_DENOMINATOR = 12 * 100 * RATE_SCALE
+
+
+def to_cents(value: float) -> int:
+    return round(value * 100)
+
+
+def rate_units(interest_rate: float) -> int:
+    """A yearly interest rate in percent as a whole number of ``1 / RATE_SCALE`` percent."""
+    return round(interest_rate * RATE_SCALE)
+
+
+def _round_half_even(numerator: int, denominator: int) -> int:
+    quotient, remainder = divmod(numerator, denominator)
+    if 2 * remainder > denominator or (2 * remainder == denominator and quotient % 2):
+        quotient += 1
+
+    return quotient
+
+
+def round_half_even(numerator: np.ndarray, denominator: int) -> np.ndarray:
+    """``numerator / denominator`` rounded to whole numbers, with ties going to even."""
+    quotient, remainder = np.divmod(numerator, denominator)
+    round_up = (2 * remainder > denominator) | (
+        (2 * remainder == denominator) & (quotient % 2 == 1)
+    )
+    return quotient + round_up
+
+
+def float_tolerance(debts: list[Obligation], months: int) -> float:
+    """
+    How far, in dollars, balances and totals paid from ``run_payment_plan`` can be from
+    ``compute_payment_plan_cents`` after ``months`` months: half a cent of interest rounding
+    per debt per month, compounded at the highest monthly rate, plus a cent for reading the
+    values back.
+    """
+    rate = max([debt.interest_rate for debt in debts], default=0) / 100 / 12
+    if rate == 0:
+        compounded_months = months
+    else:
+        compounded_months = math.expm1(months * math.log1p(rate)) / rate
+
+    return 0.005 * len(debts) * compounded_months + 0.01
+
+
+def _obligations_at(
+    debts: list[Obligation], balances: list[int], is_finished: list[bool]
+) -> list[Obligation]:
+    """Copies of ``debts`` at balances given in cents, for the feasibility checks."""
+    copies = [Obligation(**debt.to_spec()) for debt in debts]
+    for copy, balance, finished in zip(copies, balances, is_finished):
+        copy.set_state((balance / 100, 0, 0, 0, finished))
+
+    return copies
+
+
+def compute_payment_plan_cents(
+    debts: list[Obligation], monthly_funds: float, max_months: int = MAX_MONTHS
+) -> PaymentPlanResult:
+    """
+    Runs the same payment plan as ``compute_payment_plan`` in whole cents. The debts are left
+    as they are; the plan starts from their current balances and totals.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority
+    monthly_funds : float
+        The amount available each month for all debts combined
+    max_months : int
+        The longest plan to run
+
+    Returns
+    -------
+    PaymentPlanResult
+        The balances and totals paid for every month of the plan, exact to the cent, and
+        why the plan stopped
+    """
+    num_debts = len(debts)
+
+    balances = [to_cents(debt.get_balance()) for debt in debts]
+    total_paid = [to_cents(debt.get_total_paid()) for debt in debts]
+    goals = [to_cents(debt.amount) for debt in debts]
+    rates = [rate_units(debt.interest_rate) for debt in debts]
+    fixed_costs = [to_cents(debt.fixed_costs or 0) for debt in debts]
+    minimums = [to_cents(debt.minimum_payment or 0) for debt in debts]
+    savings = [debt.obligation_type == ObligationType.SAVINGS for debt in debts]
+    is_finished = [debt.is_finished for debt in debts]
+    funds = to_cents(monthly_funds)
+
+    history_balances = np.zeros((max_months + 1, num_debts), dtype=np.int64)
+    history_paid = np.zeros((max_months + 1, num_debts), dtype=np.int64)
+
+    # The first row holds the starting balances; nothing has been paid yet
+    history_balances[0] = balances
+
+    profile = profiling._active.get()
+
+    stop_reason = check_feasibility(
+        _obligations_at(debts, balances, is_finished), funds / 100
+    )
+
+    month = 0
+    while stop_reason is None and not all(is_finished):
+        if month >= max_months:
+            stop_reason = StopReason.HORIZON
+            break
+
+        month += 1
+        num_finished = sum(is_finished)
+
+        extra_payment = funds - sum(
+            [minimums[i] for i in range(num_debts) if not is_finished[i]]
+        )
+
+        for i in range(num_debts):
+            if is_finished[i]:
+                continue
+
+            payment = minimums[i] + extra_payment
+            balance = balances[i]
+            interest_amount = _round_half_even(balance * rates[i], INTEREST_DENOMINATOR)
+
+            if savings[i]:
+                balance += interest_amount
+                goal = goals[i]
+
+                if balance >= goal:
+                    is_finished[i] = True
+                    extra_payment = payment
+                elif balance + payment >= goal:
+                    is_finished[i] = True
+                    total_paid[i] += goal - balance
+                    extra_payment = payment - (goal - balance)
+                    balance = goal
+                else:
+                    balance += payment
+                    total_paid[i] += payment
+                    extra_payment = 0
+
+            else:
+                amount_possible_to_pay = balance + interest_amount + fixed_costs[i]
+
+                if payment > amount_possible_to_pay:
+                    is_finished[i] = True
+                    balance = 0
+                    total_paid[i] += amount_possible_to_pay
+                    extra_payment = payment - amount_possible_to_pay
+                else:
+                    balance = amount_possible_to_pay - payment
+                    total_paid[i] += payment
+                    extra_payment = 0
+
+            balances[i] = balance
+
+        history_balances[month] = balances
+        history_paid[month] = total_paid
+
+        # Payments only change when a debt is paid off
+        if sum(is_finished) > num_finished:
+            stop_reason = _diverging_reason(
+                _obligations_at(debts, balances, is_finished), funds / 100
+            )
+
+    if profile is not None:
+        profile.count("months_simulated", month)
+
+    history_balances = history_balances[: month + 1]
+    history_paid = history_paid[: month + 1]
+
+    return PaymentPlanResult.from_arrays(
+        [debt.name for debt in debts],
+        np.arange(month + 1),
+        history_balances / 100,
+        history_paid / 100,
+        history_balances.sum(axis=1) / 100,
+        history_paid.sum(axis=1) / 100,
+        stop_reason=stop_reason or StopReason.FINISHED,
+    )
+
+
+class _CentsBatchState(_BatchState):
+    """Batch working arrays in int64 cents, with rates in ``rate_units``."""
+
+    def interest(self, col: int) -> np.ndarray:
+        return round_half_even(
+            self.balance[:, col] * self.monthly_rates[:, col], INTEREST_DENOMINATOR
+        )
+
+    def set_rates(self, interest_rates: np.ndarray):
+        self.monthly_rates = np.broadcast_to(
+            np.round(interest_rates * RATE_SCALE).astype(np.int64), self.amounts.shape
+        )
+
+    def unrounded_interest(self, balance, monthly_rates) -> np.ndarray:
+        # In cents, as the feasibility checks compare it with funds in cents
+        return balance * monthly_rates / INTEREST_DENOMINATOR
+
+
+def _array_cents(values: np.ndarray) -> np.ndarray:
+    return np.round(values * 100).astype(np.int64)
+
+
+def run_payment_plan_batch_cents(
+    amounts,
+    interest_rates,
+    minimum_payments,
+    monthly_funds,
+    fixed_costs=None,
+    is_savings=None,
+    mask=None,
+    max_months: int = MAX_MONTHS,
+    rate_schedule=None,
+) -> BatchPlanResult:
+    """
+    ``run_payment_plan_batch`` in whole cents: every scenario follows the same rules as
+    ``compute_payment_plan_cents``, on int64 arrays. Takes the same arguments in dollars and
+    percent and returns the same results in dollars, exact to the cent.
+    """
+    params = _batch_params(
+        amounts,
+        interest_rates,
+        minimum_payments,
+        monthly_funds,
+        fixed_costs,
+        is_savings,
+        mask,
+    )
+
+    state = _CentsBatchState(
+        rows=np.arange(params.num_scenarios),
+        amounts=params.per_scenario(_array_cents(params.amounts)),
+        monthly_rates=None,
+        fixed_costs=params.per_scenario(_array_cents(params.fixed_costs)),
+        minimums=params.per_scenario(_array_cents(params.minimum_payments)),
+        savings=params.per_scenario(params.is_savings),
+    )
+    state.set_rates(params.per_scenario(params.interest_rates))
+    state.funds = _array_cents(params.scenario_funds())
+    state.balance = np.where(state.savings, 0, state.amounts)
+
+    outputs = _simulate(
+        state,
+        params,
+        max_months,
+        rate_schedule,
+        stop_infeasible=rate_schedule is None,
+    )
+    for name in ("balance", "total_interest", "total_costs", "total_paid"):
+        outputs[name] = outputs[name] / 100
+
+    return params.result(outputs)
+
+
+def run_payment_plan_cents(
+    debts: list[Obligation], monthly_funds: float, max_months: int = MAX_MONTHS
+) -> "pd.DataFrame":
+    return compute_payment_plan_cents(debts, monthly_funds, max_months).to_dataframe()
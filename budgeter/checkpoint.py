@@ -0,0 +1,256 @@
+"""
+Payment plans that keep the state of their debts every ``interval`` months, so what-if
+questions about changes part way through the plan, e.g. a lump sum at month 120 or a raise
+in monthly funds, restart from the nearest checkpoint before the change. Only the months
+after that checkpoint are simulated, at most ``interval - 1`` of which are shared with the
+original plan.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from budgeter.obligation import Obligation, ObligationState
+from budgeter.payment_plan import (
+    MAX_MONTHS,
+    PlanSummary,
+    StopReason,
+    _advance_plan_month,
+    _diverging_reason,
+    _get_total_paid,
+    check_feasibility,
+)
+
+DEFAULT_INTERVAL = 12
+
+
+@dataclass
+class PlanChange:
+    """
+    A change to a payment plan after ``month`` months, before the next month is paid. A
+    ``lump_sum`` goes to the debts in order of priority, moving on to the next debt whenever
+    one is paid off, and ``monthly_funds`` replaces the plan's monthly funds from then on.
+    """
+
+    month: int
+    lump_sum: float = 0.0
+    monthly_funds: float | None = None
+
+
+def _apply_lump_sum(debts: list[Obligation], amount: float) -> float:
+    for debt in debts:
+        if amount <= 0:
+            break
+
+        amount = debt.pay_lump_sum(amount)
+
+    return amount
+
+
+class CheckpointedPlan:
+    """
+    A payment plan's outcome and the state of its debts every ``interval`` months, see
+    ``compute_checkpointed_plan``.
+
+    Checkpoints hold the ``Obligation.get_state`` of every debt: ``_values`` is shaped
+    (checkpoints, debts, 4) for the balance and running totals, ``_finished`` is shaped
+    (checkpoints, debts).
+    """
+
+    def __init__(
+        self,
+        specs: list[dict],
+        monthly_funds: float,
+        interval: int = DEFAULT_INTERVAL,
+        max_months: int = MAX_MONTHS,
+    ):
+        if interval < 1:
+            raise ValueError("The checkpoint interval must be at least 1 month.")
+
+        self.specs = specs
+        self.monthly_funds = monthly_funds
+        self.interval = interval
+        self.max_months = max_months
+        self.summary: PlanSummary | None = None
+
+        self._values = np.zeros((0, len(specs), 4))
+        self._finished = np.zeros((0, len(specs)), dtype=bool)
+
+    def __len__(self):
+        return self._values.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self._values.nbytes + self._finished.nbytes
+
+    def restore(self, month: int) -> tuple[list[Obligation], int]:
+        """
+        Fresh debts in the state of the last checkpoint at or before ``month``, and the month
+        of that checkpoint.
+        """
+        index = min(max(month, 0) // self.interval, len(self) - 1)
+
+        debts = [Obligation(**spec) for spec in self.specs]
+        # tolist gives back the same Python floats that were stored
+        for debt, values, is_finished in zip(
+            debts, self._values[index].tolist(), self._finished[index].tolist()
+        ):
+            debt.set_state((*values, is_finished))
+
+        return debts, index * self.interval
+
+    def _set_checkpoints(self, checkpoints: list[list[ObligationState]]):
+        self._values = np.array(
+            [[state[:4] for state in states] for states in checkpoints], dtype=float
+        ).reshape(len(checkpoints), len(self.specs), 4)
+        self._finished = np.array(
+            [[state.is_finished for state in states] for states in checkpoints],
+            dtype=bool,
+        ).reshape(len(checkpoints), len(self.specs))
+
+    def _run(
+        self,
+        debts: list[Obligation],
+        month: int,
+        payoff_month: list[int | None],
+        changes: list[PlanChange],
+        checkpoints: list[list[ObligationState]] | None = None,
+    ) -> PlanSummary:
+        monthly_funds = self.monthly_funds
+        changes = sorted(changes, key=lambda change: change.month)
+
+        # Whether the plan can still finish is only known once no changes are left, so it
+        # is checked in full after the last one and then whenever a debt is paid off
+        stop_reason = None
+        check_feasible = not changes
+
+        while True:
+            while changes and changes[0].month == month:
+                change = changes.pop(0)
+                if change.monthly_funds is not None:
+                    monthly_funds = change.monthly_funds
+                _apply_lump_sum(debts, change.lump_sum)
+
+                for i, debt in enumerate(debts):
+                    if payoff_month[i] is None and debt.is_finished:
+                        payoff_month[i] = month
+
+                check_feasible = not changes
+
+            if check_feasible:
+                stop_reason = check_feasibility(debts, monthly_funds)
+                check_feasible = False
+
+            if checkpoints is not None and month % self.interval == 0:
+                checkpoints.append([debt.get_state() for debt in debts])
+
+            if stop_reason is not None or all([debt.is_finished for debt in debts]):
+                break
+            if month >= self.max_months:
+                stop_reason = StopReason.HORIZON
+                break
+
+            _advance_plan_month(debts, monthly_funds)
+            month += 1
+
+            paid_off = False
+            for i, debt in enumerate(debts):
+                if payoff_month[i] is None and debt.is_finished:
+                    payoff_month[i] = month
+                    paid_off = True
+
+            if paid_off and not changes:
+                stop_reason = _diverging_reason(debts, monthly_funds)
+
+        return PlanSummary(
+            months=month,
+            is_finished=all([debt.is_finished for debt in debts]),
+            total_paid=_get_total_paid(debts=debts),
+            total_interest=sum([debt.get_total_interest_paid() for debt in debts]),
+            total_costs=sum([debt.get_total_costs_paid() for debt in debts]),
+            payoff_month=tuple(payoff_month),
+            stop_reason=stop_reason or StopReason.FINISHED,
+        )
+
+    def what_if(self, changes: list[PlanChange]) -> PlanSummary:
+        """
+        The outcome of the plan with ``changes`` applied, restarting from the last checkpoint
+        before the first change.
+
+        Parameters
+        ----------
+        changes : list[PlanChange]
+            Lump sums and changes to the monthly funds, in any order
+
+        Returns
+        -------
+        PlanSummary
+            The outcome of the whole plan, including the months before the first change
+        """
+        if not changes:
+            return self.summary
+
+        for change in changes:
+            if not 0 <= change.month <= self.max_months:
+                raise ValueError(
+                    f"Changes must be between month 0 and {self.max_months}."
+                )
+            if change.lump_sum < 0:
+                raise ValueError("Lump sums must be positive.")
+
+        debts, month = self.restore(min([change.month for change in changes]))
+
+        # Debts finished by the checkpoint were finished on the same month as in the plan
+        payoff_month = [
+            self.summary.payoff_month[i] if debt.is_finished else None
+            for i, debt in enumerate(debts)
+        ]
+
+        return self._run(debts, month, payoff_month, changes)
+
+
+def compute_checkpointed_plan(
+    debts: list[Obligation],
+    monthly_funds: float,
+    interval: int = DEFAULT_INTERVAL,
+    max_months: int = MAX_MONTHS,
+) -> CheckpointedPlan:
+    """
+    Runs the same payment plan as ``summarize_payment_plan``, keeping a checkpoint every
+    ``interval`` months to restart what-if questions from, see ``CheckpointedPlan.what_if``.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority. They are left as they were.
+    monthly_funds : float
+        The amount available each month for all debts combined
+    interval : int
+        Months between checkpoints. Shorter intervals make what-if questions cheaper and the
+        plan bigger.
+    max_months : int
+        The longest plan to run, with or without changes
+
+    Returns
+    -------
+    CheckpointedPlan
+        The outcome of the plan in ``summary``, and its checkpoints
+    """
+    plan = CheckpointedPlan(
+        [debt.to_spec() for debt in debts],
+        monthly_funds,
+        interval=interval,
+        max_months=max_months,
+    )
+
+    # Start from wherever the debts already are, without changing them
+    copies = [Obligation(**spec) for spec in plan.specs]
+    for copy, debt in zip(copies, debts):
+        copy.set_state(debt.get_state())
+
+    checkpoints = []
+    payoff_month = [0 if debt.is_finished else None for debt in copies]
+    plan.summary = plan._run(copies, 0, payoff_month, [], checkpoints=checkpoints)
+    plan._set_checkpoints(checkpoints)
+
+    return plan
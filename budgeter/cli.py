@@ -0,0 +1,366 @@
+"""
+Runs payment plans for many portfolios from a CSV or Parquet file, e.g.
+
+    python -m budgeter.cli debts.csv results --strategies snowball avalanche --extra 0 100 500
+
+The input has one row per debt with a portfolio id column and the ``Obligation`` arguments
+as columns: ``amount``, ``interest_rate`` and ``minimum_payment``, optionally
+``fixed_costs`` and ``obligation_type`` (LOAN or SAVINGS). Rows of a portfolio must be next
+to each other, in the order used by the "table" strategy.
+
+Portfolios are read and simulated in chunks across a pool of processes, and each chunk's
+results are written as soon as it finishes to ``<output>/strategy=<name>/part-<chunk>``,
+so memory use depends on the chunk size rather than on the size of the input.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from budgeter.batch import portfolio_arrays, run_payment_plan_batch
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import MAX_MONTHS
+from budgeter.sweep import process_pool
+
+STRATEGIES: dict[str, Callable[[list[Obligation]], list[Obligation]]] = {
+    "snowball": lambda debts: sorted(debts, key=lambda debt: debt.amount),
+    "avalanche": lambda debts: sorted(
+        debts, key=lambda debt: debt.interest_rate, reverse=True
+    ),
+    "table": lambda debts: debts,
+}
+
+REQUIRED_COLUMNS = ("amount", "interest_rate", "minimum_payment")
+OPTIONAL_COLUMNS = ("fixed_costs", "obligation_type")
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_EXTRA = (0.0, 100.0, 500.0)
+
+# Rows read from the input at a time, independent of how many portfolios they hold
+READ_ROWS = 50_000
+
+
+def _read_frames(path: Path, id_column: str) -> Iterator[pd.DataFrame]:
+    columns = [id_column, *REQUIRED_COLUMNS]
+
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("Reading Parquet files requires pyarrow.") from error
+
+        parquet_file = pq.ParquetFile(path)
+        columns += [
+            column
+            for column in OPTIONAL_COLUMNS
+            if column in parquet_file.schema_arrow.names
+        ]
+        for batch in parquet_file.iter_batches(batch_size=READ_ROWS, columns=columns):
+            yield batch.to_pandas()
+
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        columns += [column for column in OPTIONAL_COLUMNS if column in header]
+        yield from pd.read_csv(path, usecols=columns, chunksize=READ_ROWS)
+
+
+def _debt_specs(rows: pd.DataFrame) -> list[dict]:
+    specs = []
+    for row in rows.to_dict("records"):
+        fixed_costs = row.get("fixed_costs")
+        obligation_type = row.get("obligation_type")
+
+        specs.append(
+            {
+                "name": f"debt_{len(specs)}",
+                "amount": float(row["amount"]),
+                "obligation_type": (
+                    ObligationType.LOAN
+                    if pd.isna(obligation_type)
+                    else ObligationType[str(obligation_type).upper()]
+                ),
+                "interest_rate": float(row["interest_rate"]),
+                "fixed_costs": None if pd.isna(fixed_costs) else float(fixed_costs),
+                "minimum_payment": float(row["minimum_payment"]),
+            }
+        )
+
+    return specs
+
+
+def read_portfolios(
+    path: Path, id_column: str = "portfolio_id"
+) -> Iterator[tuple[object, list[dict]]]:
+    """
+    Yields ``(portfolio_id, debt specs)`` for every portfolio in a CSV or Parquet file while
+    only holding ``READ_ROWS`` rows at a time.
+    """
+    pending = None
+    for frame in _read_frames(path, id_column):
+        missing = set(REQUIRED_COLUMNS) - set(frame.columns)
+        if missing:
+            raise ValueError(f"The input is missing columns: {', '.join(missing)}.")
+
+        if pending is not None:
+            frame = pd.concat([pending, frame], ignore_index=True)
+
+        # The last portfolio may carry on into the next rows
+        ids = frame[id_column].to_numpy()
+        starts = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+        last_start = int(starts[-1]) if starts.size else 0
+        pending = frame.iloc[last_start:]
+
+        complete = frame.iloc[:last_start]
+        for portfolio_id, rows in complete.groupby(id_column, sort=False):
+            yield portfolio_id, _debt_specs(rows)
+
+    if pending is not None and len(pending):
+        yield pending[id_column].iloc[0], _debt_specs(pending)
+
+
+def _chunks(items: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def run_chunk(
+    portfolios: list[tuple[object, list[dict]]],
+    strategies: list[str],
+    payments: list[float] | None = None,
+    extra: list[float] | None = None,
+    max_months: int = MAX_MONTHS,
+) -> pd.DataFrame:
+    """
+    Runs every strategy at every payment level for a chunk of portfolios with the batch
+    engine and returns one row per portfolio, strategy and payment level.
+
+    Payment levels are either the same ``payments`` for every portfolio or ``extra`` on top
+    of each portfolio's total minimum payment.
+    """
+    ids = [portfolio_id for portfolio_id, _ in portfolios]
+    debt_lists = [[Obligation(**spec) for spec in specs] for _, specs in portfolios]
+
+    if payments is not None:
+        monthly_funds = np.asarray(payments, dtype=float)
+    else:
+        total_minimums = np.array(
+            [sum([debt.minimum_payment for debt in debts]) for debts in debt_lists]
+        )
+        monthly_funds = total_minimums[:, None] + np.asarray(extra, dtype=float)
+
+    frames = []
+    for strategy in strategies:
+        order = STRATEGIES[strategy]
+        result = run_payment_plan_batch(
+            **portfolio_arrays([order(debts) for debts in debt_lists]),
+            monthly_funds=monthly_funds,
+            max_months=max_months,
+        )
+        num_funds = result.months.shape[1]
+
+        frames.append(
+            pd.DataFrame(
+                {
+                    "portfolio_id": np.repeat(ids, num_funds),
+                    "strategy": strategy,
+                    "monthly_funds": np.broadcast_to(
+                        result.monthly_funds, result.months.shape
+                    ).reshape(-1),
+                    "months": result.months.reshape(-1),
+                    "is_finished": result.is_finished.reshape(-1),
+                    "total_paid": result.get_total_paid().reshape(-1),
+                    "total_interest": result.total_interest.sum(axis=-1).reshape(-1),
+                    "total_costs": result.total_costs.sum(axis=-1).reshape(-1),
+                    "stop_reason": [
+                        reason.value for reason in result.stop_reason.reshape(-1)
+                    ],
+                }
+            )
+        )
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def _write_chunk(results: pd.DataFrame, output: Path, chunk: int, file_format: str):
+    for strategy, rows in results.groupby("strategy", sort=False):
+        partition = output / f"strategy={strategy}"
+        partition.mkdir(parents=True, exist_ok=True)
+
+        rows = rows.drop(columns="strategy")
+        if file_format == "parquet":
+            rows.to_parquet(partition / f"part-{chunk:05d}.parquet", index=False)
+        else:
+            rows.to_csv(partition / f"part-{chunk:05d}.csv", index=False)
+
+
+class _Progress:
+    def __init__(self, stream=sys.stderr):
+        self.stream = stream
+        self.start = time.perf_counter()
+        self.portfolios = 0
+        self.plans = 0
+
+    def update(self, chunk: int, portfolios: int, plans: int):
+        self.portfolios += portfolios
+        self.plans += plans
+        seconds = time.perf_counter() - self.start
+
+        print(
+            f"chunk {chunk}: {self.portfolios:,} portfolios, {self.plans:,} plans "
+            + f"in {seconds:.1f} s ({self.plans / seconds:,.0f} plans/s)",
+            file=self.stream,
+            flush=True,
+        )
+
+
+def run(
+    input_path: Path,
+    output: Path,
+    strategies: list[str],
+    payments: list[float] | None = None,
+    extra: list[float] | None = None,
+    id_column: str = "portfolio_id",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    file_format: str = "parquet",
+    max_workers: int | None = None,
+    max_months: int = MAX_MONTHS,
+) -> int:
+    """
+    Runs every portfolio in ``input_path`` and writes the results under ``output``, see the
+    module docstring. At most two chunks per worker are in flight at once. Returns how many
+    portfolios were run.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    progress = _Progress()
+    chunks = enumerate(_chunks(read_portfolios(input_path, id_column), chunk_size))
+
+    def finish(chunk, portfolios, results):
+        _write_chunk(results, output, chunk, file_format)
+        progress.update(chunk, portfolios, len(results))
+
+    if max_workers <= 1:
+        for chunk, portfolios in chunks:
+            results = run_chunk(portfolios, strategies, payments, extra, max_months)
+            finish(chunk, len(portfolios), results)
+
+        return progress.portfolios
+
+    with process_pool(max_workers) as executor:
+        in_flight = {}
+        for chunk, portfolios in chunks:
+            if len(in_flight) >= 2 * max_workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(*in_flight.pop(future), future.result())
+
+            future = executor.submit(
+                run_chunk, portfolios, strategies, payments, extra, max_months
+            )
+            in_flight[future] = (chunk, len(portfolios))
+
+        for future in list(in_flight):
+            finish(*in_flight.pop(future), future.result())
+
+    return progress.portfolios
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Runs payment plans for many portfolios from a CSV or Parquet file."
+    )
+    parser.add_argument(
+        "input", type=Path, help="CSV or Parquet file, one row per debt"
+    )
+    parser.add_argument("output", type=Path, help="Directory to write results to")
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        choices=list(STRATEGIES),
+        default=["snowball", "avalanche"],
+    )
+    levels = parser.add_mutually_exclusive_group()
+    levels.add_argument(
+        "--payments",
+        nargs="+",
+        type=float,
+        help="Monthly funds to try for every portfolio",
+    )
+    levels.add_argument(
+        "--extra",
+        nargs="+",
+        type=float,
+        help="Monthly funds on top of each portfolio's total minimum payment "
+        + f"(default: {' '.join([str(amount) for amount in DEFAULT_EXTRA])})",
+    )
+    parser.add_argument("--id-column", default="portfolio_id")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Portfolios per chunk",
+    )
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument(
+        "--max-months",
+        type=int,
+        default=MAX_MONTHS,
+        help="Plans still running after this many months are stopped",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Processes to use, defaults to the number of CPUs"
+    )
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.max_months < 1:
+        parser.error("--max-months must be at least 1")
+    if args.payments is None and args.extra is None:
+        args.extra = list(DEFAULT_EXTRA)
+
+    start = time.perf_counter()
+    try:
+        portfolios = run(
+            args.input,
+            args.output,
+            args.strategies,
+            payments=args.payments,
+            extra=args.extra,
+            id_column=args.id_column,
+            chunk_size=args.chunk_size,
+            file_format=args.format,
+            max_workers=args.workers,
+            max_months=args.max_months,
+        )
+    except (ValueError, KeyError, ImportError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+
+    seconds = time.perf_counter() - start
+    print(
+        f"Ran {portfolios:,} portfolios in {seconds:.1f} s "
+        + f"({portfolios / seconds:,.0f} portfolios/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
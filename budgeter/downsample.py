@@ -0,0 +1,111 @@
+"""
+Shrinks long month by month series before they are charted, so the size of a chart stays
+bounded however long the plans run and however many are shown.
+"""
+
+import numpy as np
+
+# Points kept per line, on top of any that must be kept
+MAX_POINTS = 300
+
+# Charts with more points than this are drawn with WebGL (plotly's Scattergl), which stays
+# responsive with far more points than SVG
+WEBGL_POINTS = 2000
+
+
+def lttb(x, y, max_points: int = MAX_POINTS, keep=None) -> np.ndarray:
+    """
+    Picks the points of a line that best preserve its shape using Largest Triangle Three
+    Buckets: the line is split into ``max_points - 2`` buckets and from each the point making
+    the largest triangle with the previous pick and the next bucket's average is kept.
+
+    Parameters
+    ----------
+    x, y : array_like
+        The line, sorted by x
+    max_points : int
+        How many points to pick, including the first and last
+    keep : array_like, optional
+        Indices that are always kept on top of the picked points
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of the points to keep
+    """
+    if max_points < 3:
+        raise ValueError("Must keep at least 3 points.")
+
+    num_points = len(x)
+    keep = np.asarray([] if keep is None else keep, dtype=int)
+
+    if num_points <= max_points:
+        return np.arange(num_points)
+
+    x = np.asarray(x, dtype=float).tolist()
+    y = np.asarray(y, dtype=float).tolist()
+
+    bucket_size = (num_points - 2) / (max_points - 2)
+    picked = [0]
+    previous = 0
+
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, num_points)
+        next_count = next_end - next_start
+        average_x = sum(x[next_start:next_end]) / next_count
+        average_y = sum(y[next_start:next_end]) / next_count
+
+        previous_x = x[previous]
+        previous_y = y[previous]
+
+        best = start
+        best_area = -1.0
+        for i in range(start, end):
+            # Twice the triangle's area, which ranks the points just the same
+            area = abs(
+                (previous_x - average_x) * (y[i] - previous_y)
+                - (previous_x - x[i]) * (average_y - previous_y)
+            )
+            if area > best_area:
+                best = i
+                best_area = area
+
+        picked.append(best)
+        previous = best
+
+    picked.append(num_points - 1)
+
+    return np.union1d(picked, keep[(keep >= 0) & (keep < num_points)])
+
+
+def payoff_indices(total_paid) -> np.ndarray:
+    """
+    The rows where each debt was paid off, i.e. the last row where its total paid changed.
+
+    Parameters
+    ----------
+    total_paid : array_like
+        Running totals paid shaped (months, debts)
+    """
+    total_paid = np.asarray(total_paid, dtype=float)
+    if total_paid.ndim == 1:
+        total_paid = total_paid[:, None]
+
+    if total_paid.shape[0] < 2:
+        # e.g. a plan stopped before its first month
+        return np.array([], dtype=int)
+
+    changed = np.diff(total_paid, axis=0) != 0
+    has_changed = changed.any(axis=0)
+
+    last_change = changed.shape[0] - np.argmax(changed[::-1], axis=0)
+    return np.unique(last_change[has_changed])
+
+
+def use_webgl(num_points: int) -> bool:
+    """Whether a chart with ``num_points`` points in total should be drawn with WebGL."""
+    return num_points > WEBGL_POINTS
@@ -0,0 +1,206 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from budgeter.batch import portfolio_arrays, run_payment_plan_batch
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import MAX_MONTHS
+
+DEFAULT_PATHS = 100_000
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class RandomWalk:
+    """
+    Rates drift by a normally distributed change every month.
+
+    Parameters
+    ----------
+    volatility : float
+        Standard deviation of the monthly change, in percentage points
+    """
+
+    def __init__(self, volatility: float):
+        if volatility < 0:
+            raise ValueError("Volatility must be positive.")
+
+        self.volatility = volatility
+
+    def changes(self, num_paths: int, rng: np.random.Generator) -> Iterator[np.ndarray]:
+        change = np.zeros(num_paths)
+        while True:
+            change = change + self.volatility * rng.standard_normal(num_paths)
+            yield change
+
+
+class MeanReversion:
+    """
+    Rates drift randomly but are pulled back towards a long run level every month, i.e. a
+    discretized Ornstein-Uhlenbeck (Vasicek) process.
+
+    Parameters
+    ----------
+    speed : float
+        The fraction of the gap to the long run level closed each month, between 0 and 1
+    volatility : float
+        Standard deviation of the monthly shock, in percentage points
+    long_run_change : float
+        Where rates settle relative to today, in percentage points
+    """
+
+    def __init__(self, speed: float, volatility: float, long_run_change: float = 0.0):
+        if not 0 <= speed <= 1:
+            raise ValueError("Speed must be between 0 and 1.")
+        if volatility < 0:
+            raise ValueError("Volatility must be positive.")
+
+        self.speed = speed
+        self.volatility = volatility
+        self.long_run_change = long_run_change
+
+    def changes(self, num_paths: int, rng: np.random.Generator) -> Iterator[np.ndarray]:
+        change = np.zeros(num_paths)
+        while True:
+            change = (
+                change
+                + self.speed * (self.long_run_change - change)
+                + self.volatility * rng.standard_normal(num_paths)
+            )
+            yield change
+
+
+class RatePaths:
+    """
+    Rate changes given up front, shaped (paths, months). Rates hold at the last month's
+    change once the paths run out.
+
+    Parameters
+    ----------
+    changes : array_like
+        The change from today's rates for each path and month, in percentage points
+    """
+
+    def __init__(self, changes):
+        self.changes_by_month = np.atleast_2d(np.asarray(changes, dtype=float))
+
+    def changes(self, num_paths: int, rng: np.random.Generator) -> Iterator[np.ndarray]:
+        if num_paths != self.changes_by_month.shape[0]:
+            raise ValueError("The number of paths must match the supplied rate paths.")
+
+        for month in range(self.changes_by_month.shape[1]):
+            yield self.changes_by_month[:, month]
+
+        while True:
+            yield self.changes_by_month[:, -1]
+
+
+@dataclass
+class MonteCarloResult:
+    """
+    Outcome of every simulated path. ``months`` is the month the last debt was paid off, or
+    the longest plan simulated where ``is_finished`` is False.
+    """
+
+    months: np.ndarray
+    is_finished: np.ndarray
+    total_paid: np.ndarray
+    total_interest: np.ndarray
+
+    def percentiles(self, q=DEFAULT_PERCENTILES) -> dict[str, np.ndarray]:
+        """
+        Percentiles of the payoff month and the total paid across paths. Paths that never
+        finish count as taking the longest plan simulated, so high percentiles are a lower
+        bound when ``finished_share`` is below 1.
+        """
+        return {
+            "percentile": np.asarray(q),
+            "months": np.percentile(self.months, q),
+            "total_paid": np.percentile(self.total_paid, q),
+            "total_interest": np.percentile(self.total_interest, q),
+        }
+
+    @property
+    def finished_share(self) -> float:
+        return float(self.is_finished.mean())
+
+
+def simulate_variable_rates(
+    debts: list[Obligation],
+    monthly_funds: float,
+    rate_model: RandomWalk | MeanReversion | RatePaths,
+    num_paths: int | None = None,
+    variable: list[bool] | None = None,
+    seed: int | None = None,
+    max_months: int = MAX_MONTHS,
+) -> MonteCarloResult:
+    """
+    Runs ``run_payment_plan`` under many simulated interest rate paths at once. Every path
+    moves the rates of all variable debts by the same change, like loans tied to one index,
+    and rates never go below 0.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority, at today's rates
+    monthly_funds : float
+        The amount available each month for all debts combined
+    rate_model : RandomWalk | MeanReversion | RatePaths
+        How rates change from month to month
+    num_paths : int, optional
+        How many rate paths to simulate, by default ``DEFAULT_PATHS`` or as many as a
+        ``RatePaths`` has
+    variable : list[bool], optional
+        Which debts have variable rates, by default every loan
+    seed : int, optional
+        Seeds the random rate paths
+    max_months : int
+        The longest plan to simulate
+
+    Returns
+    -------
+    MonteCarloResult
+        Months, totals and whether the debts were paid off, one entry per path
+    """
+    if num_paths is None and isinstance(rate_model, RatePaths):
+        num_paths = rate_model.changes_by_month.shape[0]
+    elif num_paths is None:
+        num_paths = DEFAULT_PATHS
+
+    if variable is None:
+        variable = [debt.obligation_type == ObligationType.LOAN for debt in debts]
+    if len(variable) != len(debts):
+        raise ValueError("Must say whether each debt is variable.")
+
+    arrays = portfolio_arrays([debts])
+    base_rates = arrays["interest_rates"][0]
+    variable = np.asarray(variable, dtype=bool)
+
+    changes = rate_model.changes(num_paths, np.random.default_rng(seed))
+
+    def rate_schedule(month, paths):
+        change = next(changes)[paths]
+        return np.where(
+            variable,
+            np.maximum(base_rates + change[:, None], 0.0),
+            base_rates,
+        )
+
+    result = run_payment_plan_batch(
+        amounts=np.broadcast_to(arrays["amounts"], (num_paths, len(debts))),
+        interest_rates=base_rates,
+        minimum_payments=arrays["minimum_payments"],
+        monthly_funds=monthly_funds,
+        fixed_costs=arrays["fixed_costs"],
+        is_savings=arrays["is_savings"],
+        max_months=max_months,
+        rate_schedule=rate_schedule,
+    )
+
+    return MonteCarloResult(
+        months=result.months[:, 0],
+        is_finished=result.is_finished[:, 0],
+        total_paid=result.get_total_paid()[:, 0],
+        total_interest=result.total_interest.sum(axis=-1)[:, 0],
+    )
@@ -1,8 +1,50 @@
+import math
+from dataclasses import dataclass
+from typing import NamedTuple
+
 from budgeter.obligation_types import ObligationType
 
 
+@dataclass
+class PayoffProjection:
+    """
+    Where an obligation ends up if it receives the same payment every month until it is
+    finished. Totals include anything already paid. ``months`` is None if the payment never
+    finishes the obligation, in which case the totals are None as well.
+    """
+
+    months: int | None
+    total_paid: float | None
+    total_interest: float | None
+    total_costs: float | None
+
+
+class ObligationState(NamedTuple):
+    """Everything ``advance_month`` changes, see ``Obligation.get_state``."""
+
+    balance: float
+    total_interest: float
+    total_costs: float
+    total_paid: float
+    is_finished: bool
+
+
 class Obligation:
 
+    __slots__ = (
+        "name",
+        "amount",
+        "obligation_type",
+        "interest_rate",
+        "fixed_costs",
+        "minimum_payment",
+        "is_finished",
+        "total_interest",
+        "total_costs",
+        "total_paid",
+        "_balance",
+    )
+
     def __init__(
         self,
         name: str,
@@ -134,6 +176,260 @@ class Obligation:
 
             return 0
 
+    def _monthly_rate(self) -> float:
+        return (self.interest_rate / 100) / 12
+
+    def _balance_after(self, payment: float, months: int) -> float:
+        """
+        The balance after ``months`` months of ``payment`` if the obligation were never
+        finished, i.e. the plain geometric recurrence that ``advance_month`` follows.
+        """
+        rate = self._monthly_rate()
+
+        if self.obligation_type == ObligationType.LOAN:
+            payment -= self.fixed_costs or 0
+            payment = -payment
+
+        if rate == 0:
+            return self._balance + payment * months
+
+        growth = (1 + rate) ** months
+        return growth * self._balance + payment * (growth - 1) / rate
+
+    def _finishes_on(self, payment: float, month: int) -> bool:
+        """Whether ``advance_month(payment)`` would finish the obligation on ``month``."""
+        balance = self._balance_after(payment, month - 1)
+        balance += balance * self._monthly_rate()
+
+        if self.obligation_type == ObligationType.LOAN:
+            return payment > balance + (self.fixed_costs or 0)
+
+        return balance + payment >= self.amount
+
+    def months_to_finish(self, payment: float | None = None) -> int | None:
+        """
+        Counts the months of a constant payment needed to finish the obligation.
+
+        Parameters
+        ----------
+        payment : float
+            The amount paid every month, defaults to the minimum payment
+
+        Returns
+        -------
+        int | None
+            The month the obligation is finished on, or None if it never is
+        """
+        if payment is None:
+            payment = self.minimum_payment
+        if self.is_finished:
+            return 0
+
+        rate = self._monthly_rate()
+
+        if self.obligation_type == ObligationType.LOAN:
+            net_payment = payment - (self.fixed_costs or 0)
+            if net_payment <= self._balance * rate:
+                return None
+
+            if rate == 0:
+                estimate = self._balance / net_payment
+            else:
+                estimate = math.log(
+                    net_payment / (net_payment - self._balance * rate)
+                ) / math.log1p(rate)
+
+            month = math.floor(estimate) + 1
+
+        elif self.obligation_type == ObligationType.SAVINGS:
+            if payment < 0:
+                raise ValueError("Savings payments must be positive.")
+
+            if self._balance >= self.amount:
+                return 1
+            if rate == 0:
+                if payment == 0:
+                    return None
+                estimate = (self.amount - self._balance) / payment
+            else:
+                if self._balance == 0 and payment == 0:
+                    return None
+                estimate = math.log(
+                    (self.amount + payment / rate) / (self._balance + payment / rate)
+                ) / math.log1p(rate)
+
+            month = max(1, math.ceil(estimate))
+
+        # The estimate can be off by one from floating point error, so settle it against the
+        # same comparison advance_month makes
+        while month > 1 and self._finishes_on(payment, month - 1):
+            month -= 1
+        while not self._finishes_on(payment, month):
+            month += 1
+
+        return month
+
+    def project_payoff(self, payment: float | None = None) -> PayoffProjection:
+        """
+        Works out in constant time what calling ``advance_month(payment)`` until the obligation
+        is finished would lead to, without changing the obligation.
+
+        Parameters
+        ----------
+        payment : float
+            The amount paid every month, defaults to the minimum payment
+
+        Returns
+        -------
+        PayoffProjection
+            The month the obligation finishes on and the totals paid by then
+        """
+        if payment is None:
+            payment = self.minimum_payment
+
+        months = self.months_to_finish(payment)
+        if months is None:
+            return PayoffProjection(None, None, None, None)
+        if months == 0:
+            return PayoffProjection(
+                0, self.total_paid, self.total_interest, self.total_costs
+            )
+
+        last_balance = self._balance_after(payment, months - 1)
+        last_balance += last_balance * self._monthly_rate()
+
+        if self.obligation_type == ObligationType.LOAN:
+            fixed_costs = self.fixed_costs or 0
+            amount_paid = (months - 1) * payment + last_balance + fixed_costs
+            costs = months * fixed_costs
+            interest = amount_paid - self._balance - costs
+
+        elif self.obligation_type == ObligationType.SAVINGS:
+            last_payment = max(self.amount - last_balance, 0)
+            amount_paid = (months - 1) * payment + last_payment
+            costs = 0
+            interest = last_balance + last_payment - self._balance - amount_paid
+
+        return PayoffProjection(
+            months,
+            self.total_paid + amount_paid,
+            self.total_interest + interest,
+            self.total_costs + costs,
+        )
+
+    def advance_months(self, payment: float, months: int):
+        """
+        Applies ``months`` months of the same payment in one step. The payment must not finish
+        the obligation within those months, see ``months_to_finish``.
+
+        Parameters
+        ----------
+        payment : float
+            The amount to pay towards the obligation every month
+        months : int
+            How many months to advance
+        """
+        if months <= 0 or self.is_finished:
+            return
+
+        finish_month = self.months_to_finish(payment)
+        if finish_month is not None and finish_month <= months:
+            raise ValueError(
+                f"{self.name} would be finished on month {finish_month} of {months}."
+            )
+
+        new_balance = self._balance_after(payment, months)
+        amount_paid = payment * months
+
+        if self.obligation_type == ObligationType.LOAN:
+            costs = (self.fixed_costs or 0) * months
+            self.total_costs += costs
+            self.total_interest += new_balance - self._balance - costs + amount_paid
+
+        elif self.obligation_type == ObligationType.SAVINGS:
+            self.total_interest += new_balance - self._balance - amount_paid
+
+        self.total_paid += amount_paid
+        self._balance = new_balance
+
+    def pay_lump_sum(self, amount: float) -> float:
+        """
+        Pays a one-off amount straight off the balance, with no interest or costs. Returns the
+        amount left over once the obligation is finished.
+
+        Parameters
+        ----------
+        amount : float
+            The amount to pay towards the obligation
+
+        Returns
+        -------
+        float
+            Any left-over amount
+        """
+        if amount < 0:
+            raise ValueError("Lump sums must be positive.")
+        if self.is_finished:
+            return amount
+
+        if self.obligation_type == ObligationType.LOAN:
+            if amount < self._balance:
+                self._balance -= amount
+                self.total_paid += amount
+                return 0
+
+            amount_to_pay = self._balance
+            self._balance = 0
+
+        elif self.obligation_type == ObligationType.SAVINGS:
+            if self._balance + amount < self.amount:
+                self._balance += amount
+                self.total_paid += amount
+                return 0
+
+            amount_to_pay = self.amount - self._balance
+            self._balance = self.amount
+
+        self.is_finished = True
+        self.total_paid += amount_to_pay
+        return amount - amount_to_pay
+
+    def get_state(self) -> ObligationState:
+        """
+        The progress made with ``advance_month``, so it can be put back later with
+        ``set_state``, e.g. to try several plans from the same point.
+        """
+        return ObligationState(
+            self._balance,
+            self.total_interest,
+            self.total_costs,
+            self.total_paid,
+            self.is_finished,
+        )
+
+    def set_state(self, state: ObligationState | tuple):
+        (
+            self._balance,
+            self.total_interest,
+            self.total_costs,
+            self.total_paid,
+            self.is_finished,
+        ) = state
+
+    def to_spec(self) -> dict:
+        """
+        The constructor arguments for this obligation as a plain dict, so a fresh copy can be
+        made with ``Obligation(**spec)``. Progress made with ``advance_month`` is not included.
+        """
+        return {
+            "name": self.name,
+            "amount": self.amount,
+            "obligation_type": self.obligation_type,
+            "interest_rate": self.interest_rate,
+            "fixed_costs": self.fixed_costs,
+            "minimum_payment": self.minimum_payment,
+        }
+
     def __str__(self):
         return f"{self.name}: amount: {self.amount}, apr: {self.interest_rate}"
 
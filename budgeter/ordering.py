@@ -0,0 +1,487 @@
+import copy
+import itertools
+import math
+from typing import TYPE_CHECKING
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import MAX_MONTHS, _advance_plan_month, run_payment_plan
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+OBJECTIVES = ("total_paid", "months")
+METHODS = ("auto", "exhaustive", "branch_and_bound", "heuristic")
+
+# Portfolio sizes where "auto" switches to the next method
+EXHAUSTIVE_MAX_DEBTS = 5
+BRANCH_AND_BOUND_MAX_DEBTS = 12
+
+# How many partial orders branch and bound may expand before settling for the best so far
+MAX_SEARCH_NODES = 20_000
+
+
+def _copy_debts(debts: list[Obligation]) -> list[Obligation]:
+    return [copy.copy(debt) for debt in debts]
+
+
+def _get_state(debts: list[Obligation]) -> list[tuple]:
+    return [debt.get_state() for debt in debts]
+
+
+def _set_state(debts: list[Obligation], state: list[tuple]):
+    for debt, debt_state in zip(debts, state):
+        debt.set_state(debt_state)
+
+
+def _cost(debts: list[Obligation], month: int, objective: str) -> tuple[bool, float]:
+    """Sort key for a finished simulation: unfinished plans always lose."""
+    unfinished = not all([debt.is_finished for debt in debts])
+    if objective == "months":
+        return unfinished, month
+
+    return unfinished, sum([debt.total_paid for debt in debts])
+
+
+def _evaluate(
+    debts: list[Obligation],
+    monthly_funds: float,
+    objective: str,
+    max_months: int = MAX_MONTHS,
+) -> tuple[bool, float]:
+    debts = _copy_debts(debts)
+
+    month = 0
+    while not all([debt.is_finished for debt in debts]) and month < max_months:
+        _advance_plan_month(debts, monthly_funds)
+        month += 1
+
+    return _cost(debts, month, objective)
+
+
+def _advance_prefix(
+    debts: list[Obligation],
+    monthly_funds: float,
+    prefix_length: int,
+    month: int,
+    max_months: int = MAX_MONTHS,
+) -> tuple[int, tuple | None]:
+    """
+    Simulates while the outcome only depends on the first ``prefix_length`` debts of the order.
+    The debts after them are paid exactly their minimums until one of them becomes the first
+    unfinished debt or is handed left-over money. Whichever debt comes next in the order
+    decides what happens then, so the month is rolled back and the simulation stops there.
+
+    A debt after the prefix can also finish on its minimum alone. Only the debt that receives
+    its left-over money depends on the order then, so the month is kept and the simulation stops
+    with a handoff of (position, leftover, state at the start of the month) for the caller to
+    branch on.
+
+    Returns the number of months simulated so far and the handoff, if any.
+    """
+    while not all([debt.is_finished for debt in debts]) and month < max_months:
+        state = _get_state(debts)
+
+        total_minimum_payment = sum(
+            [debt.minimum_payment for debt in debts if not debt.is_finished]
+        )
+        extra_payment = monthly_funds - total_minimum_payment
+        handoff = None
+
+        for i, debt in enumerate(debts):
+            if debt.is_finished:
+                continue
+
+            if i >= prefix_length and extra_payment != 0:
+                _set_state(debts, state)
+                return month, None
+
+            extra_payment = debt.advance_month(debt.minimum_payment + extra_payment)
+
+            if i >= prefix_length and debt.is_finished:
+                if handoff is not None:
+                    _set_state(debts, state)
+                    return month, None
+
+                handoff = (i, extra_payment, state)
+                extra_payment = 0
+
+        month += 1
+
+        if handoff is not None and handoff[1] != 0:
+            return month, handoff
+
+    return month, None
+
+
+def _relaxed_payoff(
+    balances: list[float],
+    monthly_rates: list[float],
+    minimum_payments: list[float],
+    monthly_funds: float,
+    max_months: int = MAX_MONTHS,
+) -> tuple[float, int]:
+    """
+    Pays the balances off with no fixed costs, paying every minimum and then putting every
+    other dollar towards the highest rate first, even if that splits it across debts. Any plan
+    that pays at least the minimums on every unfinished debt pays at least this much interest,
+    and with no minimums, takes at least this many months. Returns the interest paid and the
+    months taken.
+    """
+    order = sorted(range(len(balances)), key=lambda i: monthly_rates[i], reverse=True)
+    balances = [balances[i] for i in order]
+    monthly_rates = [monthly_rates[i] for i in order]
+    minimum_payments = [minimum_payments[i] for i in order]
+
+    total_interest = 0
+    month = 0
+    while any(balance > 0 for balance in balances):
+        if month >= max_months:
+            return math.inf, math.inf
+
+        funds = monthly_funds
+        for i, balance in enumerate(balances):
+            if balance > 0:
+                interest_amount = balance * monthly_rates[i]
+                total_interest += interest_amount
+
+                payment = min(minimum_payments[i], balance + interest_amount)
+                balances[i] = balance + interest_amount - payment
+                funds -= payment
+
+        for i, balance in enumerate(balances):
+            if funds <= 0:
+                break
+            if balance > 0:
+                payment = min(funds, balance)
+                balances[i] = balance - payment
+                funds -= payment
+
+        month += 1
+
+    return total_interest, month
+
+
+def _lower_bound(
+    debts: list[Obligation],
+    monthly_funds: float,
+    month: int,
+    objective: str,
+    max_months: int = MAX_MONTHS,
+) -> float:
+    """
+    A bound on the cost of any plan that continues from this state and finishes. Interest and
+    months are bounded by ``_relaxed_payoff``. Fixed costs are bounded by paying each loan off
+    on its own with all of ``monthly_funds``, which no plan can beat.
+    """
+    unfinished = [debt for debt in debts if not debt.is_finished]
+    balances = [debt._balance for debt in unfinished]
+    monthly_rates = [debt._monthly_rate() for debt in unfinished]
+
+    if objective == "months":
+        _, months = _relaxed_payoff(
+            balances, monthly_rates, [0] * len(unfinished), monthly_funds, max_months
+        )
+        return month + months
+
+    # Whatever covers the fixed costs does not reduce the balance
+    interest, months = _relaxed_payoff(
+        balances,
+        monthly_rates,
+        [max(debt.minimum_payment - (debt.fixed_costs or 0), 0) for debt in unfinished],
+        monthly_funds,
+        max_months,
+    )
+    if months == math.inf:
+        # Paying the highest rates first is not quite the fastest order when minimums are
+        # involved, so only give up if the plan cannot finish without them either
+        interest, _ = _relaxed_payoff(
+            balances, monthly_rates, [0] * len(unfinished), monthly_funds, max_months
+        )
+        if interest == math.inf:
+            return math.inf
+
+    costs = 0
+    for debt in unfinished:
+        if debt.fixed_costs:
+            months = debt.months_to_finish(monthly_funds)
+            if months is None:
+                # Not even all of the funds finish this loan, so no plan from here can
+                return math.inf
+            costs += debt.fixed_costs * months
+
+    return sum([debt.total_paid for debt in debts]) + sum(balances) + interest + costs
+
+
+def _order_from_handoffs(
+    order: list[int], remaining: list[int], handoffs: list[tuple[int, int | None]]
+) -> list[int]:
+    """
+    Builds a full order from the searched prefix and the handoffs made along the way. A debt
+    that handed its leftover to ``target`` sits right before it, and one whose leftover went
+    unused goes at the end. Later handoffs go further from their target so they do not land
+    between an earlier one and its target.
+    """
+    handed_to = {}
+    for debt, target in handoffs:
+        handed_to.setdefault(target, []).append(debt)
+
+    def block(target):
+        debts = []
+        for debt in reversed(handed_to.get(target, [])):
+            debts += block(debt) + [debt]
+        return debts
+
+    handed_off = {debt for debt, _ in handoffs}
+    full_order = []
+    for i in order + [i for i in remaining if i not in handed_off]:
+        full_order += block(i) + [i]
+
+    return full_order + block(None)
+
+
+def _branch_and_bound(
+    debts: list[Obligation],
+    monthly_funds: float,
+    objective: str,
+    best_order: list[int],
+    best_cost: tuple[bool, float],
+    tolerance: float,
+    max_nodes: int,
+    max_months: int = MAX_MONTHS,
+) -> list[int]:
+    debts = _copy_debts(debts)
+    nodes = 0
+
+    # The bound assumes no payment is ever negative, which holds once the minimums are covered
+    use_bounds = monthly_funds >= sum([debt.minimum_payment for debt in debts])
+
+    def signature(i, state):
+        return (
+            state[i],
+            debts[i].interest_rate,
+            debts[i].fixed_costs,
+            debts[i].minimum_payment,
+        )
+
+    def search(order, handoffs, state, month):
+        nonlocal best_order, best_cost, nodes
+
+        nodes += 1
+        if nodes > max_nodes:
+            return
+
+        remaining = [i for i in range(len(debts)) if i not in order]
+        positions = order + remaining
+        current = [debts[i] for i in positions]
+        _set_state(current, [state[i] for i in positions])
+
+        month, handoff = _advance_prefix(
+            current, monthly_funds, len(order), month, max_months
+        )
+
+        if all([debt.is_finished for debt in current]) or month >= max_months:
+            cost = _cost(current, month, objective)
+            if cost < best_cost:
+                best_cost = cost
+                best_order = _order_from_handoffs(order, remaining, handoffs)
+            return
+
+        state = dict(zip(positions, _get_state(current)))
+
+        if handoff is not None:
+            position, leftover, month_start = handoff
+            month_start = dict(zip(positions, month_start))
+
+            # Hand the leftover to each debt it could go to, unless that would finish the debt
+            # too, in which case fall back to extending the prefix from the start of the month
+            receivers = []
+            tried = set()
+            for i in remaining:
+                if i == positions[position] or debts[i].is_finished:
+                    continue
+                if signature(i, month_start) in tried:
+                    continue
+                tried.add(signature(i, month_start))
+
+                _set_state([debts[i]], [month_start[i]])
+                debts[i].advance_month(debts[i].minimum_payment + leftover)
+                if debts[i].is_finished:
+                    receivers = None
+                    break
+                receivers.append((i, _get_state([debts[i]])[0]))
+
+            if receivers is not None:
+                for i, receiver_state in receivers + [(None, None)]:
+                    child_state = dict(state)
+                    if i is not None:
+                        child_state[i] = receiver_state
+                    search(
+                        order,
+                        handoffs + [(positions[position], i)],
+                        child_state,
+                        month,
+                    )
+                return
+
+            state = month_start
+            month -= 1
+
+        if use_bounds:
+            _set_state(current, [state[i] for i in positions])
+            bound = _lower_bound(current, monthly_funds, month, objective, max_months)
+
+            # An unfinished plan can only be beaten by one that finishes
+            if bound == math.inf or (
+                not best_cost[0] and bound >= best_cost[1] * (1 - tolerance)
+            ):
+                return
+
+        # Try the most expensive debts first, which tends to find good orders early
+        candidates = sorted(
+            [i for i in remaining if not state[i][4]],
+            key=lambda i: (debts[i].interest_rate, -state[i][0]),
+            reverse=True,
+        )
+
+        tried = set()
+        for i in candidates:
+            # Swapping identical debts gives the same plan
+            if signature(i, state) in tried:
+                continue
+            tried.add(signature(i, state))
+
+            search(order + [i], handoffs, state, month)
+
+    search([], [], dict(enumerate(_get_state(debts))), 0)
+
+    return best_order
+
+
+def _local_search(
+    debts: list[Obligation],
+    monthly_funds: float,
+    objective: str,
+    best_order: list[int],
+    best_cost: tuple[bool, float],
+    max_months: int = MAX_MONTHS,
+) -> list[int]:
+    """Moves single debts to other positions in the order until nothing improves."""
+    improved = True
+    while improved:
+        improved = False
+
+        for i, j in itertools.permutations(range(len(debts)), 2):
+            order = best_order.copy()
+            order.insert(j, order.pop(i))
+
+            cost = _evaluate(
+                [debts[k] for k in order], monthly_funds, objective, max_months
+            )
+            if cost < best_cost:
+                best_order, best_cost = order, cost
+                improved = True
+
+    return best_order
+
+
+def optimize_payoff_order(
+    debts: list[Obligation],
+    monthly_funds: float,
+    objective: str = "total_paid",
+    method: str = "auto",
+    tolerance: float = 0.0,
+    max_nodes: int = MAX_SEARCH_NODES,
+    max_months: int = MAX_MONTHS,
+) -> tuple[list[Obligation], "pd.DataFrame"]:
+    """
+    Searches for the order to pay debts off in that minimizes the total paid or the number of
+    months, under the same rules as ``run_payment_plan``.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The loans to order. They are not modified.
+    monthly_funds : float
+        The amount available each month for all debts combined
+    objective : str
+        Either "total_paid" or "months"
+    method : str
+        "exhaustive" tries every order, "branch_and_bound" finds the same best order while
+        skipping orders that provably cannot beat it, and "heuristic" improves on the snowball
+        and avalanche orders by moving one debt at a time. "auto" picks one based on the
+        number of debts.
+    tolerance : float
+        Lets branch and bound skip orders that could beat the best found by less than this
+        fraction of its cost
+    max_nodes : int
+        How many partial orders branch and bound may expand. When it runs out the best order
+        found so far is returned, which is never worse than the heuristic one.
+    max_months : int
+        The longest plan to run. Orders that do not finish by then lose to any that do.
+
+    Returns
+    -------
+    tuple[list[Obligation], pd.DataFrame]
+        The debts in the best order found, and the result of ``run_payment_plan`` for that order
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objective must be one of {OBJECTIVES}.")
+    if method not in METHODS:
+        raise ValueError(f"Method must be one of {METHODS}.")
+    if any(debt.obligation_type != ObligationType.LOAN for debt in debts):
+        raise ValueError("Only loans can be ordered.")
+
+    if method == "auto":
+        if len(debts) <= EXHAUSTIVE_MAX_DEBTS:
+            method = "exhaustive"
+        elif len(debts) <= BRANCH_AND_BOUND_MAX_DEBTS:
+            method = "branch_and_bound"
+        else:
+            method = "heuristic"
+
+    indices = list(range(len(debts)))
+    best_order = None
+    best_cost = (True, math.inf)
+
+    if method == "exhaustive":
+        candidates = itertools.permutations(indices)
+    else:
+        candidates = [
+            indices,
+            sorted(indices, key=lambda i: debts[i].amount),
+            sorted(indices, key=lambda i: debts[i].interest_rate, reverse=True),
+        ]
+
+    for order in candidates:
+        cost = _evaluate(
+            [debts[i] for i in order], monthly_funds, objective, max_months
+        )
+        if best_order is None or cost < best_cost:
+            best_order, best_cost = list(order), cost
+
+    if method in ("branch_and_bound", "heuristic"):
+        best_order = _local_search(
+            debts, monthly_funds, objective, best_order, best_cost, max_months
+        )
+
+    if method == "branch_and_bound":
+        # A good starting order from the local search lets far more of the tree be skipped
+        best_cost = _evaluate(
+            [debts[i] for i in best_order], monthly_funds, objective, max_months
+        )
+        best_order = _branch_and_bound(
+            debts,
+            monthly_funds,
+            objective,
+            best_order,
+            best_cost,
+            tolerance,
+            max_nodes,
+            max_months,
+        )
+
+    ordered_debts = [debts[i] for i in best_order]
+    return ordered_debts, run_payment_plan(
+        _copy_debts(ordered_debts), monthly_funds, max_months
+    )
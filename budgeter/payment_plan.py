@@ -1,6 +1,254 @@
-import pandas as pd
+import math
+import time
+from collections.abc import Callable, Generator
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, NamedTuple
 
+import numpy as np
+
+from budgeter import profiling
 from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_MONTHS = 12 * 100
+
+
+class StopReason(Enum):
+    """
+    Why a payment plan stopped. Plans that can never finish are stopped as soon as that is
+    known rather than run to ``max_months``, see ``check_feasibility``.
+    """
+
+    FINISHED = "finished"
+    # Debts were left after max_months
+    HORIZON = "horizon"
+    # The monthly funds do not cover the minimum payments, and no debt left is shrinking
+    BELOW_MINIMUMS = "below_minimums"
+    # The monthly funds do not cover the interest on the loans
+    INTEREST_EXCEEDS_FUNDS = "interest_exceeds_funds"
+    # None of the debts left would ever be paid off by the payments they are getting
+    NOT_SHRINKING = "not_shrinking"
+
+
+class MonthSnapshot(NamedTuple):
+    """The state of a payment plan at the end of a month."""
+
+    month: int
+    balances: tuple[float, ...]
+    debt_total_paid: tuple[float, ...]
+    total_balance: float
+    total_paid: float
+
+
+@dataclass
+class PlanSummary:
+    """
+    The outcome of a payment plan without its month by month history. ``is_finished`` is
+    False if the debts were not all paid off, ``stop_reason`` says why, and a debt's
+    ``payoff_month`` is None if it was never paid off.
+
+    ``total_balance_by_month`` and ``total_paid_by_month`` are only filled in when asked for,
+    see ``summarize_payment_plan``.
+    """
+
+    months: int
+    is_finished: bool
+    total_paid: float
+    total_interest: float
+    total_costs: float
+    payoff_month: tuple[int | None, ...]
+    stop_reason: StopReason | None = None
+    total_balance_by_month: np.ndarray | None = None
+    total_paid_by_month: np.ndarray | None = None
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the monthly totals, 0 if they were not kept."""
+        return sum(
+            [
+                values.nbytes
+                for values in (self.total_balance_by_month, self.total_paid_by_month)
+                if values is not None
+            ]
+        )
+
+
+class PaymentPlanResult:
+    """
+    Month by month history of a payment plan. Rows are written into preallocated per-column
+    arrays and a pandas DataFrame is only built when ``to_dataframe`` is called.
+
+    Columns can be looked up by the same names as the DataFrame, e.g. ``result["total_paid"]``
+    or ``result[f"{debt.name}_balance"]``. ``stop_reason`` says why the plan stopped and is
+    kept in the DataFrame's ``attrs``.
+    """
+
+    _buffers = (
+        "_month",
+        "_balances",
+        "_debt_total_paid",
+        "_total_balance",
+        "_total_paid",
+    )
+
+    def __init__(self, debt_names: list[str], capacity: int = MAX_MONTHS + 1):
+        self.debt_names = list(debt_names)
+        self.stop_reason: StopReason | None = None
+        self._length = 0
+
+        # Where each per-debt column lives, the first debt winning if names repeat
+        self._debt_columns: dict[str, tuple[str, int]] = {}
+        for i, name in enumerate(self.debt_names):
+            self._debt_columns.setdefault(f"{name}_balance", ("balances", i))
+            self._debt_columns.setdefault(f"{name}_total_paid", ("debt_total_paid", i))
+
+        num_debts = len(self.debt_names)
+        self._month = np.zeros(capacity, dtype=int)
+        self._balances = np.zeros((capacity, num_debts))
+        self._debt_total_paid = np.zeros((capacity, num_debts))
+        self._total_balance = np.zeros(capacity)
+        self._total_paid = np.zeros(capacity)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        debt_names: list[str],
+        month: np.ndarray,
+        balances: np.ndarray,
+        debt_total_paid: np.ndarray,
+        total_balance: np.ndarray,
+        total_paid: np.ndarray,
+        stop_reason: StopReason | None = None,
+    ) -> "PaymentPlanResult":
+        """Wraps columns that were already computed, one row per month."""
+        result = cls(debt_names, capacity=0)
+        result.stop_reason = stop_reason
+        result._month = np.asarray(month, dtype=int)
+        result._balances = np.asarray(balances, dtype=float)
+        result._debt_total_paid = np.asarray(debt_total_paid, dtype=float)
+        result._total_balance = np.asarray(total_balance, dtype=float)
+        result._total_paid = np.asarray(total_paid, dtype=float)
+        result._length = result._month.size
+
+        return result
+
+    def append(
+        self,
+        month: int,
+        balances: list[float],
+        debt_total_paid: list[float],
+        total_balance: float,
+        total_paid: float,
+    ):
+        if self._length == self._month.size:
+            self._grow()
+
+        row = self._length
+        self._month[row] = month
+        self._balances[row] = balances
+        self._debt_total_paid[row] = debt_total_paid
+        self._total_balance[row] = total_balance
+        self._total_paid[row] = total_paid
+        self._length += 1
+
+    def _grow(self):
+        for name in self._buffers:
+            values = getattr(self, name)
+            grown = np.zeros((max(1, 2 * values.shape[0]),) + values.shape[1:])
+            grown[: values.shape[0]] = values
+            setattr(self, name, grown.astype(values.dtype))
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the column buffers, including unused capacity."""
+        return sum(getattr(self, name).nbytes for name in self._buffers)
+
+    def compact(self) -> "PaymentPlanResult":
+        """Drops the unused capacity so a finished plan only holds its own months."""
+        for name in self._buffers:
+            setattr(self, name, getattr(self, name)[: self._length].copy())
+
+        return self
+
+    @property
+    def month(self) -> np.ndarray:
+        return self._month[: self._length]
+
+    @property
+    def balances(self) -> np.ndarray:
+        """Per-debt balances shaped (months, debts)."""
+        return self._balances[: self._length]
+
+    @property
+    def debt_total_paid(self) -> np.ndarray:
+        """Per-debt running totals paid shaped (months, debts)."""
+        return self._debt_total_paid[: self._length]
+
+    @property
+    def total_balance(self) -> np.ndarray:
+        return self._total_balance[: self._length]
+
+    @property
+    def total_paid(self) -> np.ndarray:
+        return self._total_paid[: self._length]
+
+    @property
+    def columns(self) -> list[str]:
+        return (
+            ["month"]
+            + [f"{name}_balance" for name in self.debt_names]
+            + [f"{name}_total_paid" for name in self.debt_names]
+            + ["total_balance", "total_paid"]
+        )
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column in ("month", "total_balance", "total_paid"):
+            return getattr(self, column)
+
+        if column not in self._debt_columns:
+            raise KeyError(column)
+
+        block, i = self._debt_columns[column]
+        return getattr(self, block)[:, i]
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        # pandas is slow to import and only needed here, so it is loaded on first use
+        import pandas as pd
+
+        columns = self.columns
+        num_debts = len(self.debt_names)
+
+        with profiling.phase("dataframe"):
+            # Whole blocks at a time, rather than one lookup per column
+            df = pd.concat(
+                [
+                    pd.DataFrame({"month": self.month}),
+                    pd.DataFrame(self.balances, columns=columns[1 : num_debts + 1]),
+                    pd.DataFrame(
+                        self.debt_total_paid,
+                        columns=columns[num_debts + 1 : 2 * num_debts + 1],
+                    ),
+                    pd.DataFrame(
+                        {
+                            "total_balance": self.total_balance,
+                            "total_paid": self.total_paid,
+                        }
+                    ),
+                ],
+                axis=1,
+            )
+
+        if self.stop_reason is not None:
+            df.attrs["stop_reason"] = self.stop_reason.value
+
+        return df
 
 
 def _get_total_balance(debts: list[Obligation]):
@@ -23,61 +271,546 @@ def _get_total_paid(debts: list[Obligation]):
     return total_paid
 
 
-def run_payment_plan(debts: list[Obligation], monthly_funds: float):
+def _advance_plan_month(debts: list[Obligation], monthly_funds: float):
+    """
+    Pays every unfinished debt its minimum and puts whatever is left over towards the first
+    unfinished debt. Money left over when a debt finishes rolls into the next one.
+    """
+    profile = profiling._active.get()
+    if profile is not None:
+        return _advance_plan_month_profiled(debts, monthly_funds, profile)
 
-    dataframe_cols = (
-        ["month"]
-        + [f"{debt.name}_balance" for debt in debts]
-        + [f"{debt.name}_total_paid" for debt in debts]
-        + ["total_balance", "total_paid"]
+    total_minimum_payment = sum(
+        [debt.minimum_payment for debt in debts if not debt.is_finished]
     )
+    extra_payment = monthly_funds - total_minimum_payment
 
-    df = pd.DataFrame(columns=dataframe_cols)
+    for debt in debts:
+        if debt.is_finished:
+            continue
 
-    df.loc[0] = {col: 0 for col in dataframe_cols}
+        extra_payment = debt.advance_month(debt.minimum_payment + extra_payment)
 
-    total_balance = 0
+
+def _advance_plan_month_profiled(
+    debts: list[Obligation], monthly_funds: float, profile: profiling.Profile
+):
+    """``_advance_plan_month`` that also times every ``advance_month`` call."""
+    start = time.perf_counter()
+
+    total_minimum_payment = sum(
+        [debt.minimum_payment for debt in debts if not debt.is_finished]
+    )
+    extra_payment = monthly_funds - total_minimum_payment
+
+    advance_seconds = 0.0
+    advance_calls = 0
     for debt in debts:
-        debt_balance = debt.get_balance()
-        df[f"{debt.name}_balance"] = debt_balance
+        if debt.is_finished:
+            continue
 
-        total_balance += debt_balance
+        advance_start = time.perf_counter()
+        extra_payment = debt.advance_month(debt.minimum_payment + extra_payment)
+        advance_seconds += time.perf_counter() - advance_start
+        advance_calls += 1
 
-    df["total_balance"] = total_balance
+        if debt.is_finished:
+            profile.count("debts_finished")
 
-    month = 1
+    profile.add_time("advance_month", advance_seconds, advance_calls)
+    profile.add_time("allocation", time.perf_counter() - start)
+    profile.count("months_simulated")
 
-    while not all([debt.is_finished for debt in debts]):
-        total_minimum_payment = sum(
-            [debt.minimum_payment for debt in debts if not debt.is_finished]
-        )
-        extra_payment = monthly_funds - total_minimum_payment
 
-        monthly_dict = {}
-        has_paid_extra = False
-        for debt in debts:
+def _snapshot(debts: list[Obligation], month: int) -> MonthSnapshot:
+    profile = profiling._active.get()
+    if profile is not None:
+        start = time.perf_counter()
 
-            if debt.is_finished:
-                monthly_dict[f"{debt.name}_balance"] = debt.get_balance()
-                monthly_dict[f"{debt.name}_total_paid"] = debt.get_total_paid()
-                continue
+    snapshot = MonthSnapshot(
+        month,
+        tuple([debt.get_balance() for debt in debts]),
+        tuple([debt.get_total_paid() for debt in debts]),
+        _get_total_balance(debts=debts),
+        _get_total_paid(debts=debts),
+    )
+
+    if profile is not None:
+        profile.add_time("aggregation", time.perf_counter() - start)
+
+    return snapshot
+
+
+def iter_payment_plan(
+    debts: list[Obligation], monthly_funds: float, max_months: int = MAX_MONTHS
+) -> Generator[MonthSnapshot, None, StopReason]:
+    """
+    Runs a payment plan one month at a time, yielding a snapshot after every month instead of
+    keeping the history. The plan only advances when the next snapshot is asked for, so the
+    caller can stop at any point.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority
+    monthly_funds : float
+        The amount available each month for all debts combined
+    max_months : int
+        The longest plan to run
+
+    Yields
+    ------
+    MonthSnapshot
+        The starting balances as month 0, then the state at the end of each month
+
+    Returns
+    -------
+    StopReason
+        Why the plan stopped, as the ``value`` of the final ``StopIteration``
+    """
+    return _iter_plan(
+        debts,
+        lambda debts: _advance_plan_month(debts, monthly_funds),
+        max_months,
+        stop_reason=check_feasibility(debts, monthly_funds),
+        check=lambda debts: _diverging_reason(debts, monthly_funds),
+    )
 
-            extra_payment = debt.advance_month(debt.minimum_payment + extra_payment)
 
-            monthly_dict[f"{debt.name}_balance"] = debt.get_balance()
-            monthly_dict[f"{debt.name}_total_paid"] = debt.get_total_paid()
+def _iter_plan(
+    debts: list[Obligation],
+    advance: Callable[[list[Obligation]], None],
+    max_months: int = MAX_MONTHS,
+    stop_reason: StopReason | None = None,
+    check: Callable[[list[Obligation]], StopReason | None] | None = None,
+) -> Generator[MonthSnapshot, None, StopReason]:
+    """
+    ``iter_payment_plan`` with ``advance`` paying out each month. A ``stop_reason`` found
+    up front ends the plan after its first row, and ``check`` is asked after every month a
+    debt is paid off for a reason the plan can no longer finish.
+    """
+    # The first row holds the starting balances; nothing has been paid yet
+    yield MonthSnapshot(
+        0,
+        tuple([debt.get_balance() for debt in debts]),
+        (0,) * len(debts),
+        _get_total_balance(debts=debts),
+        0,
+    )
+
+    if stop_reason is not None:
+        return stop_reason
+
+    month = 1
+    num_finished = sum([debt.is_finished for debt in debts])
+
+    while num_finished < len(debts):
+        # Stop if we've gone on too long
+        if month > max_months:
+            return StopReason.HORIZON
+
+        advance(debts)
 
         # Keep track of time
-        monthly_dict["month"] = month
-        monthly_dict["total_balance"] = _get_total_balance(debts=debts)
-        monthly_dict["total_paid"] = _get_total_paid(debts=debts)
+        yield _snapshot(debts, month)
 
         month += 1
 
-        df.loc[len(df)] = monthly_dict
+        finished = sum([debt.is_finished for debt in debts])
+        if finished > num_finished and check is not None:
+            stop_reason = check(debts)
+            if stop_reason is not None:
+                return stop_reason
+        num_finished = finished
+
+    return StopReason.FINISHED
 
-        # Break if we've gone on too long
-        if month > (12 * 100):
+
+def _collect(
+    result: PaymentPlanResult, plan: Generator[MonthSnapshot, None, StopReason]
+) -> PaymentPlanResult:
+    """Appends every snapshot of ``plan`` to ``result`` along with why it stopped."""
+    while True:
+        try:
+            result.append(*next(plan))
+        except StopIteration as stop:
+            result.stop_reason = stop.value
+            return result
+
+
+def compute_payment_plan(
+    debts: list[Obligation], monthly_funds: float, max_months: int = MAX_MONTHS
+) -> PaymentPlanResult:
+    """
+    Runs a payment plan, paying the debts off in the order given. Plans that can never
+    finish stop as soon as that is known, see ``check_feasibility``.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority
+    monthly_funds : float
+        The amount available each month for all debts combined
+    max_months : int
+        The longest plan to run
+
+    Returns
+    -------
+    PaymentPlanResult
+        The balances and totals paid for every month of the plan, and why it stopped
+    """
+    result = PaymentPlanResult([debt.name for debt in debts], capacity=max_months + 1)
+
+    return _collect(result, iter_payment_plan(debts, monthly_funds, max_months))
+
+
+def summarize_payment_plan(
+    debts: list[Obligation],
+    monthly_funds: float,
+    totals: bool = False,
+    max_months: int = MAX_MONTHS,
+) -> PlanSummary:
+    """
+    Runs the same payment plan as ``compute_payment_plan`` but only keeps the outcome, which
+    is all a comparison of many plans needs.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority
+    monthly_funds : float
+        The amount available each month for all debts combined
+    totals : bool
+        Whether to also keep the total balance and total paid for every month, e.g. to chart
+        many plans against each other. Per-debt history is never kept.
+    max_months : int
+        The longest plan to run
+
+    Returns
+    -------
+    PlanSummary
+        Months taken, totals, the month each debt was paid off and why the plan stopped
+    """
+    payoff_month = [0 if debt.is_finished else None for debt in debts]
+
+    if totals:
+        total_balance_by_month = [_get_total_balance(debts=debts)]
+        total_paid_by_month = [0]
+
+    stop_reason = check_feasibility(debts, monthly_funds)
+
+    month = 0
+    while stop_reason is None and not all([debt.is_finished for debt in debts]):
+        if month >= max_months:
+            stop_reason = StopReason.HORIZON
             break
 
-    return df
+        _advance_plan_month(debts, monthly_funds)
+        month += 1
+
+        paid_off = False
+        for i, debt in enumerate(debts):
+            if payoff_month[i] is None and debt.is_finished:
+                payoff_month[i] = month
+                paid_off = True
+
+        if totals:
+            total_balance_by_month.append(_get_total_balance(debts=debts))
+            total_paid_by_month.append(_get_total_paid(debts=debts))
+
+        if paid_off:
+            stop_reason = _diverging_reason(debts, monthly_funds)
+
+    summary = PlanSummary(
+        months=month,
+        is_finished=all([debt.is_finished for debt in debts]),
+        total_paid=_get_total_paid(debts=debts),
+        total_interest=sum([debt.get_total_interest_paid() for debt in debts]),
+        total_costs=sum([debt.get_total_costs_paid() for debt in debts]),
+        payoff_month=tuple(payoff_month),
+        stop_reason=stop_reason or StopReason.FINISHED,
+    )
+    if totals:
+        summary.total_balance_by_month = np.array(total_balance_by_month, dtype=float)
+        summary.total_paid_by_month = np.array(total_paid_by_month, dtype=float)
+
+    return summary
+
+
+def _current_payments(debts: list[Obligation], monthly_funds: float) -> list[float]:
+    """The payment each debt gets in a month where none of them finish."""
+    total_minimum_payment = sum(
+        [debt.minimum_payment for debt in debts if not debt.is_finished]
+    )
+    extra_payment = monthly_funds - total_minimum_payment
+
+    payments = []
+    for debt in debts:
+        if debt.is_finished:
+            payments.append(0)
+            continue
+
+        payments.append(debt.minimum_payment + extra_payment)
+        extra_payment = 0
+
+    return payments
+
+
+def check_feasibility(
+    debts: list[Obligation],
+    monthly_funds: float,
+    payments: list[float] | None = None,
+    minimums: list[float] | None = None,
+) -> StopReason | None:
+    """
+    Checks up front whether a payment plan could ever pay off ``debts``, so one that can not
+    is stopped straight away instead of running to ``max_months``.
+
+    - ``INTEREST_EXCEEDS_FUNDS`` if ``monthly_funds`` are no more than the interest on the
+      loans' total balance at the lowest of their rates. The total balance then never goes
+      down, whichever loans the money goes to.
+    - ``BELOW_MINIMUMS`` or ``NOT_SHRINKING`` if no debt would ever be paid off by the
+      payment it gets now, see ``_diverging_reason``. Falling short of the minimums alone
+      does not stop a plan, since the first debt then just gets less.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority
+    monthly_funds : float
+        The amount available each month for all debts combined
+    payments : list[float], optional
+        What each debt is paid in a month where none of them is paid off, by default as in
+        ``run_payment_plan``. Plans that share out the funds differently, e.g. a
+        ``Waterfall``, give their own.
+    minimums : list[float], optional
+        The minimum payments the funds have to cover, by default each debt's
+        ``minimum_payment``
+
+    Returns
+    -------
+    StopReason | None
+        Why the plan can never finish, or None if it might
+    """
+    if minimums is None:
+        minimums = [debt.minimum_payment for debt in debts]
+
+    reason = _diverging_reason(debts, monthly_funds, payments, minimums)
+    if reason == StopReason.BELOW_MINIMUMS:
+        return reason
+
+    unfinished = [debt for debt in debts if not debt.is_finished]
+    loans = [debt for debt in unfinished if debt.obligation_type == ObligationType.LOAN]
+    total_balance = sum([debt._balance for debt in loans])
+
+    # Short of the minimums a savings goal can be paid a negative amount, which would let
+    # the loans get more than monthly_funds
+    covers_minimums = monthly_funds >= sum(
+        [minimum for debt, minimum in zip(debts, minimums) if not debt.is_finished]
+    )
+
+    if total_balance > 0 and (covers_minimums or len(loans) == len(unfinished)):
+        lowest_rate = min([debt._monthly_rate() for debt in loans])
+        if monthly_funds <= lowest_rate * total_balance:
+            return StopReason.INTEREST_EXCEEDS_FUNDS
+
+    return reason
+
+
+def _diverging_reason(
+    debts: list[Obligation],
+    monthly_funds: float,
+    payments: list[float] | None = None,
+    minimums: list[float] | None = None,
+) -> StopReason | None:
+    """
+    Why no unfinished debt would ever be paid off by the payment it gets now, or None if one
+    would. Payments only change when a debt is paid off, so such a plan never finishes.
+    ``BELOW_MINIMUMS`` if ``monthly_funds`` also fall short of the minimum payments,
+    otherwise ``NOT_SHRINKING``. ``payments`` and ``minimums`` are as for
+    ``check_feasibility``.
+    """
+    if payments is None:
+        payments = _current_payments(debts, monthly_funds)
+    if minimums is None:
+        minimums = [debt.minimum_payment for debt in debts]
+
+    unfinished = [
+        (debt, payment, minimum)
+        for debt, payment, minimum in zip(debts, payments, minimums)
+        if not debt.is_finished
+    ]
+    if not unfinished or not all(
+        _never_finishes(debt, payment) for debt, payment, _ in unfinished
+    ):
+        return None
+
+    if monthly_funds < sum([minimum for _, _, minimum in unfinished]):
+        return StopReason.BELOW_MINIMUMS
+
+    return StopReason.NOT_SHRINKING
+
+
+def _never_finishes(debt: Obligation, payment: float) -> bool:
+    if debt.obligation_type == ObligationType.SAVINGS:
+        # The cases of months_to_finish, except that negative payments and balances, which
+        # only come from falling short of the minimums, are left to run
+        return (
+            payment == 0
+            and debt._balance < debt.amount
+            and (debt._monthly_rate() == 0 or debt._balance == 0)
+        )
+
+    return debt.months_to_finish(payment) is None
+
+
+def _append_projected_months(
+    result: PaymentPlanResult,
+    debts: list[Obligation],
+    payments: list[float],
+    start_month: int,
+    months: int,
+):
+    """Appends the rows for ``months`` months of constant payments, without finishing any debt."""
+    for k in range(1, months + 1):
+        balances = []
+        debt_total_paid = []
+        for debt, payment in zip(debts, payments):
+            if debt.is_finished:
+                balances.append(debt.get_balance())
+                debt_total_paid.append(debt.get_total_paid())
+            else:
+                balances.append(round(debt._balance_after(payment, k), 2))
+                debt_total_paid.append(round(debt.total_paid + k * payment, 2))
+
+        result.append(
+            start_month + k,
+            balances,
+            debt_total_paid,
+            sum(balances),
+            sum(debt_total_paid),
+        )
+
+
+def compute_payment_plan_events(
+    debts: list[Obligation],
+    monthly_funds: float,
+    history: bool = False,
+    max_months: int = MAX_MONTHS,
+) -> PaymentPlanResult:
+    """
+    Runs the same payment plan as ``compute_payment_plan`` but only simulates the months where
+    a debt is paid off. Between those months every debt gets the same payment, so the plan
+    jumps straight to the next payoff using ``Obligation.months_to_finish`` and only then
+    reallocates the freed up minimum payment.
+
+    Balances come from the closed-form recurrence rather than month by month sums, so they
+    agree with ``compute_payment_plan`` to the cent rather than bit for bit.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority
+    monthly_funds : float
+        The amount available each month for all debts combined
+    history : bool
+        Whether to include a row for every month. By default only the starting month, the
+        months a debt was paid off and the final month are included.
+    max_months : int
+        The longest plan to run
+
+    Returns
+    -------
+    PaymentPlanResult
+        The balances and totals paid for the months described above, and why the plan
+        stopped
+    """
+    result = PaymentPlanResult([debt.name for debt in debts])
+    result.append(
+        0,
+        [debt.get_balance() for debt in debts],
+        [0] * len(debts),
+        _get_total_balance(debts=debts),
+        0,
+    )
+
+    result.stop_reason = check_feasibility(debts, monthly_funds)
+    month = 0
+
+    while result.stop_reason is None and not all([debt.is_finished for debt in debts]):
+        if month > 0:
+            # Payments are the same as at the last check unless a debt was paid off, and a
+            # plan that diverges keeps diverging, so this stops where compute_payment_plan
+            # does
+            result.stop_reason = _diverging_reason(debts, monthly_funds)
+            if result.stop_reason is not None:
+                break
+
+        payments = _current_payments(debts, monthly_funds)
+
+        if any(
+            payment < 0 or debt._balance < 0
+            for debt, payment in zip(debts, payments)
+            if not debt.is_finished
+        ):
+            # Not enough to cover the minimums now or in an earlier month, so fall back to
+            # one month at a time
+            if month >= max_months:
+                result.stop_reason = StopReason.HORIZON
+                break
+
+            months_to_event = 1
+        else:
+            # Some debt is paid off eventually, or the plan would have been stopped
+            months_to_event = min(
+                [
+                    debt.months_to_finish(payment)
+                    for debt, payment in zip(debts, payments)
+                    if not debt.is_finished
+                ],
+                key=lambda months: math.inf if months is None else months,
+            )
+
+            if month + months_to_event > max_months:
+                # Nothing gets paid off before the cap, so there is no event to simulate
+                skipped_months = max_months - month
+
+                if history:
+                    _append_projected_months(
+                        result, debts, payments, month, skipped_months
+                    )
+
+                for debt, payment in zip(debts, payments):
+                    debt.advance_months(payment, skipped_months)
+
+                if not history and skipped_months > 0:
+                    result.append(*_snapshot(debts, max_months))
+                result.stop_reason = StopReason.HORIZON
+                break
+
+            if history:
+                _append_projected_months(
+                    result, debts, payments, month, months_to_event - 1
+                )
+
+            for debt, payment in zip(debts, payments):
+                debt.advance_months(payment, months_to_event - 1)
+
+        _advance_plan_month(debts, monthly_funds)
+        month += months_to_event
+        result.append(*_snapshot(debts, month))
+
+    if result.stop_reason is None:
+        result.stop_reason = StopReason.FINISHED
+
+    return result
+
+
+def run_payment_plan(
+    debts: list[Obligation], monthly_funds: float, max_months: int = MAX_MONTHS
+) -> "pd.DataFrame":
+    """
+    ``compute_payment_plan`` as a DataFrame, with why the plan stopped in
+    ``df.attrs["stop_reason"]``, see ``StopReason``.
+    """
+    return compute_payment_plan(debts, monthly_funds, max_months).to_dataframe()
@@ -0,0 +1,93 @@
+import csv
+import os
+from collections.abc import Callable, Iterable, Iterator
+from typing import TextIO
+
+from budgeter.payment_plan import MonthSnapshot
+
+
+def take_until(
+    snapshots: Iterable[MonthSnapshot], predicate: Callable[[MonthSnapshot], bool]
+) -> Iterator[MonthSnapshot]:
+    """
+    Passes snapshots through until ``predicate`` is true, including the snapshot that made it
+    true, then stops pulling from ``snapshots``.
+
+    For example, ``take_until(iter_payment_plan(debts, 500), lambda s: s.total_balance < 1000)``
+    stops the plan as soon as less than $1000 is owed.
+    """
+    for snapshot in snapshots:
+        yield snapshot
+
+        if predicate(snapshot):
+            return
+
+
+def sample_every(
+    snapshots: Iterable[MonthSnapshot], months: int
+) -> Iterator[MonthSnapshot]:
+    """
+    Passes through every ``months``-th month, plus the final month so the end of the plan is
+    never dropped.
+    """
+    if months < 1:
+        raise ValueError("Must sample at least every month.")
+
+    last_snapshot = None
+    for snapshot in snapshots:
+        last_snapshot = snapshot
+
+        if snapshot.month % months == 0:
+            last_snapshot = None
+            yield snapshot
+
+    if last_snapshot is not None:
+        yield last_snapshot
+
+
+def write_csv(
+    snapshots: Iterable[MonthSnapshot],
+    file: str | os.PathLike | TextIO,
+    debt_names: list[str],
+) -> int:
+    """
+    Writes snapshots to a CSV file as they arrive, using the same columns as
+    ``run_payment_plan``.
+
+    Parameters
+    ----------
+    snapshots : Iterable[MonthSnapshot]
+        The months to write
+    file : str | os.PathLike | TextIO
+        A path to write to, or an open text file
+    debt_names : list[str]
+        The names of the debts, in the same order as the plan
+
+    Returns
+    -------
+    int
+        The number of months written
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "w", newline="") as f:
+            return write_csv(snapshots, f, debt_names)
+
+    writer = csv.writer(file)
+    writer.writerow(
+        ["month"]
+        + [f"{name}_balance" for name in debt_names]
+        + [f"{name}_total_paid" for name in debt_names]
+        + ["total_balance", "total_paid"]
+    )
+
+    rows_written = 0
+    for snapshot in snapshots:
+        writer.writerow(
+            [snapshot.month]
+            + list(snapshot.balances)
+            + list(snapshot.debt_total_paid)
+            + [snapshot.total_balance, snapshot.total_paid]
+        )
+        rows_written += 1
+
+    return rows_written
@@ -0,0 +1,115 @@
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+PHASES = (
+    "allocation",
+    "advance_month",
+    "aggregation",
+    "dataframe",
+    "scenarios",
+    "figures",
+)
+COUNTERS = ("months_simulated", "debts_finished", "scenarios_run")
+
+# Each thread and asyncio task sees its own profile, so concurrent Streamlit sessions never
+# record into each other's
+_active: "ContextVar[Profile | None]" = ContextVar("profile", default=None)
+
+
+class Profile:
+    """
+    Time spent per phase, how many times each phase ran, and event counters. Phases may nest,
+    e.g. "advance_month" is part of "allocation".
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def add_time(self, phase: str, seconds: float, calls: int = 1):
+        self.seconds[phase] += seconds
+        self.calls[phase] += calls
+
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] += amount
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def rows(self) -> list[dict]:
+        """One row per phase and counter, known ones first, for display as a table."""
+        names = list(PHASES) + sorted(set(self.seconds) - set(PHASES))
+        rows = [
+            {
+                "name": name,
+                "seconds": self.seconds[name],
+                "calls": self.calls[name],
+            }
+            for name in names
+            if name in self.seconds
+        ]
+
+        names = list(COUNTERS) + sorted(set(self.counters) - set(COUNTERS))
+        rows += [
+            {"name": name, "seconds": None, "calls": self.counters[name]}
+            for name in names
+            if name in self.counters
+        ]
+
+        return rows
+
+    def report(self) -> str:
+        lines = []
+        for row in self.rows():
+            if row["seconds"] is None:
+                lines.append(f"{row['name']:<18} {row['calls']:>12,}")
+            else:
+                lines.append(
+                    f"{row['name']:<18} {row['calls']:>12,} calls {row['seconds']:>10.4f} s"
+                )
+
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    """
+    Records timings and counters for everything run inside the with block, e.g.
+
+        with profile() as prof:
+            run_payment_plan(debts, 500)
+
+        print(prof.report())
+
+    Instrumented code only checks whether a profile is being recorded, so leaving profiling
+    off costs one check per month or per call. Only code run in the same thread or asyncio
+    task is recorded, so plans run in worker processes by ``budgeter.sweep`` are only timed as
+    a whole.
+    """
+    profile = Profile()
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Times a block as ``name`` if a profile is being recorded. Too slow for per-month code."""
+    active = _active.get()
+    if active is None:
+        yield
+        return
+
+    with active.phase(name):
+        yield
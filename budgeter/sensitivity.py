@@ -0,0 +1,216 @@
+"""
+How a payment plan's total paid and length change with each of its inputs, found in one
+pass over the plan by carrying derivatives through the same recurrences as
+``Obligation.advance_month`` (forward-mode differentiation), instead of re-running the plan
+once per input.
+
+The months a plan takes are a whole number, so they are measured as
+``months - left over / monthly_funds``, i.e. part of the last month counts for as much of
+that month's funds as were used.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import (
+    MAX_MONTHS,
+    _advance_plan_month,
+    _diverging_reason,
+    _get_total_paid,
+    check_feasibility,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Per debt, in the order they appear in a report
+PARAMETERS = ("amount", "interest_rate", "minimum_payment")
+
+
+@dataclass
+class SensitivityReport:
+    """
+    The derivatives of a payment plan's total paid and months taken with respect to every
+    debt's ``PARAMETERS`` and the monthly funds, one row per input. Rates are per percentage
+    point of APR, everything else is per dollar. ``d_months`` is NaN if the plan never
+    finishes.
+    """
+
+    total_paid: float
+    months: int
+    is_finished: bool
+    debt: list[str | None]
+    parameter: list[str]
+    value: np.ndarray
+    d_total_paid: np.ndarray
+    d_months: np.ndarray
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        # pandas is slow to import and only needed here, so it is loaded on first use
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "debt": self.debt,
+                "parameter": self.parameter,
+                "value": self.value,
+                "d_total_paid": self.d_total_paid,
+                "d_months": self.d_months,
+            }
+        )
+
+
+def compute_sensitivity(
+    debts: list[Obligation], monthly_funds: float, max_months: int = MAX_MONTHS
+) -> SensitivityReport:
+    """
+    Runs the same payment plan as ``compute_payment_plan`` and works out how it responds to
+    a small change in each input. Exact wherever no debt's payoff month changes, since the
+    plan is piecewise smooth in its inputs.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts to pay off, in order of priority. Fresh copies are used so they are left
+        as they were, and any progress already made is ignored.
+    monthly_funds : float
+        The amount available each month for all debts combined
+    max_months : int
+        The longest plan to run
+
+    Returns
+    -------
+    SensitivityReport
+        The derivatives with respect to every debt's amount, interest rate and minimum
+        payment, then monthly_funds
+    """
+    debts = [Obligation(**debt.to_spec()) for debt in debts]
+    num_debts = len(debts)
+    num_inputs = len(PARAMETERS) * num_debts + 1
+    rows = np.arange(num_debts)
+
+    # Derivatives of each debt's inputs and of monthly_funds with respect to every input
+    d_amount = np.zeros((num_debts, num_inputs))
+    d_amount[rows, len(PARAMETERS) * rows] = 1
+    d_monthly_rate = np.zeros((num_debts, num_inputs))
+    d_monthly_rate[rows, len(PARAMETERS) * rows + 1] = 1 / 100 / 12
+    d_minimum = np.zeros((num_debts, num_inputs))
+    d_minimum[rows, len(PARAMETERS) * rows + 2] = 1
+    d_funds = np.zeros(num_inputs)
+    d_funds[-1] = 1
+
+    is_loan = np.array([debt.obligation_type == ObligationType.LOAN for debt in debts])
+    monthly_rates = np.array([debt._monthly_rate() for debt in debts])
+
+    d_balance = np.where(is_loan[:, None], d_amount, 0)
+    d_total_paid = np.zeros((num_debts, num_inputs))
+    d_leftover = np.zeros(num_inputs)
+    leftover = 0.0
+
+    # Plans that can never finish stop where compute_payment_plan stops them
+    is_feasible = check_feasibility(debts, monthly_funds) is None
+
+    month = 0
+    while (
+        is_feasible
+        and not all([debt.is_finished for debt in debts])
+        and month < max_months
+    ):
+        balances = [debt._balance for debt in debts]
+        active = np.array([not debt.is_finished for debt in debts])
+
+        _advance_plan_month(debts, monthly_funds)
+        month += 1
+
+        d_interest = d_balance * monthly_rates[:, None] + (
+            np.array(balances)[:, None] * d_monthly_rate
+        )
+        d_extra = d_funds - d_minimum[active].sum(axis=0)
+
+        finished = active & np.array([debt.is_finished for debt in debts])
+        if not finished.any():
+            # Every debt gets its minimum and the first one also gets the rest
+            d_payment = d_minimum.copy()
+            d_payment[np.argmax(active)] += d_extra
+            d_payment[~active] = 0
+
+            signs = np.where(is_loan, -1, 1)[active, None]
+            d_balance[active] += d_interest[active] + signs * d_payment[active]
+            d_total_paid += d_payment
+            continue
+
+        # Money left over when a debt finishes rolls into the next one, so follow the same
+        # order as _advance_plan_month
+        extra = monthly_funds - sum(
+            [
+                debt.minimum_payment
+                for debt, is_active in zip(debts, active)
+                if is_active
+            ]
+        )
+        for i in np.flatnonzero(active):
+            debt = debts[i]
+            payment = debt.minimum_payment + extra
+            d_payment = d_minimum[i] + d_extra
+
+            if not finished[i]:
+                sign = -1 if is_loan[i] else 1
+                d_balance[i] += d_interest[i] + sign * d_payment
+                d_total_paid[i] += d_payment
+                extra = 0
+                d_extra = np.zeros(num_inputs)
+                continue
+
+            balance = balances[i] + balances[i] * monthly_rates[i]
+            d_balance_with_interest = d_balance[i] + d_interest[i]
+
+            if is_loan[i]:
+                amount_paid = balance + (debt.fixed_costs or 0)
+                d_amount_paid = d_balance_with_interest
+                d_balance[i] = 0
+            elif balance >= debt.amount:
+                # Interest alone reached the goal
+                amount_paid = 0
+                d_amount_paid = np.zeros(num_inputs)
+                d_balance[i] = d_balance_with_interest
+            else:
+                amount_paid = debt.amount - balance
+                d_amount_paid = d_amount[i] - d_balance_with_interest
+                d_balance[i] = d_amount[i]
+
+            d_total_paid[i] += d_amount_paid
+            extra = payment - amount_paid
+            d_extra = d_payment - d_amount_paid
+
+        leftover = extra
+        d_leftover = d_extra
+        is_feasible = _diverging_reason(debts, monthly_funds) is None
+
+    is_finished = all([debt.is_finished for debt in debts])
+    if is_finished and monthly_funds > 0:
+        d_months = -d_leftover / monthly_funds + leftover * d_funds / monthly_funds**2
+    else:
+        d_months = np.full(num_inputs, np.nan)
+
+    return SensitivityReport(
+        total_paid=_get_total_paid(debts=debts),
+        months=month,
+        is_finished=is_finished,
+        debt=[debt.name for debt in debts for _ in PARAMETERS] + [None],
+        parameter=list(PARAMETERS) * num_debts + ["monthly_funds"],
+        value=np.array(
+            [
+                getattr(debt, parameter) or 0
+                for debt in debts
+                for parameter in PARAMETERS
+            ]
+            + [monthly_funds],
+            dtype=float,
+        ),
+        d_total_paid=d_total_paid.sum(axis=0),
+        d_months=d_months,
+    )
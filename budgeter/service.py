@@ -0,0 +1,349 @@
+"""
+A local asyncio service that runs payment plans for other tools, e.g.
+
+    python -m budgeter.service --port 8765
+
+Requests and responses are single lines of JSON over TCP or a Unix socket:
+
+    {"id": 1, "debts": [{"name": "car", "amount": 9000, "interest_rate": 6.5,
+     "minimum_payment": 250}], "monthly_funds": 600}
+    {"id": 1, "result": {"months": 16, "is_finished": true, "total_paid": 9412.47, ...}}
+
+Debts take the ``Obligation`` arguments, with ``obligation_type`` given by name. Identical
+requests that arrive while one is already being worked on share its result, and different
+requests arriving within ``batch_window`` seconds of each other are run together as one
+``run_payment_plan_batch`` call in a pool of processes, so the event loop never blocks on
+a simulation. ``ScenarioClient`` is a matching client.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+from concurrent.futures import Executor
+from dataclasses import dataclass
+
+import numpy as np
+
+from budgeter.batch import portfolio_arrays, run_payment_plan_batch
+from budgeter.cache import scenario_key
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.sweep import debt_specs, process_pool
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# How long the first request of a batch waits for others to join it
+DEFAULT_BATCH_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 256
+
+# Requests are single lines, so this caps the size of a request
+MAX_LINE_BYTES = 1024 * 1024
+
+
+def run_scenario_batch(scenarios: list[tuple[list[dict], float]]) -> list[dict]:
+    """
+    Runs many scenarios as one batch and summarizes each, see ``ScenarioService``. Debts that
+    are never paid off have a ``payoff_month`` of None, and ``stop_reason`` is the value of
+    a ``StopReason``.
+    """
+    portfolios = [[Obligation(**spec) for spec in specs] for specs, _ in scenarios]
+    monthly_funds = np.array([[monthly_funds] for _, monthly_funds in scenarios])
+
+    result = run_payment_plan_batch(
+        **portfolio_arrays(portfolios), monthly_funds=monthly_funds
+    )
+
+    summaries = []
+    for i, debts in enumerate(portfolios):
+        finish_month = result.finish_month[i, 0, : len(debts)].tolist()
+        summaries.append(
+            {
+                "months": int(result.months[i, 0]),
+                "is_finished": bool(result.is_finished[i, 0]),
+                "total_paid": round(float(result.total_paid[i, 0].sum()), 2),
+                "total_interest": round(float(result.total_interest[i, 0].sum()), 2),
+                "total_costs": round(float(result.total_costs[i, 0].sum()), 2),
+                "payoff_month": [
+                    None if month < 0 else month for month in finish_month
+                ],
+                "stop_reason": result.stop_reason[i, 0].value,
+            }
+        )
+
+    return summaries
+
+
+def parse_debts(debts: list[dict]) -> list[dict]:
+    """Checks debts from a request and returns their specs, see ``debt_specs``."""
+    if not isinstance(debts, list) or not debts:
+        raise ValueError("A request must have a list of debts.")
+
+    obligations = []
+    for i, debt in enumerate(debts):
+        if not isinstance(debt, dict):
+            raise ValueError("Every debt must be an object.")
+
+        debt = {"name": f"debt_{i}", **debt}
+        if isinstance(debt.get("obligation_type"), str):
+            debt["obligation_type"] = ObligationType[debt["obligation_type"].upper()]
+
+        obligations.append(Obligation(**debt))
+
+    return debt_specs(obligations)
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    coalesced: int = 0
+    batches: int = 0
+    scenarios_run: int = 0
+
+
+class ScenarioService:
+    """
+    Evaluates payment plans, sharing work between requests that arrive together.
+
+    Parameters
+    ----------
+    executor : Executor, optional
+        Where batches are run, by default a process pool with one process per CPU
+    batch_window : float
+        Seconds the first request of a batch waits for others to join it
+    max_batch : int
+        A batch is started straight away once it has this many scenarios
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ):
+        if executor is None:
+            executor = process_pool()
+
+        self.executor = executor
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.stats = ServiceStats()
+
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._pending: list[tuple[str, list[dict], float]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._batches: set[asyncio.Task] = set()
+
+    async def evaluate(self, specs: list[dict], monthly_funds: float) -> dict:
+        """Summarizes the payment plan for ``specs``, see ``run_scenario_batch``."""
+        self.stats.requests += 1
+        key = scenario_key(specs, monthly_funds)
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._in_flight[key] = future
+            self._pending.append((key, specs, monthly_funds))
+
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        # A caller giving up must not cancel the result other callers are waiting for
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, list[dict], float]]):
+        self.stats.batches += 1
+        self.stats.scenarios_run += len(batch)
+
+        loop = asyncio.get_running_loop()
+        scenarios = [(specs, monthly_funds) for _, specs, monthly_funds in batch]
+        try:
+            summaries = await loop.run_in_executor(
+                self.executor, run_scenario_batch, scenarios
+            )
+        except Exception as error:
+            for key, _, _ in batch:
+                self._in_flight.pop(key).set_exception(error)
+        else:
+            for (key, _, _), summary in zip(batch, summaries):
+                self._in_flight.pop(key).set_result(summary)
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            specs = parse_debts(request.get("debts"))
+            response = {
+                "id": request_id,
+                "result": await self.evaluate(specs, float(request["monthly_funds"])),
+            }
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            response = {"id": request_id, "error": str(error)}
+        except Exception as error:
+            # e.g. a worker process dying, which must not leave the client waiting forever
+            response = {"id": request_id, "error": f"The plan failed to run: {error!r}"}
+
+        writer.write(json.dumps(response).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Answers every request on a connection, in whatever order they finish."""
+        responses = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._respond(line, writer))
+                responses.add(task)
+                task.add_done_callback(responses.discard)
+
+            await asyncio.gather(*responses)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        path: str | None = None,
+    ) -> asyncio.Server:
+        """Starts listening on ``host:port``, or on a Unix socket at ``path`` if given."""
+        if path is not None:
+            return await asyncio.start_unix_server(
+                self.handle_connection, path=path, limit=MAX_LINE_BYTES
+            )
+
+        return await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE_BYTES
+        )
+
+
+class ScenarioClient:
+    """
+    Sends requests to a ``ScenarioService`` over one connection. Many requests can be waited
+    on at once and are matched to their responses by id.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._waiting: dict[int, asyncio.Future] = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(
+        cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, path: str | None = None
+    ) -> "ScenarioClient":
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(
+                path, limit=MAX_LINE_BYTES
+            )
+        else:
+            reader, writer = await asyncio.open_connection(
+                host, port, limit=MAX_LINE_BYTES
+            )
+
+        return cls(reader, writer)
+
+    async def _receive(self):
+        try:
+            while line := await self._reader.readline():
+                response = json.loads(line)
+                future = self._waiting.pop(response["id"], None)
+                if future is None or future.done():
+                    continue
+
+                if "error" in response:
+                    future.set_exception(ValueError(response["error"]))
+                else:
+                    future.set_result(response["result"])
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("The service disconnected."))
+
+    async def evaluate(self, debts: list[dict], monthly_funds: float) -> dict:
+        """
+        Summarizes the payment plan for ``debts``, given as ``Obligation`` arguments or specs
+        from ``debt_specs``.
+        """
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+
+        request = {"id": request_id, "debts": debts, "monthly_funds": monthly_funds}
+        line = json.dumps(request, default=lambda value: value.name)
+        self._writer.write(line.encode("utf-8") + b"\n")
+        await self._writer.drain()
+
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+
+async def _serve(args: argparse.Namespace):
+    service = ScenarioService(
+        executor=process_pool(args.workers),
+        batch_window=args.batch_window_ms / 1000,
+        max_batch=args.max_batch,
+    )
+    server = await service.start(args.host, args.port, args.unix)
+
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Serving payment plans on {where}", file=sys.stderr, flush=True)
+
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Serves payment plans over JSON lines."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Listen on a Unix socket at this path instead")
+    parser.add_argument(
+        "--workers", type=int, help="Processes to use, defaults to the number of CPUs"
+    )
+    parser.add_argument(
+        "--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW * 1000
+    )
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
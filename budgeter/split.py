@@ -0,0 +1,280 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from budgeter.batch import _advance_loans, _advance_savings, _BatchState
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import MAX_MONTHS
+
+LOAN = 0
+SAVINGS = 1
+
+# How many splits each bracket is probed at per round
+BRACKET_POINTS = 16
+
+
+@dataclass
+class SplitOutcome:
+    """
+    Result of sending ``split`` of the monthly funds to a loan and the rest to a savings goal.
+    Months are -1 when that obligation did not finish.
+    """
+
+    split: float
+    savings_ready_month: int
+    loan_months: int
+    loan_total_paid: float
+
+
+def simulate_splits(
+    loan: Obligation,
+    savings: Obligation,
+    monthly_funds: float,
+    splits,
+    max_months: int = MAX_MONTHS,
+) -> dict[str, np.ndarray]:
+    """
+    Runs the loan and savings split from ``planning.perform_ratio_experiment`` for many splits
+    at once. Each month the loan gets ``split`` of the funds plus whatever the savings goal
+    handed back the month before, and the savings goal gets the rest plus whatever the loan
+    handed back.
+
+    Parameters
+    ----------
+    loan : Obligation
+        A fresh LOAN obligation
+    savings : Obligation
+        A fresh SAVINGS obligation
+    monthly_funds : float
+        The amount available each month for both combined
+    splits : array_like
+        Fractions of ``monthly_funds`` that go to the loan
+    max_months : int
+        The longest plan to simulate
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        "split", "savings_ready_month", "loan_months" and "loan_total_paid", one entry per split
+    """
+    if loan.obligation_type != ObligationType.LOAN:
+        raise ValueError("The first obligation must be a loan.")
+    if savings.obligation_type != ObligationType.SAVINGS:
+        raise ValueError("The second obligation must be a savings goal.")
+
+    splits = np.atleast_1d(np.asarray(splits, dtype=float))
+    lanes = splits.size
+
+    def per_lane(loan_value, savings_value):
+        return np.tile([loan_value, savings_value], (lanes, 1))
+
+    state = _BatchState(
+        rows=np.arange(lanes),
+        amounts=per_lane(loan.amount, savings.amount),
+        monthly_rates=per_lane(loan._monthly_rate(), savings._monthly_rate()),
+        fixed_costs=per_lane(loan.fixed_costs or 0, 0),
+        minimums=per_lane(0, 0),
+        savings=per_lane(False, True),
+    )
+    state.balance = per_lane(loan._balance, savings._balance).astype(float)
+    state.total_interest = np.zeros((lanes, 2))
+    state.total_costs = np.zeros((lanes, 2))
+    state.total_paid = np.zeros((lanes, 2))
+    state.is_finished = per_lane(False, False)
+    state.finish_month = per_lane(-1, -1)
+
+    loan_carry_over = np.zeros(lanes)
+    savings_carry_over = np.zeros(lanes)
+
+    for month in range(1, max_months + 1):
+        running = ~state.is_finished.all(axis=1)
+        if not running.any():
+            break
+
+        loan_payment = monthly_funds * splits + savings_carry_over
+        savings_payment = monthly_funds * (1 - splits) + loan_carry_over
+
+        loan_live = running & ~state.is_finished[:, LOAN]
+        loan_finished, loan_leftover = _advance_loans(
+            state, LOAN, loan_payment, loan_live
+        )
+        loan_carry_over = np.where(loan_live, loan_leftover, loan_payment)
+
+        # A finished goal keeps earning interest and hands back the whole payment
+        savings_done = running & state.is_finished[:, SAVINGS]
+        interest_amount = state.balance[:, SAVINGS] * state.monthly_rates[:, SAVINGS]
+        state.total_interest[:, SAVINGS] += np.where(savings_done, interest_amount, 0)
+        state.balance[:, SAVINGS] += np.where(savings_done, interest_amount, 0)
+
+        savings_live = running & ~state.is_finished[:, SAVINGS]
+        savings_finished, savings_leftover = _advance_savings(
+            state, SAVINGS, savings_payment, savings_live
+        )
+        savings_carry_over = np.where(savings_live, savings_leftover, savings_payment)
+
+        for col, finished in ((LOAN, loan_finished), (SAVINGS, savings_finished)):
+            state.is_finished[:, col] |= finished
+            state.finish_month[:, col] = np.where(
+                finished, month, state.finish_month[:, col]
+            )
+
+    return {
+        "split": splits,
+        "savings_ready_month": state.finish_month[:, SAVINGS],
+        "loan_months": state.finish_month[:, LOAN],
+        "loan_total_paid": state.total_paid[:, LOAN],
+    }
+
+
+def _outcomes(results: dict[str, np.ndarray]) -> list[SplitOutcome]:
+    return [
+        SplitOutcome(
+            float(split), int(ready_month), int(loan_months), float(loan_total_paid)
+        )
+        for split, ready_month, loan_months, loan_total_paid in zip(
+            results["split"],
+            results["savings_ready_month"],
+            results["loan_months"],
+            results["loan_total_paid"],
+        )
+    ]
+
+
+def _is_ready(ready_month: np.ndarray, deadline) -> np.ndarray:
+    return (ready_month >= 0) & (ready_month <= deadline)
+
+
+def _refine(
+    loan: Obligation,
+    savings: Obligation,
+    monthly_funds: float,
+    deadlines: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    tolerance: float,
+) -> np.ndarray:
+    """
+    Narrows every [low, high] bracket, where ``low`` meets its deadline and ``high`` does not,
+    down to ``tolerance``. All brackets are probed together in one simulation per round.
+    """
+    low = low.copy()
+    high = high.copy()
+    steps = np.linspace(0, 1, BRACKET_POINTS + 2)[1:-1]
+
+    while np.any(high - low > tolerance):
+        probes = low[:, None] + (high - low)[:, None] * steps
+        ready_month = simulate_splits(loan, savings, monthly_funds, probes.ravel())[
+            "savings_ready_month"
+        ].reshape(probes.shape)
+        ready = _is_ready(ready_month, deadlines[:, None])
+
+        # Take the last probe that is still ready, assuming readiness only flips once inside
+        # a bracket this narrow
+        last_ready = np.where(
+            ready.any(axis=1),
+            BRACKET_POINTS - 1 - np.argmax(ready[:, ::-1], axis=1),
+            -1,
+        )
+        rows = np.arange(len(low))
+        new_low = np.where(
+            last_ready >= 0, probes[rows, np.maximum(last_ready, 0)], low
+        )
+        new_high = np.where(
+            last_ready < BRACKET_POINTS - 1,
+            probes[rows, np.minimum(last_ready + 1, BRACKET_POINTS - 1)],
+            high,
+        )
+        low, high = new_low, new_high
+
+    return low
+
+
+def split_frontier(
+    loan: Obligation,
+    savings: Obligation,
+    monthly_funds: float,
+    grid_points: int = 1001,
+    tolerance: float = 1e-6,
+) -> list[SplitOutcome]:
+    """
+    Finds every trade-off between how soon the savings goal is ready and how much the loan
+    costs. For each month the goal can be ready by, the split that sends the most to the loan
+    while still being ready by then is found with a bracketed search, and months that do not
+    lower the loan cost are dropped.
+
+    Parameters
+    ----------
+    loan : Obligation
+        A fresh LOAN obligation
+    savings : Obligation
+        A fresh SAVINGS obligation
+    monthly_funds : float
+        The amount available each month for both combined
+    grid_points : int
+        How many evenly spaced splits to start the search from
+    tolerance : float
+        How precisely to find each split
+
+    Returns
+    -------
+    list[SplitOutcome]
+        The frontier, ordered from the earliest savings-ready month to the latest
+    """
+    grid = np.linspace(0, 1, grid_points)
+    ready_month = simulate_splits(loan, savings, monthly_funds, grid)[
+        "savings_ready_month"
+    ]
+
+    deadlines = np.unique(ready_month[ready_month >= 0])
+    if deadlines.size == 0:
+        return []
+
+    # Bracket each deadline between the last grid split that meets it and the one after
+    ready = _is_ready(ready_month[None, :], deadlines[:, None])
+    last_ready = grid_points - 1 - np.argmax(ready[:, ::-1], axis=1)
+    low = grid[last_ready]
+    high = grid[np.minimum(last_ready + 1, grid_points - 1)]
+
+    # A deadline the whole grid meets is already at the top of the range
+    bracketed = last_ready < grid_points - 1
+    splits = low.copy()
+    splits[bracketed] = _refine(
+        loan,
+        savings,
+        monthly_funds,
+        deadlines[bracketed],
+        low[bracketed],
+        high[bracketed],
+        tolerance,
+    )
+
+    frontier = []
+    for outcome in _outcomes(simulate_splits(loan, savings, monthly_funds, splits)):
+        if outcome.loan_months < 0:
+            continue
+        if frontier and outcome.loan_total_paid >= frontier[-1].loan_total_paid:
+            continue
+        frontier.append(outcome)
+
+    return frontier
+
+
+def optimize_split(
+    loan: Obligation,
+    savings: Obligation,
+    monthly_funds: float,
+    deadline: int,
+    grid_points: int = 1001,
+    tolerance: float = 1e-6,
+) -> SplitOutcome | None:
+    """
+    Finds the split that costs the least on the loan while still having the savings goal ready
+    by month ``deadline``. Returns None if no split makes the deadline.
+    """
+    best = None
+    for outcome in split_frontier(loan, savings, monthly_funds, grid_points, tolerance):
+        if outcome.savings_ready_month <= deadline:
+            best = outcome
+
+    return best
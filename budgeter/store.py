@@ -0,0 +1,312 @@
+import io
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from budgeter.cache import CacheStats
+from budgeter.payment_plan import PaymentPlanResult, PlanSummary, StopReason
+
+# Bump whenever a change to the engine changes its results, so results stored by older
+# versions are no longer used
+ENGINE_VERSION = 2
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Seconds writers wait for each other before failing
+WRITE_TIMEOUT = 30
+
+# Reads only mark a result as used once this many seconds have passed since the last time,
+# and give up rather than wait more than TOUCH_TIMEOUT seconds for another writer, since
+# eviction only needs a rough order
+TOUCH_INTERVAL = 60
+TOUCH_TIMEOUT = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT NOT NULL,
+    engine_version INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (key, engine_version)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+def default_path() -> Path:
+    """``$BUDGETER_CACHE_DIR/results.sqlite3``, by default under ``~/.cache/budgeter``."""
+    cache_dir = os.environ.get("BUDGETER_CACHE_DIR")
+    if cache_dir is None:
+        cache_dir = Path.home() / ".cache" / "budgeter"
+
+    return Path(cache_dir) / "results.sqlite3"
+
+
+def _encode(value: PaymentPlanResult | PlanSummary) -> bytes:
+    if isinstance(value, PaymentPlanResult):
+        arrays = {
+            "kind": np.array("result"),
+            "debt_names": np.array(value.debt_names, dtype=str),
+            "month": value.month,
+            "balances": value.balances,
+            "debt_total_paid": value.debt_total_paid,
+            "total_balance": value.total_balance,
+            "total_paid": value.total_paid,
+        }
+    elif isinstance(value, PlanSummary):
+        arrays = {
+            "kind": np.array("summary"),
+            "months": np.array(value.months),
+            "is_finished": np.array(value.is_finished),
+            "totals": np.array(
+                [value.total_paid, value.total_interest, value.total_costs]
+            ),
+            # -1 for debts that were never paid off
+            "payoff_month": np.array(
+                [-1 if month is None else month for month in value.payoff_month],
+                dtype=int,
+            ),
+        }
+        if value.total_balance_by_month is not None:
+            arrays["total_balance_by_month"] = value.total_balance_by_month
+            arrays["total_paid_by_month"] = value.total_paid_by_month
+    else:
+        raise TypeError(f"Can not store values of type {type(value).__name__}.")
+
+    if value.stop_reason is not None:
+        arrays["stop_reason"] = np.array(value.stop_reason.value)
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _decode(data: bytes) -> PaymentPlanResult | PlanSummary:
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        stop_reason = None
+        if "stop_reason" in arrays:
+            stop_reason = StopReason(str(arrays["stop_reason"]))
+
+        if arrays["kind"] == "result":
+            return PaymentPlanResult.from_arrays(
+                arrays["debt_names"].tolist(),
+                arrays["month"],
+                arrays["balances"],
+                arrays["debt_total_paid"],
+                arrays["total_balance"],
+                arrays["total_paid"],
+                stop_reason=stop_reason,
+            )
+
+        total_paid, total_interest, total_costs = arrays["totals"].tolist()
+        summary = PlanSummary(
+            months=int(arrays["months"]),
+            is_finished=bool(arrays["is_finished"]),
+            total_paid=total_paid,
+            total_interest=total_interest,
+            total_costs=total_costs,
+            payoff_month=tuple(
+                [
+                    None if month < 0 else month
+                    for month in arrays["payoff_month"].tolist()
+                ]
+            ),
+            stop_reason=stop_reason,
+        )
+        if "total_balance_by_month" in arrays:
+            summary.total_balance_by_month = arrays["total_balance_by_month"]
+            summary.total_paid_by_month = arrays["total_paid_by_month"]
+
+        return summary
+
+
+class ResultStore:
+    """
+    Payment plan results kept on disk in SQLite, so they outlive the process and are shared
+    with every other process using the same file. Results are stored compressed, keyed by
+    ``scenario_key`` and ``ENGINE_VERSION``, and the least recently used are evicted once the
+    store grows past ``max_bytes``. A read only marks a result as used if it has not been
+    for ``TOUCH_INTERVAL`` seconds, so most reads never write.
+
+    Has the same ``get``/``put`` interface as ``ResultCache``, so it can be passed as the
+    ``cache`` of ``budgeter.sweep.run_scenarios`` or put behind one with
+    ``ResultCache(store=...)``. Safe to share between threads and processes: the database is
+    opened in WAL mode so readers never wait on writers, and every thread gets its own
+    connection.
+
+    Parameters
+    ----------
+    path : str | Path, optional
+        The database file, by default ``default_path()``. Its directory is created if needed.
+    max_bytes : int
+        Least recently used results are evicted once the stored results take more than this
+    engine_version : int
+        Only results stored with this version are returned
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        engine_version: int = ENGINE_VERSION,
+    ):
+        if max_bytes < 0:
+            raise ValueError("The store size must be positive.")
+
+        self.path = Path(path) if path is not None else default_path()
+        self.max_bytes = max_bytes
+        self.engine_version = engine_version
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Writers wait for each other for up to the timeout rather than failing
+            connection = sqlite3.connect(
+                self.path, timeout=WRITE_TIMEOUT, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+
+        return connection
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __contains__(self, key: str):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT 1 FROM results WHERE key = ? AND engine_version = ?",
+                (key, self.engine_version),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def get(self, key: str, default=None):
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT data, last_used FROM results WHERE key = ? AND engine_version = ?",
+            (key, self.engine_version),
+        ).fetchone()
+
+        with self._stats_lock:
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        if row is None:
+            return default
+
+        data, last_used = row
+        now = time.time()
+        if now - last_used >= TOUCH_INTERVAL:
+            self._touch(connection, key, now)
+
+        return _decode(data)
+
+    def _touch(self, connection: sqlite3.Connection, key: str, now: float):
+        """Marks ``key`` as used at ``now``, unless another connection is busy writing."""
+        connection.execute(f"PRAGMA busy_timeout = {int(TOUCH_TIMEOUT * 1000)}")
+        try:
+            connection.execute(
+                "UPDATE results SET last_used = ? WHERE key = ? AND engine_version = ?",
+                (now, key, self.engine_version),
+            )
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute(f"PRAGMA busy_timeout = {WRITE_TIMEOUT * 1000}")
+
+    def put(self, key: str, value: PaymentPlanResult | PlanSummary):
+        data = _encode(value)
+
+        # Something bigger than the whole store would only evict everything else
+        if len(data) > self.max_bytes:
+            return
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, self.engine_version, data, len(data), time.time()),
+            )
+            evicted = self._evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        with self._stats_lock:
+            self._evictions += evicted
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        """Deletes results from other engine versions first, then the least recently used."""
+        size_bytes = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+        if size_bytes <= self.max_bytes:
+            return 0
+
+        rows = connection.execute(
+            "SELECT key, engine_version, size FROM results "
+            "ORDER BY engine_version = ?, last_used",
+            (self.engine_version,),
+        ).fetchall()
+
+        evicted = []
+        for key, engine_version, size in rows:
+            if size_bytes <= self.max_bytes:
+                break
+
+            evicted.append((key, engine_version))
+            size_bytes -= size
+
+        connection.executemany(
+            "DELETE FROM results WHERE key = ? AND engine_version = ?", evicted
+        )
+        return len(evicted)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM results")
+
+    def stats(self) -> CacheStats:
+        entries, size_bytes = (
+            self._connection()
+            .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results")
+            .fetchone()
+        )
+
+        with self._stats_lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=entries,
+                size_bytes=size_bytes,
+                max_bytes=self.max_bytes,
+            )
+
+    def close(self):
+        """Closes this thread's connection. Other threads' connections close with them."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
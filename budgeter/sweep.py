@@ -0,0 +1,222 @@
+import math
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from budgeter import profiling
+from budgeter.cache import ResultCache, scenario_key
+from budgeter.obligation import Obligation
+from budgeter.payment_plan import (
+    MAX_MONTHS,
+    PaymentPlanResult,
+    PlanSummary,
+    compute_payment_plan,
+    summarize_payment_plan,
+)
+
+# Below this many scenarios the cost of shipping work to other processes outweighs the gain
+MIN_PARALLEL_SCENARIOS = 8
+
+_executor: ProcessPoolExecutor | None = None
+_executor_workers = 0
+
+
+def debt_specs(debts: list[Obligation]) -> list[dict]:
+    return [debt.to_spec() for debt in debts]
+
+
+def _run_scenario(
+    scenario: tuple[list[dict], float], max_months: int = MAX_MONTHS
+) -> PaymentPlanResult:
+    specs, monthly_funds = scenario
+    debts = [Obligation(**spec) for spec in specs]
+
+    return compute_payment_plan(debts, monthly_funds, max_months=max_months)
+
+
+def _summarize_scenario(
+    scenario: tuple[list[dict], float],
+    totals: bool = False,
+    max_months: int = MAX_MONTHS,
+) -> PlanSummary:
+    specs, monthly_funds = scenario
+    debts = [Obligation(**spec) for spec in specs]
+
+    return summarize_payment_plan(
+        debts, monthly_funds, totals=totals, max_months=max_months
+    )
+
+
+def _horizon_kind(kind: str, max_months: int) -> str:
+    # Plans cut off at a different horizon must not share a key
+    if max_months != MAX_MONTHS:
+        kind += f"max_months={max_months}:"
+
+    return kind
+
+
+def process_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    A process pool for running scenarios. Workers are started from a fork server, since
+    forking the threaded app or service can deadlock on locks held by other threads, and
+    forked workers would hold on to copies of the service's client sockets and keep those
+    connections open after the service closes them.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    """Keeps one pool alive between calls so workers are only started once."""
+    global _executor, _executor_workers
+
+    if _executor is None or _executor_workers != max_workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+
+        _executor = process_pool(max_workers)
+        _executor_workers = max_workers
+
+    return _executor
+
+
+def run_scenarios(
+    scenarios: list[tuple[list[dict], float]],
+    max_workers: int | None = None,
+    min_parallel: int = MIN_PARALLEL_SCENARIOS,
+    cache: ResultCache | None = None,
+    max_months: int = MAX_MONTHS,
+) -> list[PaymentPlanResult]:
+    """
+    Runs many payment plans across a pool of processes. With a ``cache`` only the scenarios
+    it has not seen before are run.
+
+    Parameters
+    ----------
+    scenarios : list[tuple[list[dict], float]]
+        Pairs of debt specs (see ``debt_specs``), in payoff order, and monthly_funds
+    max_workers : int, optional
+        How many processes to use, defaults to the number of CPUs
+    min_parallel : int
+        Runs serially in this process when there are fewer scenarios than this
+    cache : ResultCache, optional
+        Results are looked up in and added to this cache, keyed by ``scenario_key``. Cached
+        results are shared between callers so should not be modified.
+    max_months : int
+        The longest plan to run
+
+    Returns
+    -------
+    list[PaymentPlanResult]
+        One result per scenario, in the same order as ``scenarios``
+    """
+    worker = partial(_run_scenario, max_months=max_months)
+    kind = _horizon_kind("", max_months)
+
+    return _map_scenarios(worker, scenarios, max_workers, min_parallel, cache, kind)
+
+
+def summarize_scenarios(
+    scenarios: list[tuple[list[dict], float]],
+    totals: bool = False,
+    max_workers: int | None = None,
+    min_parallel: int = MIN_PARALLEL_SCENARIOS,
+    cache: ResultCache | None = None,
+    max_months: int = MAX_MONTHS,
+) -> list[PlanSummary]:
+    """
+    ``run_scenarios`` for when only the outcome of each plan is needed, see
+    ``summarize_payment_plan``. Summaries are cached separately from full results.
+    """
+    worker = partial(_summarize_scenario, totals=totals, max_months=max_months)
+    kind = _horizon_kind("summary_totals" if totals else "summary", max_months)
+
+    return _map_scenarios(worker, scenarios, max_workers, min_parallel, cache, kind)
+
+
+def _map_scenarios(
+    worker: Callable,
+    scenarios: list[tuple[list[dict], float]],
+    max_workers: int | None,
+    min_parallel: int,
+    cache: ResultCache | None = None,
+    kind: str = "",
+) -> list:
+    if cache is not None:
+        return _run_cached_scenarios(
+            worker, scenarios, max_workers, min_parallel, cache, kind
+        )
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    profile = profiling._active.get()
+    if profile is not None:
+        profile.count("scenarios_run", len(scenarios))
+
+    with profiling.phase("scenarios"):
+        if max_workers <= 1 or len(scenarios) < min_parallel:
+            return [worker(scenario) for scenario in scenarios]
+
+        executor = _get_executor(max_workers)
+        chunksize = max(1, math.ceil(len(scenarios) / (4 * max_workers)))
+
+        return list(executor.map(worker, scenarios, chunksize=chunksize))
+
+
+def _run_cached_scenarios(
+    worker: Callable,
+    scenarios: list[tuple[list[dict], float]],
+    max_workers: int | None,
+    min_parallel: int,
+    cache: ResultCache,
+    kind: str,
+) -> list:
+    # Different kinds of result for the same scenario must not share a key
+    keys = [
+        kind + scenario_key(specs, monthly_funds) for specs, monthly_funds in scenarios
+    ]
+
+    results = {}
+    missing = {}
+    for key, scenario in zip(keys, scenarios):
+        if key in results or key in missing:
+            continue
+
+        result = cache.get(key)
+        if result is None:
+            missing[key] = scenario
+        else:
+            results[key] = result
+
+    computed = _map_scenarios(worker, list(missing.values()), max_workers, min_parallel)
+    for key, result in zip(missing, computed):
+        if isinstance(result, PaymentPlanResult):
+            result = result.compact()
+
+        results[key] = result
+        cache.put(key, result)
+
+    return [results[key] for key in keys]
+
+
+def run_payment_plan_sweep(
+    specs: list[dict],
+    payments: list[float],
+    max_workers: int | None = None,
+    min_parallel: int = MIN_PARALLEL_SCENARIOS,
+    cache: ResultCache | None = None,
+    max_months: int = MAX_MONTHS,
+) -> list[PaymentPlanResult]:
+    """Runs the same debts at each monthly payment in ``payments``. See ``run_scenarios``."""
+    return run_scenarios(
+        [(specs, payment) for payment in payments],
+        max_workers=max_workers,
+        min_parallel=min_parallel,
+        cache=cache,
+        max_months=max_months,
+    )
@@ -0,0 +1,122 @@
+import math
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import (
+    MAX_MONTHS,
+    StopReason,
+    _advance_plan_month,
+    check_feasibility,
+    compute_payment_plan_events,
+)
+
+
+def _finishes_within(
+    specs: list[dict], monthly_funds: float, months: int, exact: bool
+) -> bool:
+    """
+    Whether every debt is paid off by month ``months``. The event-driven plan is used while
+    searching and the month by month plan to settle the exact cent.
+    """
+    debts = [Obligation(**spec) for spec in specs]
+
+    if not exact:
+        result = compute_payment_plan_events(debts, monthly_funds, max_months=months)
+        return result.stop_reason == StopReason.FINISHED
+
+    if check_feasibility(debts, monthly_funds) is not None:
+        return False
+
+    for _ in range(months):
+        if all([debt.is_finished for debt in debts]):
+            break
+        _advance_plan_month(debts, monthly_funds)
+
+    return all([debt.is_finished for debt in debts])
+
+
+def _annuity_payment(balance: float, rate: float, months: int) -> float:
+    if rate == 0:
+        return balance / months
+    return balance * rate / (1 - (1 + rate) ** -months)
+
+
+def _search_bounds(debts: list[Obligation], months: int) -> tuple[float, float]:
+    """
+    Bounds the answer by treating all of the loans as one loan at the lowest and at the
+    highest interest rate, since every month pays ``monthly_funds`` towards the total.
+    """
+    rates = [debt._monthly_rate() for debt in debts]
+    fixed_costs = sum([debt.fixed_costs or 0 for debt in debts])
+
+    if any([debt.obligation_type == ObligationType.SAVINGS for debt in debts]):
+        return 0.0, _first_month_payment(debts)
+
+    balance = sum([debt.get_balance() for debt in debts])
+    low = _annuity_payment(balance, min(rates), months) + fixed_costs
+    high = _annuity_payment(balance, max(rates), months) + fixed_costs
+    return max(low - 0.01, 0.0), high + 0.01
+
+
+def _first_month_payment(debts: list[Obligation]) -> float:
+    """A payment that finishes everything in the first month."""
+    return sum(
+        [
+            debt.amount * (1 + debt._monthly_rate()) + (debt.fixed_costs or 0) + 0.01
+            for debt in debts
+        ]
+    )
+
+
+def required_monthly_funds(debts: list[Obligation], months: int) -> float:
+    """
+    Finds the smallest monthly_funds, to the cent, that pays off every debt within ``months``
+    months when the debts are paid off in the order given, following ``run_payment_plan``.
+    Paying more each month never finishes later, so the answer is bisected between two bounds
+    using the event-driven plan and then checked month by month.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The debts in the order they are to be paid off
+    months : int
+        The month everything should be paid off by
+
+    Returns
+    -------
+    float
+        The monthly_funds needed
+    """
+    if months < 1:
+        raise ValueError("Must allow at least one month.")
+    if months > MAX_MONTHS:
+        raise ValueError(f"Can not plan for more than {MAX_MONTHS} months.")
+    if len(debts) == 0:
+        return 0.0
+
+    specs = [debt.to_spec() for debt in debts]
+    low, high = _search_bounds(debts, months)
+
+    # Search whole cents, keeping low short of the target and high reaching it
+    low = math.floor(low * 100)
+    high = math.ceil(high * 100)
+
+    if _finishes_within(specs, low / 100, months, exact=False):
+        low = 0
+    if not _finishes_within(specs, high / 100, months, exact=False):
+        high = math.ceil(_first_month_payment(debts) * 100)
+
+    while high - low > 1:
+        middle = (low + high) // 2
+        if _finishes_within(specs, middle / 100, months, exact=False):
+            high = middle
+        else:
+            low = middle
+
+    # The event-driven plan agrees to the cent, so only the last step needs settling
+    while not _finishes_within(specs, high / 100, months, exact=True):
+        high += 1
+    while high > 0 and _finishes_within(specs, (high - 1) / 100, months, exact=True):
+        high -= 1
+
+    return high / 100
@@ -0,0 +1,525 @@
+"""
+Payment plans where how the monthly funds are shared out is described by a ``Waterfall``
+rather than written as a new loop, e.g. paying a loan first, splitting between a loan and a
+savings goal, or capping what goes into savings and sending the rest to the debts:
+
+    Waterfall(
+        [
+            [Allocation("credit_card")],
+            [Allocation("student_loan", weight=2), Allocation("house", weight=1, cap=800)],
+            ["car"],
+        ]
+    )
+
+A waterfall is compiled once into flat arrays, so every month runs the same loop whatever
+the strategy, and ``run_waterfall_batch`` runs many portfolios and strategies together.
+"""
+
+import math
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from budgeter.batch import (
+    BatchPlanResult,
+    _advance_column,
+    _batch_params,
+    _BatchState,
+    _simulate,
+)
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import (
+    MAX_MONTHS,
+    PaymentPlanResult,
+    _collect,
+    _diverging_reason,
+    _iter_plan,
+    check_feasibility,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@dataclass
+class Allocation:
+    """
+    One obligation's place in a tier. ``weight`` is its share of the money reaching the tier
+    relative to the tier's other unfinished obligations, and ``cap`` is the most it is paid
+    in a month, including its minimum payment.
+    """
+
+    name: str
+    weight: float = 1.0
+    cap: float | None = None
+
+
+@dataclass
+class Waterfall:
+    """
+    How monthly funds are paid out to obligations of either type.
+
+    Every unfinished obligation first gets its minimum payment, unless ``pay_minimums`` is
+    False. The rest flows through ``tiers`` in order: the unfinished obligations of a tier
+    split what reaches it by weight, up to their caps, and whatever they can not take flows
+    on to the next tier. When an obligation finishes, the money it did not need is carried
+    over to the obligations after it in the same month, up to their caps. Money that no
+    obligation can take is not spent.
+
+    If the funds do not cover the minimums, the first unfinished obligation is paid that
+    much less, as in ``run_payment_plan``.
+
+    Parameters
+    ----------
+    tiers : list[list[Allocation | str]]
+        Obligations by name, or as ``Allocation``s to give them a weight or cap. Every
+        obligation in the plan must appear exactly once.
+    pay_minimums : bool
+        Whether minimum payments come before the tiers
+    """
+
+    tiers: list[list[Allocation | str]]
+    pay_minimums: bool = True
+
+    @classmethod
+    def priority(cls, names: list[str], pay_minimums: bool = True) -> "Waterfall":
+        """Pays obligations off one at a time in order, the same plan as ``run_payment_plan``."""
+        return cls([[name] for name in names], pay_minimums=pay_minimums)
+
+    @classmethod
+    def split(cls, weights: dict[str, float], pay_minimums: bool = True) -> "Waterfall":
+        """Shares the funds between obligations by weight, e.g. ``{"loan": 2, "savings": 1}``."""
+        return cls(
+            [[Allocation(name, weight) for name, weight in weights.items()]],
+            pay_minimums=pay_minimums,
+        )
+
+    def allocations(self) -> list[tuple[int, Allocation]]:
+        """``(tier, Allocation)`` for every obligation, in waterfall order."""
+        return [
+            (tier, Allocation(item) if isinstance(item, str) else item)
+            for tier, items in enumerate(self.tiers)
+            for item in items
+        ]
+
+    def compile(self, debts: list[Obligation]) -> "CompiledWaterfall":
+        """Checks the waterfall against ``debts`` and flattens it, see ``CompiledWaterfall``."""
+        positions = {debt.name: i for i, debt in enumerate(debts)}
+        if len(positions) != len(debts):
+            raise ValueError("Obligation names must be unique.")
+
+        allocations = self.allocations()
+        names = [allocation.name for _, allocation in allocations]
+        if sorted(names) != sorted(positions):
+            raise ValueError("Every obligation must be in the waterfall exactly once.")
+
+        for _, allocation in allocations:
+            if allocation.weight <= 0:
+                raise ValueError("Weights must be positive.")
+            if allocation.cap is not None and allocation.cap < 0:
+                raise ValueError("Caps must be positive.")
+
+        return CompiledWaterfall(
+            order=[positions[name] for name in names],
+            tiers=[tier for tier, _ in allocations],
+            weights=[float(allocation.weight) for _, allocation in allocations],
+            caps=[
+                math.inf if allocation.cap is None else float(allocation.cap)
+                for _, allocation in allocations
+            ],
+            pay_minimums=self.pay_minimums,
+        )
+
+
+@dataclass
+class CompiledWaterfall:
+    """
+    A ``Waterfall`` as flat lists in waterfall order: ``order`` holds the index of each
+    obligation in the plan's list of debts, and ``caps`` are infinite where there is no cap.
+    """
+
+    order: list[int]
+    tiers: list[int]
+    weights: list[float]
+    caps: list[float]
+    pay_minimums: bool = True
+    _tier_slices: list[slice] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Tiers are consecutive in waterfall order
+        starts = [
+            i
+            for i, tier in enumerate(self.tiers)
+            if i == 0 or tier != self.tiers[i - 1]
+        ]
+        self._tier_slices = [
+            slice(start, end)
+            for start, end in zip(starts, starts[1:] + [len(self.tiers)])
+        ]
+
+    def minimums(self, debts: list[Obligation]) -> list[float]:
+        if not self.pay_minimums:
+            return [0] * len(debts)
+
+        return [debt.minimum_payment or 0 for debt in debts]
+
+    def payments(self, debts: list[Obligation], monthly_funds: float) -> list[float]:
+        """
+        What each obligation is paid out of ``monthly_funds`` in a month where none of them
+        finishes, see ``Waterfall``. ``debts`` must be in waterfall order.
+        """
+        minimums = self.minimums(debts)
+        live = [not debt.is_finished for debt in debts]
+
+        payments = [
+            minimum if is_live else 0 for minimum, is_live in zip(minimums, live)
+        ]
+        remaining = monthly_funds - sum(
+            [minimum for minimum, is_live in zip(minimums, live) if is_live]
+        )
+
+        if remaining < 0 and any(live):
+            first = live.index(True)
+            payments[first] += remaining
+            remaining = 0
+
+        given = [0.0] * len(debts)
+        for tier in self._tier_slices:
+            if remaining <= 0:
+                break
+
+            open_positions = [
+                i
+                for i in range(tier.start, tier.stop)
+                if live[i] and self.caps[i] > payments[i]
+            ]
+
+            # Fill the tier by weight, topping up to their caps the obligations whose share
+            # would not fit and sharing what is left between the rest
+            while remaining > 0 and open_positions:
+                total_weight = sum([self.weights[i] for i in open_positions])
+                shares = {
+                    i: remaining * self.weights[i] / total_weight
+                    for i in open_positions
+                }
+                capped = [
+                    i for i in open_positions if shares[i] >= self.caps[i] - payments[i]
+                ]
+                if not capped:
+                    for i in open_positions:
+                        given[i] += shares[i]
+                    remaining = 0
+                    break
+
+                for i in capped:
+                    room = self.caps[i] - payments[i] - given[i]
+                    given[i] += room
+                    remaining -= room
+                open_positions = [i for i in open_positions if i not in capped]
+
+        return [payment + extra for payment, extra in zip(payments, given)]
+
+    def advance_month(self, debts: list[Obligation], monthly_funds: float):
+        """
+        Pays out one month of ``monthly_funds``, see ``Waterfall``. ``debts`` must be in
+        waterfall order.
+        """
+        payments = self.payments(debts, monthly_funds)
+
+        carry_over = 0.0
+        for i, debt in enumerate(debts):
+            if debt.is_finished:
+                continue
+
+            payment = payments[i]
+            if carry_over > 0:
+                taken = max(min(carry_over, self.caps[i] - payment), 0)
+                payment += taken
+                carry_over -= taken
+
+            carry_over += debt.advance_month(payment)
+
+
+def compute_waterfall_plan(
+    debts: list[Obligation],
+    waterfall: Waterfall,
+    monthly_funds: float,
+    max_months: int = MAX_MONTHS,
+) -> PaymentPlanResult:
+    """
+    Runs a payment plan that pays out ``monthly_funds`` according to ``waterfall``.
+
+    Parameters
+    ----------
+    debts : list[Obligation]
+        The obligations, loans or savings goals, in any order
+    waterfall : Waterfall
+        How each month's funds are shared out
+    monthly_funds : float
+        The amount available each month for all obligations combined
+    max_months : int
+        The longest plan to run
+
+    Returns
+    -------
+    PaymentPlanResult
+        The balances and totals paid for every month of the plan, with the obligations in
+        the order of ``debts``, and why the plan stopped
+    """
+    compiled = waterfall.compile(debts)
+    ordered = [debts[i] for i in compiled.order]
+    minimums = compiled.minimums(ordered)
+
+    result = PaymentPlanResult([debt.name for debt in debts], capacity=max_months + 1)
+    plan = _iter_plan(
+        debts,
+        lambda _: compiled.advance_month(ordered, monthly_funds),
+        max_months,
+        stop_reason=check_feasibility(
+            ordered, monthly_funds, compiled.payments(ordered, monthly_funds), minimums
+        ),
+        check=lambda _: _diverging_reason(
+            ordered, monthly_funds, compiled.payments(ordered, monthly_funds), minimums
+        ),
+    )
+
+    return _collect(result, plan)
+
+
+def run_waterfall_plan(
+    debts: list[Obligation],
+    waterfall: Waterfall,
+    monthly_funds: float,
+    max_months: int = MAX_MONTHS,
+) -> "pd.DataFrame":
+    return compute_waterfall_plan(
+        debts, waterfall, monthly_funds, max_months
+    ).to_dataframe()
+
+
+def waterfall_arrays(
+    portfolios: list[list[Obligation]], waterfalls: list[Waterfall]
+) -> dict[str, np.ndarray]:
+    """
+    Packs every portfolio with its waterfall into padded (portfolio, obligation) arrays in
+    waterfall order, to pass to ``run_waterfall_batch`` as keyword arguments. The same
+    portfolio can be given once per waterfall to compare strategies.
+    """
+    if len(portfolios) != len(waterfalls):
+        raise ValueError("Must give a waterfall for every portfolio.")
+
+    num_debts = max((len(debts) for debts in portfolios), default=0)
+    shape = (len(portfolios), num_debts)
+
+    arrays = {
+        "amounts": np.zeros(shape),
+        "interest_rates": np.zeros(shape),
+        "minimum_payments": np.zeros(shape),
+        "fixed_costs": np.zeros(shape),
+        "is_savings": np.zeros(shape, dtype=bool),
+        "mask": np.zeros(shape, dtype=bool),
+        "tiers": np.zeros(shape, dtype=int),
+        "weights": np.ones(shape),
+        "caps": np.full(shape, np.inf),
+    }
+
+    for i, (debts, waterfall) in enumerate(zip(portfolios, waterfalls)):
+        compiled = waterfall.compile(debts)
+        ordered = [debts[k] for k in compiled.order]
+
+        for j, debt in enumerate(ordered):
+            arrays["amounts"][i, j] = debt.amount
+            arrays["interest_rates"][i, j] = debt.interest_rate
+            arrays["minimum_payments"][i, j] = compiled.minimums([debt])[0]
+            arrays["fixed_costs"][i, j] = debt.fixed_costs or 0
+            arrays["is_savings"][i, j] = debt.obligation_type == ObligationType.SAVINGS
+            arrays["mask"][i, j] = True
+            arrays["tiers"][i, j] = compiled.tiers[j]
+            arrays["weights"][i, j] = compiled.weights[j]
+            arrays["caps"][i, j] = compiled.caps[j]
+
+        # Padding stays in the last tier so tiers never decrease along a row
+        arrays["tiers"][i, len(debts) :] = max(compiled.tiers, default=0)
+
+    return arrays
+
+
+def _fill_tiers(state, live, payments, remaining, num_tiers, tier_size) -> np.ndarray:
+    """The batch form of the tier filling in ``CompiledWaterfall.advance_month``."""
+    given = np.zeros_like(payments)
+    for tier in range(num_tiers):
+        open_slots = live & (state.tiers == tier) & (state.caps > payments)
+
+        for _ in range(tier_size):
+            filling = open_slots.any(axis=1) & (remaining > 0)
+            if not filling.any():
+                break
+
+            total_weight = np.where(open_slots, state.weights, 0).sum(axis=1)
+            shares = (
+                remaining[:, None]
+                * state.weights
+                / np.where(filling, total_weight, 1)[:, None]
+            )
+            room = state.caps - payments - given
+
+            capped = open_slots & filling[:, None] & (shares >= room)
+            shared = filling & ~capped.any(axis=1)
+
+            given += np.where(open_slots & shared[:, None], shares, 0)
+            given += np.where(capped, room, 0)
+            remaining = np.where(
+                shared, 0, remaining - np.where(capped, room, 0).sum(axis=1)
+            )
+            open_slots &= ~capped & ~shared[:, None]
+
+    return given
+
+
+def _waterfall_payments(state, num_tiers, tier_size) -> np.ndarray:
+    """``CompiledWaterfall.payments`` for every scenario in ``state``."""
+    live = ~state.is_finished
+    payments = np.where(live, state.minimums, 0)
+    remaining = state.funds - payments.sum(axis=1)
+
+    short = remaining < 0
+    if short.any():
+        first = np.argmax(live, axis=1)
+        rows = np.arange(live.shape[0])
+        payments[rows, first] += np.where(short, remaining, 0)
+        remaining = np.maximum(remaining, 0)
+
+    return payments + _fill_tiers(
+        state, live, payments, remaining, num_tiers, tier_size
+    )
+
+
+def _waterfall_step(
+    state, month, num_debts, any_loans, any_savings, num_tiers, tier_size
+):
+    """One month of ``CompiledWaterfall.advance_month`` for every scenario in ``state``."""
+    live = ~state.is_finished
+    payments = _waterfall_payments(state, num_tiers, tier_size)
+
+    carry_over = np.zeros(live.shape[0])
+    for col in range(num_debts):
+        col_live = live[:, col]
+        payment = payments[:, col]
+
+        taken = np.where(
+            col_live & (carry_over > 0),
+            np.maximum(np.minimum(carry_over, state.caps[:, col] - payment), 0),
+            0,
+        )
+        payment = np.where(taken > 0, payment + taken, payment)
+        carry_over = carry_over - taken
+
+        leftover = _advance_column(
+            state, col, month, payment, col_live, any_loans, any_savings
+        )
+        carry_over = carry_over + np.where(col_live, leftover, 0)
+
+
+def run_waterfall_batch(
+    amounts,
+    interest_rates,
+    minimum_payments,
+    monthly_funds,
+    tiers,
+    weights=None,
+    caps=None,
+    fixed_costs=None,
+    is_savings=None,
+    mask=None,
+    max_months: int = MAX_MONTHS,
+) -> BatchPlanResult:
+    """
+    Runs ``compute_waterfall_plan`` for every portfolio and every monthly_funds value at
+    once, with each portfolio's waterfall given as arrays, see ``waterfall_arrays``.
+
+    Parameters
+    ----------
+    amounts, interest_rates, minimum_payments : array_like
+        Obligation parameters shaped (portfolios, obligations), with each row in waterfall
+        order. Minimum payments should be 0 for waterfalls that do not pay minimums.
+    monthly_funds : array_like
+        The monthly_funds values to try for every portfolio, or shaped (portfolios, values)
+        to try different values for each portfolio.
+    tiers : array_like
+        The tier of every obligation, numbered from 0 and never decreasing along a row
+    weights : array_like, optional
+        Shares within a tier, by default equal
+    caps : array_like, optional
+        The most each obligation is paid in a month, infinite for no cap
+    fixed_costs, is_savings, mask : array_like, optional
+        As for ``run_payment_plan_batch``
+    max_months : int
+        The longest plan to simulate.
+
+    Returns
+    -------
+    BatchPlanResult
+        Results shaped (portfolios, monthly_funds values[, obligations]), with obligations in
+        waterfall order.
+    """
+    params = _batch_params(
+        amounts,
+        interest_rates,
+        minimum_payments,
+        monthly_funds,
+        fixed_costs,
+        is_savings,
+        mask,
+    )
+    shape = params.amounts.shape
+
+    tiers = np.broadcast_to(np.asarray(tiers, dtype=int).reshape(-1, shape[1]), shape)
+    weights = np.broadcast_to(
+        np.asarray(1.0 if weights is None else weights, dtype=float), shape
+    )
+    caps = np.broadcast_to(
+        np.asarray(np.inf if caps is None else caps, dtype=float), shape
+    )
+
+    if np.any(np.diff(tiers, axis=1) < 0):
+        raise ValueError("Obligations must be in waterfall order.")
+    if np.any(weights <= 0):
+        raise ValueError("Weights must be positive.")
+    if np.any(caps < 0):
+        raise ValueError("Caps must be positive.")
+
+    state = _BatchState(
+        rows=np.arange(params.num_scenarios),
+        amounts=params.per_scenario(params.amounts),
+        monthly_rates=params.per_scenario((params.interest_rates / 100) / 12),
+        fixed_costs=params.per_scenario(params.fixed_costs),
+        minimums=params.per_scenario(params.minimum_payments),
+        savings=params.per_scenario(params.is_savings),
+    )
+    state.funds = params.scenario_funds()
+    state.balance = np.where(state.savings, 0.0, state.amounts)
+    state.tiers = params.per_scenario(tiers)
+    state.weights = params.per_scenario(weights)
+    state.caps = params.per_scenario(caps)
+
+    num_tiers = int(tiers.max()) + 1 if tiers.size else 0
+    tier_size = max(
+        [int((tiers == tier).sum(axis=1).max()) for tier in range(num_tiers)],
+        default=0,
+    )
+    step = partial(_waterfall_step, num_tiers=num_tiers, tier_size=tier_size)
+    payments = partial(_waterfall_payments, num_tiers=num_tiers, tier_size=tier_size)
+
+    outputs = _simulate(
+        state,
+        params,
+        max_months,
+        step=step,
+        stop_infeasible=True,
+        payments=payments,
+    )
+
+    return params.result(outputs)
@@ -1,7 +1,11 @@
 # %%
+from budgeter.checkpoint import PlanChange, compute_checkpointed_plan
 from budgeter.obligation import Obligation
 from budgeter.obligation_types import ObligationType
+from budgeter.split import optimize_split, split_frontier
+from budgeter.waterfall import Allocation, Waterfall, compute_waterfall_plan
 
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -9,21 +13,16 @@ import plotly.graph_objects as go
 
 student_loan = Obligation("student_loan", 50000, ObligationType.LOAN, 5, 60)
 
-month = 1
-while not student_loan.is_finished:
-
-    student_loan.advance_month(900)
-    print(f"Month {month}: Remaining Balance: ${student_loan.get_balance()}")
-
-    month += 1
+payoff = student_loan.project_payoff(900)
+month = payoff.months
 
 years_taken = int(month / 12)
 remaining_months_taken = month % 12
 
 print(f"It took {years_taken} years and {remaining_months_taken} months")
 print(
-    f"Total Paid: ${student_loan.get_total_paid()}, Interest: ${student_loan.get_total_interest_paid()}, "
-    + f"Fixed Costs: ${student_loan.get_total_costs_paid()}"
+    f"Total Paid: ${payoff.total_paid:.2f}, Interest: ${payoff.total_interest:.2f}, "
+    + f"Fixed Costs: ${payoff.total_costs:.2f}"
 )
 
 # %%
@@ -67,34 +66,26 @@ def make_figure(
 # %%
 # Scenario 1 - Payoff student loan first
 
-student_loan = Obligation(**student_loan_parameters)
-aparment_down_payment = Obligation(**apartment_down_payment_parameters)
-
-month = 1
-student_loan_balances = []
-apartment_down_payment_balances = []
-months = []
-
-
-while not (student_loan.is_finished & aparment_down_payment.is_finished):
-    remaining_payment = student_loan.advance_month(PAYMENT_AMOUNT)
-    aparment_down_payment.advance_month(remaining_payment)
-
-    student_loan_balances.append(student_loan.get_balance())
-    apartment_down_payment_balances.append(aparment_down_payment.get_balance())
-    months.append(month)
-    month += 1
+scenario_1 = compute_waterfall_plan(
+    [
+        Obligation(**student_loan_parameters),
+        Obligation(**apartment_down_payment_parameters),
+    ],
+    Waterfall.priority(["student_loan", "apartment"]),
+    PAYMENT_AMOUNT,
+)
+month = len(scenario_1)
 
 
 scenario_1_figure = make_figure(
     "Pay Off Student Loan First",
-    months,
-    student_loan_balances,
-    apartment_down_payment_balances,
+    scenario_1["month"][1:],
+    scenario_1["student_loan_balance"][1:],
+    scenario_1["apartment_balance"][1:],
 )
 scenario_1_figure.show()
 
-scenario_1_student_loan_sum = student_loan.get_total_paid()
+scenario_1_student_loan_sum = scenario_1["student_loan_total_paid"][-1]
 print(
     f"Total Time: {month} months. ${scenario_1_student_loan_sum} was the total paid to student loans"
 )
@@ -172,6 +163,43 @@ perform_ratio_experiment("2/3", 2 / 3)
 perform_ratio_experiment("1/3", 1 / 3)
 perform_ratio_experiment("1/3", 1 / 3)
 
+# %%
+# Every split worth considering, and the cheapest one with the down payment ready by month 12
+frontier = split_frontier(
+    Obligation(**student_loan_parameters),
+    Obligation(**apartment_down_payment_parameters),
+    PAYMENT_AMOUNT,
+)
+for outcome in frontier:
+    print(
+        f"Split {outcome.split:.4f}: down payment ready on month {outcome.savings_ready_month}, "
+        + f"${outcome.loan_total_paid:.2f} paid to student loans"
+    )
+
+best_split = optimize_split(
+    Obligation(**student_loan_parameters),
+    Obligation(**apartment_down_payment_parameters),
+    PAYMENT_AMOUNT,
+    deadline=12,
+)
+perform_ratio_experiment(f"{best_split.split:.4f}", best_split.split)
+
+# %%
+# Tiers with a cap: at most $1,500 a month goes to the down payment and the rest to the loan
+capped_plan = compute_waterfall_plan(
+    [
+        Obligation(**student_loan_parameters),
+        Obligation(**apartment_down_payment_parameters),
+    ],
+    Waterfall([[Allocation("apartment", cap=1500)], ["student_loan"]]),
+    PAYMENT_AMOUNT,
+)
+capped_ready_month = int(np.argmax(capped_plan["apartment_balance"] >= 24800))
+print(
+    f"The down payment was ready on month {capped_ready_month}, "
+    + f"${capped_plan['student_loan_total_paid'][-1]:.2f} was paid to student loans"
+)
+
 # %%
 
 
@@ -180,13 +208,8 @@ def get_mortgage_costs_and_time(monthly_payment, starting_balance=631960):
         "mortgage", starting_balance, ObligationType.LOAN, 4.750, 1000
     )
 
-    month = 1
-    while not mortgage.is_finished:
-
-        mortgage.advance_month(monthly_payment)
-        # print(f"Month {month}: Remaining Balance: ${mortgage.get_balance()}")
-
-        month += 1
+    payoff = mortgage.project_payoff(monthly_payment)
+    month = payoff.months
 
     years_taken = int(month / 12)
     remaining_months_taken = month % 12
@@ -194,9 +217,9 @@ def get_mortgage_costs_and_time(monthly_payment, starting_balance=631960):
     return (
         years_taken,
         remaining_months_taken,
-        mortgage.get_total_paid(),
-        mortgage.get_total_interest_paid(),
-        mortgage.get_total_costs_paid(),
+        round(payoff.total_paid, 2),
+        round(payoff.total_interest, 2),
+        round(payoff.total_costs, 2),
     )
 
 
@@ -268,3 +291,16 @@ print_time_difference(normal_payment, initial_payment_10000, "10000 dollars now"
 
 print_cost_differences(normal_payment, initial_payment_20000, "20000 dollars now")
 print_time_difference(normal_payment, initial_payment_20000, "20000 dollars now")
+
+# %%
+# Lump sums later in the mortgage, restarting from the plan's checkpoints instead of month 0
+mortgage_plan = compute_checkpointed_plan(
+    [Obligation("mortgage", 631960, ObligationType.LOAN, 4.750, 1000, 4602)], 4602
+)
+for lump_sum_month in (0, 60, 120, 240):
+    what_if = mortgage_plan.what_if([PlanChange(lump_sum_month, lump_sum=10000)])
+    print(
+        f"10000 dollars on month {lump_sum_month} saves: "
+        + f"${mortgage_plan.summary.total_paid - what_if.total_paid:,.2f} total, "
+        + f"{mortgage_plan.summary.months - what_if.months} months"
+    )
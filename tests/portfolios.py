@@ -0,0 +1,58 @@
+"""Portfolios shared by the tests that compare payment plan engines against each other."""
+
+import pytest
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+
+# Debts in payoff order, each paid off with every monthly_funds value given for it
+PORTFOLIOS = {
+    "app defaults": (
+        [
+            dict(name="Loan 1", amount=20000, interest_rate=3, minimum_payment=200),
+            dict(name="Loan 2", amount=30000, interest_rate=4.25, minimum_payment=100),
+        ],
+        [400, 500, 900],
+    ),
+    "fixed costs and no interest": (
+        [
+            dict(name="card", amount=3500, interest_rate=19.99, minimum_payment=75),
+            dict(
+                name="car",
+                amount=8000,
+                interest_rate=6.5,
+                fixed_costs=5,
+                minimum_payment=250,
+            ),
+            dict(name="family", amount=2000, interest_rate=0, minimum_payment=50),
+        ],
+        [450, 800],
+    ),
+    "savings goal": (
+        [
+            dict(name="loan", amount=5000, interest_rate=8, minimum_payment=150),
+            dict(
+                name="emergency fund",
+                amount=6000,
+                obligation_type=ObligationType.SAVINGS,
+                interest_rate=2,
+                minimum_payment=100,
+            ),
+        ],
+        [400],
+    ),
+    "single loan": (
+        [dict(name="mortgage", amount=250000, interest_rate=6, minimum_payment=1500)],
+        [1600],
+    ),
+}
+
+CASES = [
+    pytest.param(name, monthly_funds, id=f"{name}-{monthly_funds}")
+    for name, (_, funds) in PORTFOLIOS.items()
+    for monthly_funds in funds
+]
+
+
+def make_debts(name: str) -> list[Obligation]:
+    return [Obligation(**spec) for spec in PORTFOLIOS[name][0]]
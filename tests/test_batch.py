@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from budgeter.batch import portfolio_arrays, run_payment_plan_batch
+from budgeter.payment_plan import run_payment_plan
+from tests.portfolios import CASES, PORTFOLIOS, make_debts
+
+
+@pytest.mark.parametrize("name, monthly_funds", CASES)
+def test_batch_matches_loop(name, monthly_funds):
+    debts = make_debts(name)
+    df = run_payment_plan(debts, monthly_funds)
+
+    result = run_payment_plan_batch(
+        **portfolio_arrays([make_debts(name)]), monthly_funds=[monthly_funds]
+    )
+
+    assert result.months[0, 0] == df["month"].iloc[-1]
+    assert result.is_finished[0, 0]
+    np.testing.assert_allclose(
+        result.balances[0, 0], [debt.get_balance() for debt in debts], atol=0.01
+    )
+    np.testing.assert_allclose(
+        result.total_paid[0, 0], [debt.get_total_paid() for debt in debts], atol=0.01
+    )
+
+
+def test_batch_runs_every_portfolio_and_payment_together():
+    names = list(PORTFOLIOS)
+    funds = [2000, 3000]
+
+    result = run_payment_plan_batch(
+        **portfolio_arrays([make_debts(name) for name in names]), monthly_funds=funds
+    )
+
+    assert result.months.shape == (len(names), len(funds))
+    for i, name in enumerate(names):
+        for j, monthly_funds in enumerate(funds):
+            df = run_payment_plan(make_debts(name), monthly_funds)
+
+            assert result.months[i, j] == df["month"].iloc[-1]
+            assert result.get_total_paid()[i, j] == pytest.approx(
+                df["total_paid"].iloc[-1], abs=0.01 * len(PORTFOLIOS[name][0])
+            )
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from budgeter.batch import portfolio_arrays
+from budgeter.cents import (
+    compute_payment_plan_cents,
+    float_tolerance,
+    run_payment_plan_batch_cents,
+)
+from budgeter.payment_plan import compute_payment_plan
+from tests.portfolios import CASES, make_debts
+from tests.test_payment_plan import STOP_CASES
+
+
+@pytest.mark.parametrize("name, monthly_funds", CASES)
+def test_cents_match_loop(name, monthly_funds):
+    expected = compute_payment_plan(make_debts(name), monthly_funds)
+
+    result = compute_payment_plan_cents(make_debts(name), monthly_funds)
+
+    tolerance = float_tolerance(make_debts(name), len(result) - 1)
+    np.testing.assert_array_equal(result.month, expected.month)
+    np.testing.assert_allclose(result.balances, expected.balances, atol=tolerance)
+    np.testing.assert_allclose(
+        result.debt_total_paid, expected.debt_total_paid, atol=tolerance
+    )
+
+
+@pytest.mark.parametrize("name, monthly_funds", CASES)
+def test_batch_cents_match_cents(name, monthly_funds):
+    expected = compute_payment_plan_cents(make_debts(name), monthly_funds)
+
+    result = run_payment_plan_batch_cents(
+        **portfolio_arrays([make_debts(name)]), monthly_funds=[monthly_funds]
+    )
+
+    assert result.months[0, 0] == expected.month[-1]
+    np.testing.assert_array_equal(result.balances[0, 0], expected.balances[-1])
+    np.testing.assert_array_equal(result.total_paid[0, 0], expected.debt_total_paid[-1])
+
+
+def test_cents_are_whole():
+    result = compute_payment_plan_cents(make_debts("app defaults"), 500)
+
+    for values in (result.balances, result.debt_total_paid):
+        np.testing.assert_allclose(values * 100, np.round(values * 100), atol=1e-6)
+
+
+@pytest.mark.parametrize("reason", list(STOP_CASES), ids=lambda reason: reason.name)
+def test_cents_stop_with_loop(reason):
+    make_stop_debts, monthly_funds, max_months, _ = STOP_CASES[reason]
+    expected = compute_payment_plan(make_stop_debts(), monthly_funds, max_months)
+
+    result = compute_payment_plan_cents(make_stop_debts(), monthly_funds, max_months)
+    batch = run_payment_plan_batch_cents(
+        **portfolio_arrays([make_stop_debts()]),
+        monthly_funds=[monthly_funds],
+        max_months=max_months,
+    )
+
+    assert result.stop_reason == reason
+    np.testing.assert_array_equal(result.month, expected.month)
+    assert batch.stop_reason[0, 0] == reason
+    assert batch.months[0, 0] == expected.month[-1]
+    np.testing.assert_array_equal(batch.balances[0, 0], result.balances[-1])
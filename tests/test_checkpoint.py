@@ -0,0 +1,78 @@
+import pytest
+
+from budgeter.checkpoint import PlanChange, compute_checkpointed_plan
+from budgeter.payment_plan import (
+    StopReason,
+    _advance_plan_month,
+    summarize_payment_plan,
+)
+from tests.portfolios import make_debts
+
+CHANGES = [
+    pytest.param([PlanChange(0, lump_sum=5000)], id="lump sum up front"),
+    pytest.param([PlanChange(30, lump_sum=5000)], id="lump sum between checkpoints"),
+    pytest.param([PlanChange(24, monthly_funds=900)], id="raise on a checkpoint"),
+    pytest.param([PlanChange(31, monthly_funds=350)], id="cut between checkpoints"),
+    pytest.param(
+        [PlanChange(40, lump_sum=2000), PlanChange(13, monthly_funds=700)],
+        id="several changes",
+    ),
+]
+
+
+def resimulate(name: str, monthly_funds: float, changes: list[PlanChange]):
+    """Runs the plan from the start, making each change when its month comes."""
+    debts = make_debts(name)
+    month = 0
+    for change in sorted(changes, key=lambda change: change.month):
+        for _ in range(change.month - month):
+            _advance_plan_month(debts, monthly_funds)
+        month = change.month
+
+        if change.monthly_funds is not None:
+            monthly_funds = change.monthly_funds
+
+        lump_sum = change.lump_sum
+        for debt in debts:
+            if lump_sum <= 0:
+                break
+            lump_sum = debt.pay_lump_sum(lump_sum)
+
+    rest = summarize_payment_plan(debts, monthly_funds)
+    return month + rest.months, rest.total_paid
+
+
+@pytest.mark.parametrize("interval", [1, 12])
+@pytest.mark.parametrize("changes", CHANGES)
+def test_what_if_matches_resimulation(changes, interval):
+    plan = compute_checkpointed_plan(make_debts("app defaults"), 500, interval=interval)
+
+    summary = plan.what_if(changes)
+    months, total_paid = resimulate("app defaults", 500, changes)
+
+    assert summary.is_finished
+    assert summary.months == months
+    assert summary.total_paid == pytest.approx(total_paid, abs=0.01)
+
+
+def test_what_if_without_changes_is_the_plan():
+    plan = compute_checkpointed_plan(make_debts("app defaults"), 500)
+
+    expected = summarize_payment_plan(make_debts("app defaults"), 500)
+
+    assert plan.what_if([]).months == expected.months
+    assert plan.what_if([]).total_paid == expected.total_paid
+
+
+def test_checkpointed_plan_stops_at_the_horizon():
+    plan = compute_checkpointed_plan(make_debts("app defaults"), 500, max_months=24)
+
+    expected = summarize_payment_plan(make_debts("app defaults"), 500, max_months=24)
+    summary = plan.what_if([PlanChange(12, monthly_funds=600)])
+
+    assert plan.summary.months == expected.months == 24
+    assert plan.summary.stop_reason == StopReason.HORIZON
+    assert summary.months == 24
+    assert summary.total_paid == pytest.approx(expected.total_paid + 12 * 100)
+    with pytest.raises(ValueError):
+        plan.what_if([PlanChange(25, lump_sum=1000)])
@@ -0,0 +1,99 @@
+import copy
+
+import pytest
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+
+# How long to step a plan before deciding it never finishes
+STEP_LIMIT = 2400
+
+OBLIGATIONS = {
+    "loan": lambda: Obligation(
+        "loan", 20000, ObligationType.LOAN, 4.25, minimum_payment=200
+    ),
+    "loan with fixed costs": lambda: Obligation(
+        "car", 8000, ObligationType.LOAN, 6.5, fixed_costs=15, minimum_payment=250
+    ),
+    "interest free loan": lambda: Obligation(
+        "family", 2000, ObligationType.LOAN, 0, minimum_payment=75
+    ),
+    "savings": lambda: Obligation(
+        "emergency fund", 6000, ObligationType.SAVINGS, 2, minimum_payment=100
+    ),
+    "savings without interest": lambda: Obligation(
+        "holiday", 1500, ObligationType.SAVINGS, 0, minimum_payment=100
+    ),
+}
+
+CASES = [
+    pytest.param(name, payment, id=f"{name}-{payment}")
+    for name in OBLIGATIONS
+    for payment in (None, 333.33, 1000)
+]
+
+
+def step(obligation: Obligation, payment: float | None) -> int | None:
+    """Advances ``obligation`` until it is finished, returning the month it finished on."""
+    if payment is None:
+        payment = obligation.minimum_payment
+
+    month = 0
+    while not obligation.is_finished:
+        if month == STEP_LIMIT:
+            return None
+
+        obligation.advance_month(payment)
+        month += 1
+
+    return month
+
+
+@pytest.mark.parametrize("name, payment", CASES)
+def test_months_to_finish_matches_stepping(name, payment):
+    obligation = OBLIGATIONS[name]()
+
+    assert obligation.months_to_finish(payment) == step(obligation, payment)
+
+
+@pytest.mark.parametrize("name, payment", CASES)
+def test_months_to_finish_part_way_through(name, payment):
+    obligation = OBLIGATIONS[name]()
+    for _ in range(7):
+        obligation.advance_month(payment or obligation.minimum_payment)
+
+    assert obligation.months_to_finish(payment) == step(obligation, payment)
+
+
+@pytest.mark.parametrize("name, payment", CASES)
+def test_project_payoff_matches_stepping(name, payment):
+    obligation = OBLIGATIONS[name]()
+    projection = obligation.project_payoff(payment)
+
+    stepped = copy.copy(obligation)
+    months = step(stepped, payment)
+
+    assert projection.months == months
+    assert projection.total_paid == pytest.approx(stepped.total_paid, abs=0.01)
+    assert projection.total_interest == pytest.approx(stepped.total_interest, abs=0.01)
+    assert projection.total_costs == pytest.approx(stepped.total_costs, abs=0.01)
+
+
+@pytest.mark.parametrize(
+    "obligation, payment",
+    [
+        (Obligation("loan", 20000, ObligationType.LOAN, 12, minimum_payment=0), 200),
+        (
+            Obligation(
+                "car", 8000, ObligationType.LOAN, 6, fixed_costs=15, minimum_payment=0
+            ),
+            55,
+        ),
+        (Obligation("savings", 6000, ObligationType.SAVINGS, 0, minimum_payment=0), 0),
+    ],
+    ids=["interest", "fixed costs", "no payment"],
+)
+def test_payments_that_never_finish(obligation, payment):
+    assert obligation.months_to_finish(payment) is None
+    assert obligation.project_payoff(payment).months is None
+    assert step(copy.copy(obligation), payment) is None
@@ -0,0 +1,88 @@
+import pytest
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.ordering import _evaluate, optimize_payoff_order
+from budgeter.payment_plan import StopReason
+
+PORTFOLIOS = {
+    "mixed rates": (
+        [
+            Obligation("card", 4000, ObligationType.LOAN, 22.9, minimum_payment=100),
+            Obligation("car", 12000, ObligationType.LOAN, 6.5, minimum_payment=250),
+            Obligation("student", 25000, ObligationType.LOAN, 4.5, minimum_payment=150),
+            Obligation("family", 3000, ObligationType.LOAN, 0, minimum_payment=50),
+            Obligation("store", 1500, ObligationType.LOAN, 12, minimum_payment=40),
+        ],
+        900,
+    ),
+    "fixed costs": (
+        [
+            Obligation(
+                "a", 6000, ObligationType.LOAN, 8, fixed_costs=20, minimum_payment=120
+            ),
+            Obligation("b", 9000, ObligationType.LOAN, 10, minimum_payment=90),
+            Obligation(
+                "c", 2500, ObligationType.LOAN, 5, fixed_costs=5, minimum_payment=60
+            ),
+            Obligation("d", 15000, ObligationType.LOAN, 7, minimum_payment=200),
+        ],
+        700,
+    ),
+    "app defaults": (
+        [
+            Obligation("Loan 1", 20000, ObligationType.LOAN, 3, minimum_payment=200),
+            Obligation("Loan 2", 30000, ObligationType.LOAN, 4.25, minimum_payment=100),
+        ],
+        500,
+    ),
+}
+
+
+@pytest.mark.parametrize("objective", ["total_paid", "months"])
+@pytest.mark.parametrize("name", list(PORTFOLIOS))
+def test_branch_and_bound_matches_exhaustive(name, objective):
+    debts, monthly_funds = PORTFOLIOS[name]
+
+    exhaustive, _ = optimize_payoff_order(
+        debts, monthly_funds, objective, method="exhaustive"
+    )
+    branch_and_bound, _ = optimize_payoff_order(
+        debts, monthly_funds, objective, method="branch_and_bound"
+    )
+
+    assert _evaluate(branch_and_bound, monthly_funds, objective) == _evaluate(
+        exhaustive, monthly_funds, objective
+    )
+
+
+def test_branch_and_bound_when_fixed_costs_outrun_funds():
+    # The large loan's interest and fixed costs take more than all of the funds
+    debts = [
+        Obligation(f"loan {i}", 2000, ObligationType.LOAN, 5, minimum_payment=0)
+        for i in range(5)
+    ] + [
+        Obligation(
+            "large", 10000, ObligationType.LOAN, 12, fixed_costs=50, minimum_payment=0
+        )
+    ]
+
+    exhaustive, _ = optimize_payoff_order(debts, 120, method="exhaustive")
+    branch_and_bound, _ = optimize_payoff_order(debts, 120, method="branch_and_bound")
+
+    assert _evaluate(branch_and_bound, 120, "total_paid") == _evaluate(
+        exhaustive, 120, "total_paid"
+    )
+
+
+@pytest.mark.parametrize("method", ["exhaustive", "branch_and_bound", "heuristic"])
+def test_optimize_stops_at_the_horizon(method):
+    debts, monthly_funds = PORTFOLIOS["mixed rates"]
+
+    ordered, df = optimize_payoff_order(
+        debts, monthly_funds, method=method, max_months=24
+    )
+
+    assert df["month"].iloc[-1] == 24
+    assert StopReason(df.attrs["stop_reason"]) == StopReason.HORIZON
+    assert _evaluate(ordered, monthly_funds, "total_paid", max_months=24)[0]
@@ -0,0 +1,170 @@
+import numpy as np
+import pytest
+
+from budgeter.batch import portfolio_arrays, run_payment_plan_batch
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import (
+    PaymentPlanResult,
+    StopReason,
+    compute_payment_plan,
+    compute_payment_plan_events,
+    run_payment_plan,
+    summarize_payment_plan,
+)
+from tests.portfolios import CASES, make_debts
+
+
+def test_result_columns_match_dataframe():
+    result = compute_payment_plan(make_debts("fixed costs and no interest"), 450)
+
+    df = result.to_dataframe()
+
+    assert list(df.columns) == result.columns
+    for column in result.columns:
+        np.testing.assert_array_equal(df[column], result[column])
+
+
+def test_result_unknown_column():
+    result = compute_payment_plan(make_debts("single loan"), 1600)
+
+    with pytest.raises(KeyError):
+        result["mortgage_interest"]
+
+
+def test_result_grows_past_capacity():
+    result = PaymentPlanResult(["loan"], capacity=1)
+    for month in range(5):
+        result.append(month, [100 - month], [month], 100 - month, month)
+
+    assert len(result) == 5
+    np.testing.assert_array_equal(result.month, range(5))
+    np.testing.assert_array_equal(result["loan_balance"], [100, 99, 98, 97, 96])
+    np.testing.assert_array_equal(result["loan_total_paid"], range(5))
+
+
+@pytest.mark.parametrize("name, monthly_funds", CASES)
+def test_events_match_loop(name, monthly_funds):
+    expected = compute_payment_plan(make_debts(name), monthly_funds)
+
+    result = compute_payment_plan_events(make_debts(name), monthly_funds)
+
+    assert result.month[-1] == expected.month[-1]
+    np.testing.assert_allclose(result.balances[-1], expected.balances[-1], atol=0.01)
+    np.testing.assert_allclose(
+        result.debt_total_paid[-1], expected.debt_total_paid[-1], atol=0.01
+    )
+
+
+@pytest.mark.parametrize("name, monthly_funds", CASES)
+def test_events_history_matches_loop(name, monthly_funds):
+    expected = compute_payment_plan(make_debts(name), monthly_funds)
+
+    result = compute_payment_plan_events(make_debts(name), monthly_funds, history=True)
+
+    np.testing.assert_array_equal(result.month, expected.month)
+    np.testing.assert_allclose(result.balances, expected.balances, atol=0.01)
+
+
+@pytest.mark.parametrize("name, monthly_funds", CASES)
+def test_summary_matches_loop(name, monthly_funds):
+    expected = compute_payment_plan(make_debts(name), monthly_funds)
+
+    summary = summarize_payment_plan(make_debts(name), monthly_funds, totals=True)
+
+    assert summary.months == expected.month[-1]
+    assert summary.is_finished
+    assert summary.total_paid == expected.total_paid[-1]
+    np.testing.assert_array_equal(summary.total_paid_by_month, expected.total_paid)
+    np.testing.assert_array_equal(
+        summary.total_balance_by_month, expected.total_balance
+    )
+
+
+def loan(name, amount, interest_rate, minimum_payment):
+    return Obligation(
+        name,
+        amount,
+        ObligationType.LOAN,
+        interest_rate,
+        minimum_payment=minimum_payment,
+    )
+
+
+# Debts, monthly_funds, max_months, why the plan stops and the month it stops on
+STOP_CASES = {
+    StopReason.FINISHED: (
+        lambda: [loan("a", 20000, 3, 200), loan("b", 30000, 4.25, 100)],
+        500,
+        1200,
+        None,
+    ),
+    StopReason.HORIZON: (
+        lambda: [loan("a", 10000, 5, 100)],
+        150,
+        24,
+        24,
+    ),
+    StopReason.BELOW_MINIMUMS: (
+        lambda: [loan("a", 20000, 3, 200), loan("b", 30000, 4.25, 100)],
+        50,
+        1200,
+        0,
+    ),
+    StopReason.INTEREST_EXCEEDS_FUNDS: (
+        lambda: [loan("a", 10000, 20, 100)],
+        150,
+        1200,
+        0,
+    ),
+    # The first loan is paid off before it is known that the second never will be
+    StopReason.NOT_SHRINKING: (
+        lambda: [loan("a", 1000, 5, 100), loan("b", 50000, 10, 50)],
+        400,
+        1200,
+        3,
+    ),
+}
+
+
+def test_every_stop_reason_has_a_case():
+    assert set(STOP_CASES) == set(StopReason)
+
+
+@pytest.mark.parametrize("reason", list(STOP_CASES), ids=lambda reason: reason.name)
+def test_plan_stops_for_reason(reason):
+    make_stop_debts, monthly_funds, max_months, month = STOP_CASES[reason]
+
+    df = run_payment_plan(make_stop_debts(), monthly_funds, max_months)
+
+    assert StopReason(df.attrs["stop_reason"]) == reason
+    if month is not None:
+        assert df["month"].iloc[-1] == month
+    if reason != StopReason.FINISHED:
+        assert df.iloc[-1]["total_balance"] > 0
+
+
+@pytest.mark.parametrize("reason", list(STOP_CASES), ids=lambda reason: reason.name)
+def test_engines_agree_on_stop_reason(reason):
+    make_stop_debts, monthly_funds, max_months, _ = STOP_CASES[reason]
+    expected = compute_payment_plan(make_stop_debts(), monthly_funds, max_months)
+
+    summary = summarize_payment_plan(
+        make_stop_debts(), monthly_funds, max_months=max_months
+    )
+    events = compute_payment_plan_events(
+        make_stop_debts(), monthly_funds, max_months=max_months
+    )
+    batch = run_payment_plan_batch(
+        **portfolio_arrays([make_stop_debts()]),
+        monthly_funds=[monthly_funds],
+        max_months=max_months,
+    )
+
+    assert expected.stop_reason == reason
+    assert summary.stop_reason == reason
+    assert summary.months == expected.month[-1]
+    assert events.stop_reason == reason
+    assert events.month[-1] == expected.month[-1]
+    assert batch.stop_reason[0, 0] == reason
+    assert batch.months[0, 0] == expected.month[-1]
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import iter_payment_plan, summarize_payment_plan
+from budgeter.sensitivity import PARAMETERS, compute_sensitivity
+
+# Small enough that no payoff month moves, so the plans are smooth around each input
+STEP = 1e-4
+
+PORTFOLIOS = {
+    "app defaults": (
+        [
+            dict(name="Loan 1", amount=20000, interest_rate=3, minimum_payment=200),
+            dict(name="Loan 2", amount=30000, interest_rate=4.25, minimum_payment=100),
+        ],
+        500,
+    ),
+    "fixed costs": (
+        [
+            dict(name="card", amount=3500, interest_rate=19.99, minimum_payment=75),
+            dict(
+                name="car",
+                amount=8000,
+                interest_rate=6.5,
+                fixed_costs=5,
+                minimum_payment=250,
+            ),
+            dict(name="family", amount=2000, interest_rate=1, minimum_payment=50),
+        ],
+        800,
+    ),
+    "savings goal": (
+        [
+            dict(name="loan", amount=5000, interest_rate=8, minimum_payment=150),
+            dict(
+                name="emergency fund",
+                amount=6000,
+                obligation_type=ObligationType.SAVINGS,
+                interest_rate=2,
+                minimum_payment=100,
+            ),
+        ],
+        400,
+    ),
+}
+
+
+def outcome(specs: list[dict], monthly_funds: float) -> tuple[float, float]:
+    """Total paid and months taken, counting the last month by how much of it was used."""
+    debts = [Obligation(**spec) for spec in specs]
+    # The totals in the snapshots are rounded to the cent, which would swamp the differences
+    total_paid = [
+        sum([debt.total_paid for debt in debts])
+        for _ in iter_payment_plan(debts, monthly_funds)
+    ]
+    last_payment = total_paid[-1] - total_paid[-2]
+
+    return total_paid[-1], len(total_paid) - 2 + last_payment / monthly_funds
+
+
+def finite_differences(specs: list[dict], monthly_funds: float) -> np.ndarray:
+    """Central differences of ``outcome`` in the same order as a ``SensitivityReport``."""
+    differences = []
+    for i in range(len(specs)):
+        for parameter in PARAMETERS:
+            plus = [dict(spec) for spec in specs]
+            minus = [dict(spec) for spec in specs]
+            plus[i][parameter] += STEP
+            minus[i][parameter] -= STEP
+
+            differences.append(
+                np.subtract(outcome(plus, monthly_funds), outcome(minus, monthly_funds))
+            )
+
+    differences.append(
+        np.subtract(
+            outcome(specs, monthly_funds + STEP), outcome(specs, monthly_funds - STEP)
+        )
+    )
+
+    return np.array(differences) / (2 * STEP)
+
+
+@pytest.mark.parametrize("name", list(PORTFOLIOS))
+def test_sensitivity_matches_finite_differences(name):
+    specs, monthly_funds = PORTFOLIOS[name]
+
+    report = compute_sensitivity([Obligation(**spec) for spec in specs], monthly_funds)
+    expected = finite_differences(specs, monthly_funds)
+
+    assert report.is_finished
+    np.testing.assert_allclose(
+        report.d_total_paid, expected[:, 0], rtol=1e-3, atol=1e-3
+    )
+    np.testing.assert_allclose(report.d_months, expected[:, 1], rtol=1e-3, atol=1e-3)
+
+
+@pytest.mark.parametrize("name", list(PORTFOLIOS))
+def test_sensitivity_runs_the_same_plan(name):
+    specs, monthly_funds = PORTFOLIOS[name]
+
+    report = compute_sensitivity([Obligation(**spec) for spec in specs], monthly_funds)
+    summary = summarize_payment_plan(
+        [Obligation(**spec) for spec in specs], monthly_funds
+    )
+
+    assert report.months == summary.months
+    assert report.total_paid == pytest.approx(summary.total_paid)
+
+
+def test_sensitivity_stops_at_the_horizon():
+    specs, monthly_funds = PORTFOLIOS["app defaults"]
+
+    report = compute_sensitivity(
+        [Obligation(**spec) for spec in specs], monthly_funds, max_months=24
+    )
+    summary = summarize_payment_plan(
+        [Obligation(**spec) for spec in specs], monthly_funds, max_months=24
+    )
+
+    assert report.months == summary.months == 24
+    assert not report.is_finished
+    assert report.total_paid == pytest.approx(summary.total_paid)
@@ -0,0 +1,58 @@
+import sqlite3
+import time
+
+from budgeter.payment_plan import compute_payment_plan
+from budgeter.store import TOUCH_INTERVAL, ResultStore
+from tests.portfolios import make_debts
+
+
+def make_store(tmp_path) -> ResultStore:
+    store = ResultStore(tmp_path / "results.sqlite3")
+    store.put("plan", compute_payment_plan(make_debts("app defaults"), 500))
+    return store
+
+
+def age(store: ResultStore, seconds: float):
+    store._connection().execute(
+        "UPDATE results SET last_used = last_used - ?", (seconds,)
+    )
+
+
+def last_used(store: ResultStore) -> float:
+    return store._connection().execute("SELECT last_used FROM results").fetchone()[0]
+
+
+def test_recent_reads_do_not_write(tmp_path):
+    store = make_store(tmp_path)
+    changes = store._connection().total_changes
+
+    assert store.get("plan") is not None
+    assert store._connection().total_changes == changes
+
+
+def test_stale_reads_mark_the_result_used(tmp_path):
+    store = make_store(tmp_path)
+    age(store, 2 * TOUCH_INTERVAL)
+    before = last_used(store)
+
+    assert store.get("plan") is not None
+    assert last_used(store) > before
+
+
+def test_reads_do_not_wait_for_writers(tmp_path):
+    store = make_store(tmp_path)
+    age(store, 2 * TOUCH_INTERVAL)
+    before = last_used(store)
+
+    writer = sqlite3.connect(store.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        start = time.perf_counter()
+        assert store.get("plan") is not None
+        assert time.perf_counter() - start < 5
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+    assert last_used(store) == before
+    store.close()
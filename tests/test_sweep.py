@@ -0,0 +1,13 @@
+from budgeter.payment_plan import StopReason
+from budgeter.sweep import debt_specs, run_payment_plan_sweep
+from tests.portfolios import make_debts
+
+
+def test_payment_sweep_stops_at_the_horizon():
+    results = run_payment_plan_sweep(
+        debt_specs(make_debts("app defaults")), [400, 500], max_months=24
+    )
+
+    for result in results:
+        assert result.month[-1] == 24
+        assert result.stop_reason == StopReason.HORIZON
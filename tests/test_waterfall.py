@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from budgeter.obligation import Obligation
+from budgeter.obligation_types import ObligationType
+from budgeter.payment_plan import StopReason, compute_payment_plan
+from budgeter.waterfall import (
+    Allocation,
+    Waterfall,
+    compute_waterfall_plan,
+    run_waterfall_batch,
+    waterfall_arrays,
+)
+from tests.portfolios import CASES, make_debts
+from tests.test_payment_plan import STOP_CASES
+
+
+def priority(debts):
+    return Waterfall.priority([debt.name for debt in debts])
+
+
+@pytest.mark.parametrize("name, monthly_funds", CASES)
+def test_priority_waterfall_matches_loop(name, monthly_funds):
+    expected = compute_payment_plan(make_debts(name), monthly_funds)
+    debts = make_debts(name)
+
+    result = compute_waterfall_plan(debts, priority(debts), monthly_funds)
+
+    np.testing.assert_array_equal(result.month, expected.month)
+    np.testing.assert_array_equal(result.balances, expected.balances)
+    np.testing.assert_array_equal(result.total_paid, expected.total_paid)
+
+
+@pytest.mark.parametrize("name, monthly_funds", CASES)
+def test_waterfall_batch_matches_loop(name, monthly_funds):
+    expected = compute_payment_plan(make_debts(name), monthly_funds)
+    debts = make_debts(name)
+
+    result = run_waterfall_batch(
+        **waterfall_arrays([debts], [priority(debts)]), monthly_funds=[monthly_funds]
+    )
+
+    assert result.months[0, 0] == expected.month[-1]
+    assert result.is_finished[0, 0]
+    np.testing.assert_allclose(
+        result.total_paid[0, 0], expected.debt_total_paid[-1], atol=0.01
+    )
+
+
+@pytest.mark.parametrize("monthly_funds", [400, 800])
+def test_split_waterfall_batch_matches_plan(monthly_funds):
+    debts = make_debts("fixed costs and no interest")
+    waterfall = Waterfall(
+        [[Allocation("card", weight=2), Allocation("car", weight=1)], ["family"]]
+    )
+
+    expected = compute_waterfall_plan(debts, waterfall, monthly_funds)
+    result = run_waterfall_batch(
+        **waterfall_arrays([make_debts("fixed costs and no interest")], [waterfall]),
+        monthly_funds=[monthly_funds],
+    )
+
+    assert result.months[0, 0] == expected.month[-1]
+    np.testing.assert_allclose(
+        result.total_paid[0, 0], expected.debt_total_paid[-1], atol=0.01
+    )
+    # Nothing is paid beyond the monthly funds
+    assert np.all(np.diff(expected.total_paid) <= monthly_funds + 1e-9)
+
+
+@pytest.mark.parametrize("reason", list(STOP_CASES), ids=lambda reason: reason.name)
+def test_priority_waterfall_stops_with_loop(reason):
+    make_stop_debts, monthly_funds, max_months, _ = STOP_CASES[reason]
+    expected = compute_payment_plan(make_stop_debts(), monthly_funds, max_months)
+    debts = make_stop_debts()
+
+    result = compute_waterfall_plan(debts, priority(debts), monthly_funds, max_months)
+    batch = run_waterfall_batch(
+        **waterfall_arrays([debts], [priority(debts)]),
+        monthly_funds=[monthly_funds],
+        max_months=max_months,
+    )
+
+    assert result.stop_reason == reason
+    np.testing.assert_array_equal(result.month, expected.month)
+    assert batch.stop_reason[0, 0] == reason
+    assert batch.months[0, 0] == expected.month[-1]
+
+
+def test_capped_waterfall_that_never_shrinks():
+    # The cap leaves the loan less than its interest, and the rest of the funds unspent
+    debts = [Obligation("loan", 10000, ObligationType.LOAN, 12, minimum_payment=50)]
+    waterfall = Waterfall([[Allocation("loan", cap=90)]])
+
+    result = compute_waterfall_plan(debts, waterfall, 500)
+    batch = run_waterfall_batch(
+        **waterfall_arrays([debts], [waterfall]), monthly_funds=[500]
+    )
+
+    assert result.stop_reason == StopReason.NOT_SHRINKING
+    assert result.month[-1] == 0
+    assert batch.stop_reason[0, 0] == StopReason.NOT_SHRINKING